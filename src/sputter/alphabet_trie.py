@@ -1,7 +1,13 @@
 """A trie where each node represents a letter of the alphabet."""
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+import math
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+_ORD_A = ord("A")
 
 
 @dataclass
@@ -40,3 +46,207 @@ class AlphabetTrieNode:
             child = AlphabetTrieNode()
             self.children[ord(word[0]) - self.__ORD_A] = child
         child.insert(word[1:], value)
+
+
+class CompactAlphabetTrie:
+    """A static trie of uppercase words, stored in contiguous arrays.
+
+    Each node is identified by an integer index, and the root node has index 0. The
+    children of node i are stored in row i of the children array, with -1 indicating
+    that there is no child for a letter. Looking up a child is a single integer
+    indexing operation, and no objects are allocated per node.
+    """
+
+    ROOT = 0
+    """The index of the root node."""
+
+    NO_NODE = -1
+    """The index used to indicate a missing node."""
+
+    children: np.ndarray
+    """An int32 array of shape (node count, 26) of child node indices."""
+
+    parents: np.ndarray
+    """An int32 array of the parent index of each node (-1 for the root)."""
+
+    letters: np.ndarray
+    """An int8 array of the letter index (A is 0) leading to each node (-1 for the
+    root)."""
+
+    values: np.ndarray
+    """A float64 array of the value of the word ending at each node, or NaN if no word
+    ends at that node."""
+
+    min_descendant_values: np.ndarray
+    """A float64 array of the minimum value of the words with each node's prefix."""
+
+    max_descendant_values: np.ndarray
+    """A float64 array of the maximum value of the words with each node's prefix."""
+
+    max_word_length: int
+    """The length of the longest word in the trie."""
+
+    def __init__(self, words: Iterable[str], values: Iterable[float]):
+        """Build a trie in bulk.
+
+        :param words: The words to insert. Must only contain uppercase letters.
+        :param values: The value of each word.
+        """
+        word_values = sorted(zip(words, values, strict=True))
+        word_count = len(word_values)
+        lengths = np.array([len(w) for w, _ in word_values], dtype=np.intp)
+        max_length = int(lengths.max(initial=0))
+        self.max_word_length = max_length
+
+        # Row i of letter_matrix holds the letter indices of the i-th sorted word,
+        # padded with -1. Column d of prefix_nodes holds the index of the node for the
+        # length d prefix of each word.
+        letter_matrix = np.full((word_count, max_length), -1, dtype=np.int8)
+        if word_count:
+            padded = "".join(w.ljust(max_length, "@") for w, _ in word_values)
+            letter_matrix[:] = (
+                np.frombuffer(padded.encode("ascii"), dtype=np.uint8).reshape(
+                    word_count, max_length
+                )
+                - _ORD_A
+            )
+        same_as_previous = np.zeros((word_count, max_length), dtype=bool)
+        same_as_previous[1:] = letter_matrix[1:] == letter_matrix[:-1]
+        common_prefix_lengths = np.cumprod(same_as_previous, axis=1).sum(axis=1)
+        depth_range = np.arange(1, max_length + 1)
+        is_new_node = (depth_range > common_prefix_lengths[:, None]) & (
+            depth_range <= lengths[:, None]
+        )
+        node_count = 1 + int(is_new_node.sum())
+        prefix_nodes = np.zeros((word_count, max_length + 1), dtype=np.int32)
+        prefix_nodes[:, 1:][is_new_node] = np.arange(1, node_count, dtype=np.int32)
+        np.maximum.accumulate(prefix_nodes, axis=0, out=prefix_nodes)
+
+        word_index, depth_index = np.nonzero(is_new_node)
+        self.parents = np.full(node_count, self.NO_NODE, dtype=np.int32)
+        self.parents[1:] = prefix_nodes[word_index, depth_index]
+        self.letters = np.full(node_count, -1, dtype=np.int8)
+        self.letters[1:] = letter_matrix[word_index, depth_index]
+        depths = np.zeros(node_count, dtype=np.intp)
+        depths[1:] = depth_index + 1
+        self.values = np.full(node_count, math.nan)
+        self.values[prefix_nodes[np.arange(word_count), lengths]] = [
+            v for _, v in word_values
+        ]
+        self.children = np.full((node_count, 26), self.NO_NODE, dtype=np.int32)
+        self.children[self.parents[1:], self.letters[1:]] = np.arange(
+            1, node_count, dtype=np.int32
+        )
+
+        self.min_descendant_values = self.values.copy()
+        self.max_descendant_values = self.values.copy()
+        for depth in range(max_length, 0, -1):
+            nodes = np.flatnonzero(depths == depth)
+            np.fmin.at(
+                self.min_descendant_values,
+                self.parents[nodes],
+                self.min_descendant_values[nodes],
+            )
+            np.fmax.at(
+                self.max_descendant_values,
+                self.parents[nodes],
+                self.max_descendant_values[nodes],
+            )
+
+        self._flat_children = memoryview(self.children.ravel())
+        self._flat_values = memoryview(self.values)
+        self._flat_min_descendant_values = memoryview(self.min_descendant_values)
+        self._flat_max_descendant_values = memoryview(self.max_descendant_values)
+
+    def __len__(self) -> int:
+        """Return the number of nodes in the trie."""
+        return len(self.parents)
+
+    def child(self, node: int, letter: int) -> int:
+        """Return the index of a child node, or -1 if there is no such child.
+
+        :param node: The index of the parent node.
+        :param letter: The index of the letter leading to the child, where A is 0.
+        """
+        return self._flat_children[node * 26 + letter]
+
+    def value(self, node: int) -> Optional[float]:
+        """Return the value of the word ending at a node, or None if there is none."""
+        return _optional_float(self._flat_values[node])
+
+    def find(self, word: str, node: int = ROOT) -> int:
+        """Return the index of the node reached by following word, or -1.
+
+        :param word: The letters to follow. Must only contain uppercase letters.
+        :param node: The index of the node to start from.
+        """
+        flat_children = self._flat_children
+        for c in word:
+            node = flat_children[node * 26 + ord(c) - _ORD_A]
+            if node < 0:
+                return self.NO_NODE
+        return node
+
+    def word(self, node: int) -> str:
+        """Return the prefix that leads from the root to a node."""
+        letters = []
+        while node > self.ROOT:
+            letters.append(chr(int(self.letters[node]) + _ORD_A))
+            node = int(self.parents[node])
+        return "".join(reversed(letters))
+
+    def root(self) -> "CompactAlphabetTrieNode":
+        """Return a handle to the root node."""
+        return CompactAlphabetTrieNode(self, self.ROOT)
+
+
+class CompactAlphabetTrieNode:
+    """A lightweight handle to a node in a CompactAlphabetTrie.
+
+    This provides the same read-only interface as AlphabetTrieNode.
+    """
+
+    __slots__ = ("index", "trie")
+
+    def __init__(self, trie: CompactAlphabetTrie, index: int):
+        self.trie = trie
+        self.index = index
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, CompactAlphabetTrieNode)
+            and self.trie is other.trie
+            and self.index == other.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.trie), self.index))
+
+    def __repr__(self) -> str:
+        return f"CompactAlphabetTrieNode({self.trie.word(self.index)!r})"
+
+    @property
+    def value(self) -> Optional[float]:
+        """The value of the word ending at this node, or None."""
+        return self.trie.value(self.index)
+
+    @property
+    def min_descendant_value(self) -> Optional[float]:
+        """The minimum value of the words with this node's prefix, or None."""
+        return _optional_float(self.trie._flat_min_descendant_values[self.index])
+
+    @property
+    def max_descendant_value(self) -> Optional[float]:
+        """The maximum value of the words with this node's prefix, or None."""
+        return _optional_float(self.trie._flat_max_descendant_values[self.index])
+
+    def subtrie(self, word: str) -> Optional["CompactAlphabetTrieNode"]:
+        """Return the subtrie starting with the given word."""
+        index = self.trie.find(word, self.index)
+        if index < 0:
+            return None
+        return CompactAlphabetTrieNode(self.trie, index)
+
+
+def _optional_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
@@ -5,6 +5,7 @@ from scipy.optimize import Bounds, LinearConstraint, milp
 from typing import Callable, List, Optional, Tuple
 
 from sputter.fitness import WordStatistics
+from sputter.registry import word_statistics
 
 
 def anagram_phrase(
@@ -18,8 +19,8 @@ def anagram_phrase(
     """Return phrases that can be formed from the given letters.
 
     :param letters: The letters to be anagrammed.
-    :param ws: The WordStatistics to use. If None, a new WordStatistics will be
-        created.
+    :param ws: The WordStatistics to use. If None, the shared default
+        WordStatistics is used.
     :param top_n: The maximum number of results to return.
     :param min_words: The minimum number of words allowed in the output.
     :param max_words: The maximum number of words allowed in the output.
@@ -28,7 +29,7 @@ def anagram_phrase(
         and their fitness score.
     """
     if not ws:
-        ws = WordStatistics()
+        ws = word_statistics()
     if not letters:
         return []
 
@@ -1,9 +1,45 @@
-"""A module implementing common ciphers."""
+"""A module implementing common ciphers.
 
+Each key is compiled once into a translation table or a NumPy lookup array, which
+is then applied to the whole text at once. The *_keys functions decrypt one text
+under many keys, and the *_texts functions decrypt many texts under one key, in a
+single call. The *_texts functions join the texts, decrypt the joined text in one
+operation, and split the result.
+
+Only the letters A through Z (after converting to uppercase) are enciphered. All
+other characters are passed through unchanged.
+"""
+
+import functools
 import itertools
 import random
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from sputter.encoded_text import encode_key, EncodedText
+
+_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+@functools.lru_cache(maxsize=26)
+def _shifted_caesar_table(shift: int) -> Dict[int, int]:
+    return str.maketrans(_ALPHABET, _ALPHABET[shift:] + _ALPHABET[:shift])
+
+
+def _caesar_table(shift: int) -> Dict[int, int]:
+    return _shifted_caesar_table(shift % 26)
+
+
+def _join_upper(texts: Sequence[str]) -> Tuple[str, List[int]]:
+    # Uppercasing can change the length of a string, so it is done before joining.
+    upper_texts = [text.upper() for text in texts]
+    return "".join(upper_texts), [len(text) for text in upper_texts]
+
 
-__ORD_A = ord("A")
+def _split(text: str, lengths: Sequence[int]) -> List[str]:
+    ends = list(itertools.accumulate(lengths))
+    return [text[end - length : end] for end, length in zip(ends, lengths, strict=True)]
 
 
 def vigenere_encrypt(plaintext: str, key: str) -> str:
@@ -14,14 +50,7 @@ def vigenere_encrypt(plaintext: str, key: str) -> str:
 
     :return: The encrypted ciphertext.
     """
-    key_iter = itertools.cycle([ord(c) - __ORD_A for c in key.upper()])
-    ciphertext = ""
-    for c in plaintext.upper():
-        if c.isalpha():
-            ciphertext += chr((ord(c) - __ORD_A + next(key_iter)) % 26 + __ORD_A)
-        else:
-            ciphertext += c
-    return ciphertext
+    return str(EncodedText.from_str(plaintext).vigenere_encrypt(key))
 
 
 def vigenere_decrypt(ciphertext: str, key: str) -> str:
@@ -32,14 +61,67 @@ def vigenere_decrypt(ciphertext: str, key: str) -> str:
 
     :return: The decrypted plaintext.
     """
-    key_iter = itertools.cycle([ord(c) - __ORD_A for c in key.upper()])
-    plaintext = ""
-    for c in ciphertext.upper():
-        if c.isalpha():
-            plaintext += chr((ord(c) - __ORD_A - next(key_iter)) % 26 + __ORD_A)
-        else:
-            plaintext += c
-    return plaintext
+    return str(EncodedText.from_str(ciphertext).vigenere_decrypt(key))
+
+
+def vigenere_decrypt_codes(letter_codes: np.ndarray, keys: Sequence[str]) -> np.ndarray:
+    """Decrypt integer-encoded ciphertext letters under many Vigenere keys at once.
+
+    :param letter_codes: The letter indices (A is 0) of the ciphertext's letters.
+    :param keys: The keys to decrypt with. Must only contain alphabetic characters.
+        Keys may have different lengths.
+
+    :return: A (len(keys), len(letter_codes)) uint8 array, in which row i holds the
+        letter indices of the plaintext decrypted with keys[i].
+    """
+    letter_codes = np.asarray(letter_codes, dtype=np.uint8)
+    plaintexts = np.empty((len(keys), len(letter_codes)), dtype=np.uint8)
+    keys_by_length: Dict[int, List[int]] = {}
+    for i, key in enumerate(keys):
+        keys_by_length.setdefault(len(key), []).append(i)
+    for length, indices in keys_by_length.items():
+        key_codes = encode_key("".join(keys[i] for i in indices)).reshape(-1, length)
+        shifts = key_codes[:, np.arange(len(letter_codes)) % length]
+        plaintexts[indices] = (letter_codes + 26 - shifts) % 26
+    return plaintexts
+
+
+def vigenere_decrypt_keys(ciphertext: str, keys: Sequence[str]) -> List[str]:
+    """Decrypt a ciphertext under many Vigenere keys.
+
+    :param ciphertext: The ciphertext to decrypt.
+    :param keys: The keys to decrypt with. Must only contain alphabetic characters.
+
+    :return: The plaintexts, one for each key.
+    """
+    text = EncodedText.from_str(ciphertext)
+    return [
+        str(text.with_letter_codes(codes))
+        for codes in vigenere_decrypt_codes(text.letter_codes(), keys)
+    ]
+
+
+def vigenere_decrypt_texts(ciphertexts: Sequence[str], key: str) -> List[str]:
+    """Decrypt many ciphertexts under one Vigenere key.
+
+    :param ciphertexts: The ciphertexts to decrypt.
+    :param key: The key to decrypt with. Must only contain alphabetic characters.
+
+    :return: The plaintexts, one for each ciphertext.
+    """
+    joined, lengths = _join_upper(ciphertexts)
+    text = EncodedText.from_str(joined)
+    # The key restarts at the first letter of each ciphertext.
+    letters_before = np.concatenate(([0], np.cumsum(text.letters)))
+    letter_ends = letters_before[np.cumsum(lengths, dtype=np.intp)]
+    letter_counts = np.diff(letter_ends, prepend=0)
+    positions = np.arange(int(letter_counts.sum())) - np.repeat(
+        letter_ends - letter_counts, letter_counts
+    )
+    key_codes = encode_key(key)
+    shifts = key_codes[positions % len(key_codes)]
+    plaintext = text.with_letter_codes((text.letter_codes() + 26 - shifts) % 26)
+    return _split(str(plaintext), lengths)
 
 
 def caesar_shift(text: str, shift: int) -> str:
@@ -50,13 +132,19 @@ def caesar_shift(text: str, shift: int) -> str:
 
     :return: The shifted text.
     """
-    shifted_text = ""
-    for c in text.upper():
-        if c.isalpha():
-            shifted_text += chr((ord(c) - __ORD_A + shift) % 26 + __ORD_A)
-        else:
-            shifted_text += c
-    return shifted_text
+    return text.upper().translate(_caesar_table(shift))
+
+
+def caesar_shift_keys(text: str, shifts: Sequence[int]) -> List[str]:
+    """Shift a text by each of many numbers of positions in the alphabet.
+
+    :param text: The text to shift.
+    :param shifts: The numbers of positions to shift.
+
+    :return: The shifted texts, one for each shift.
+    """
+    text = text.upper()
+    return [text.translate(_caesar_table(shift)) for shift in shifts]
 
 
 def substitution_encrypt(plaintext: str, key: str) -> str:
@@ -67,13 +155,7 @@ def substitution_encrypt(plaintext: str, key: str) -> str:
 
     :return: The encrypted ciphertext.
     """
-    ciphertext = ""
-    for c in plaintext.upper():
-        if c.isalpha():
-            ciphertext += key[ord(c) - __ORD_A]
-        else:
-            ciphertext += c
-    return ciphertext
+    return plaintext.upper().translate(str.maketrans(_ALPHABET, key))
 
 
 def substitution_decrypt(ciphertext: str, key: str) -> str:
@@ -84,13 +166,32 @@ def substitution_decrypt(ciphertext: str, key: str) -> str:
 
     :return: The decrypted plaintext.
     """
-    plaintext = ""
-    for c in ciphertext.upper():
-        if c.isalpha():
-            plaintext += chr(key.index(c) + __ORD_A)
-        else:
-            plaintext += c
-    return plaintext
+    return ciphertext.upper().translate(str.maketrans(key, _ALPHABET))
+
+
+def substitution_decrypt_keys(ciphertext: str, keys: Sequence[str]) -> List[str]:
+    """Decrypt a ciphertext under many substitution keys.
+
+    :param ciphertext: The ciphertext to decrypt.
+    :param keys: The keys to decrypt with. Each must be a permutation of the
+        alphabet.
+
+    :return: The plaintexts, one for each key.
+    """
+    ciphertext = ciphertext.upper()
+    return [ciphertext.translate(str.maketrans(key, _ALPHABET)) for key in keys]
+
+
+def substitution_decrypt_texts(ciphertexts: Sequence[str], key: str) -> List[str]:
+    """Decrypt many ciphertexts under one substitution key.
+
+    :param ciphertexts: The ciphertexts to decrypt.
+    :param key: The key to decrypt with. Must be a permutation of the alphabet.
+
+    :return: The plaintexts, one for each ciphertext.
+    """
+    joined, lengths = _join_upper(ciphertexts)
+    return _split(joined.translate(str.maketrans(key, _ALPHABET)), lengths)
 
 
 def substitution_generate_random_key() -> str:
@@ -98,6 +199,6 @@ def substitution_generate_random_key() -> str:
 
     :return: A random permutation of the alphabet.
     """
-    key_list = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    key_list = list(_ALPHABET)
     random.shuffle(key_list)
     return "".join(key_list)
@@ -1,8 +1,42 @@
-"""A module implementing index of coincidence calculations."""
+"""A module implementing index of coincidence calculations.
 
-from sputter.mung import uppercase_only
+Texts are normalized and encoded as letter indices once, and the letter counts of
+every column for a modulus are then computed in a single bincount over
+(index mod modulus, letter). delta_bars numbers the columns of many moduli
+consecutively and counts them all in one bincount, without building any
+intermediate strings.
 
-__ORD_A = ord("A")
+The period detectors in this module rank candidate periods of a periodic cipher
+such as Vigenere. Their cost does not depend on the number of periods considered:
+autocorrelation counts the coincidences at every shift at once with FFTs, and
+Kasiski analysis finds every repeated trigram with a single sort.
+"""
+
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from sputter.encoded_text import EncodedText
+
+
+_DELTA_BARS_BATCH_BINS = 1 << 16
+
+
+def _letter_codes(text: str) -> np.ndarray:
+    return EncodedText.from_str(text).letter_codes().astype(np.intp)
+
+
+def _iocs(counts: np.ndarray) -> np.ndarray:
+    n = counts.sum(axis=1)
+    pairs = (counts * (counts - 1)).sum(axis=1)
+    return np.where(n >= 2, pairs / np.maximum(n * (n - 1), 1), 1.0)
+
+
+def _column_iocs(codes: np.ndarray, positions: np.ndarray, modulus: int) -> np.ndarray:
+    counts = np.bincount(
+        positions % modulus * 26 + codes, minlength=modulus * 26
+    ).reshape(modulus, 26)
+    return _iocs(counts)
 
 
 def index_of_coincidence(text: str) -> float:
@@ -14,14 +48,22 @@ def index_of_coincidence(text: str) -> float:
     :param text: The text for which to calculate the index of coincidence.
     :return: The index of coincidence.
     """
-    text = uppercase_only(text)
-    n = len(text)
-    if n < 2:
-        return 1.0
-    freq = [0] * 26
-    for c in text:
-        freq[ord(c) - __ORD_A] += 1
-    return sum(f * (f - 1) for f in freq) / (n * (n - 1))
+    codes = _letter_codes(text)
+    return float(_column_iocs(codes, np.zeros_like(codes), 1)[0])
+
+
+def column_indices_of_coincidence(text: str, modulus: int) -> np.ndarray:
+    """Calculate the index of coincidence of each column of a text.
+
+    Column i holds the letters at the positions i, i + modulus, i + 2 * modulus, and
+    so on, ignoring non-letters.
+
+    :param text: The text to split into columns.
+    :param modulus: The number of columns.
+    :return: An array of the modulus indices of coincidence.
+    """
+    codes = _letter_codes(text)
+    return _column_iocs(codes, np.arange(len(codes)), modulus)
 
 
 def delta_bar(text: str, modulus: int) -> float:
@@ -33,9 +75,132 @@ def delta_bar(text: str, modulus: int) -> float:
     :param modulus: The modulus to use for the delta bar calculation.
     :return: The delta bar index of coincidence.
     """
-    text = uppercase_only(text)
-    iocs_sum = 0.0
-    for i in range(modulus):
-        s = "".join(text[j + i] for j in range(0, len(text) - i, modulus))
-        iocs_sum += index_of_coincidence(s)
-    return 26 * iocs_sum / modulus
+    return float(delta_bars(text, [modulus])[0])
+
+
+def _delta_bars(codes: np.ndarray, moduli: np.ndarray) -> np.ndarray:
+    # The columns of all moduli are numbered consecutively, starting with the
+    # columns of the first modulus, so that one bincount counts them all.
+    first_columns = np.cumsum(moduli, dtype=np.int32) - moduli
+    bins = np.arange(len(codes), dtype=np.int32) % moduli[:, None]
+    bins += first_columns[:, None]
+    bins *= 26
+    bins += codes
+    counts = np.bincount(bins.ravel(), minlength=int(moduli.sum()) * 26)
+    iocs = _iocs(counts.reshape(-1, 26))
+    return 26 * np.add.reduceat(iocs, first_columns) / moduli
+
+
+def delta_bars(text: str, moduli: Iterable[int]) -> np.ndarray:
+    """Calculate the delta bar of a text for each of many moduli.
+
+    This is equivalent to calling delta_bar for each modulus, but the text is only
+    normalized and encoded once, and the columns of many moduli are counted with a
+    single bincount.
+
+    :param text: The text for which to calculate the delta bars.
+    :param moduli: The moduli to use, such as range(1, 201).
+    :return: An array of the delta bars, one for each modulus.
+    """
+    moduli_array = np.fromiter(moduli, dtype=np.int32)
+    codes = _letter_codes(text).astype(np.int32)
+    # Count a batch of moduli at a time, so that the bin array of each batch stays
+    # small enough to be cache friendly.
+    batch_size = max(_DELTA_BARS_BATCH_BINS // max(len(codes), 1), 1)
+    batches = [
+        _delta_bars(codes, moduli_array[i : i + batch_size])
+        for i in range(0, len(moduli_array), batch_size)
+    ]
+    return np.concatenate(batches) if batches else np.zeros(0)
+
+
+def autocorrelation(text: str) -> np.ndarray:
+    """Count the coincidences of a text with itself at every shift.
+
+    Non-letters are ignored. Each letter's one-hot indicator sequence is correlated
+    with itself using FFTs, so all shifts are computed in O(n log n) time.
+
+    :param text: The text.
+    :return: An integer array of length len(letters), in which entry s is the number
+        of positions i at which letter i equals letter i + s.
+    """
+    codes = _letter_codes(text)
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    size = 2 * n
+    power = np.zeros(size // 2 + 1)
+    for letter in np.unique(codes):
+        spectrum = np.fft.rfft(codes == letter, size)
+        power += spectrum.real**2 + spectrum.imag**2
+    return np.rint(np.fft.irfft(power, size)[:n]).astype(np.int64)
+
+
+def autocorrelation_periods(
+    text: str, periods: Iterable[int]
+) -> List[Tuple[int, float]]:
+    """Rank candidate periods by the coincidence rate at their multiples.
+
+    Letters encrypted with the same key letter of a periodic cipher coincide as
+    often as in plain language, while other letters coincide about as often as in
+    random text. So the coincidence rate is higher at shifts that are multiples of
+    the period than at other shifts. Comparing against the other shifts, rather than
+    all shifts, ranks the period above its multiples, whose other shifts include
+    multiples of the period, and above its divisors, whose multiples include shifts
+    that are not.
+
+    :param text: The ciphertext.
+    :param periods: The candidate periods.
+    :return: A list of tuples of the form (period, score), sorted by score in
+        descending order. The score is the coincidence rate at the multiples of the
+        period, divided by the coincidence rate at all other nonzero shifts. Periods
+        for which either rate is undefined or zero score 0.
+    """
+    counts = autocorrelation(text)
+    overlaps = np.arange(len(counts), 0, -1)
+    total_count = counts[1:].sum()
+    total_overlap = overlaps[1:].sum()
+    results = []
+    for period in periods:
+        count = counts[period::period].sum()
+        overlap = overlaps[period::period].sum()
+        score = 0.0
+        if count and overlap < total_overlap and total_count > count:
+            rate = count / overlap
+            other_rate = (total_count - count) / (total_overlap - overlap)
+            score = float(rate / other_rate)
+        results.append((period, score))
+    results.sort(key=lambda t: t[1], reverse=True)
+    return results
+
+
+def kasiski_periods(text: str, periods: Iterable[int]) -> List[Tuple[int, float]]:
+    """Rank candidate periods by the spacings of repeated trigrams.
+
+    A trigram that is encrypted twice with the same key letters repeats at a
+    distance that is a multiple of the period. Trigrams are encoded as integers and
+    sorted by (trigram, position), so the spacing between each pair of consecutive
+    occurrences of every trigram is found with one sort. Non-letters are ignored.
+
+    :param text: The ciphertext.
+    :param periods: The candidate periods.
+    :return: A list of tuples of the form (period, score), sorted by score in
+        descending order. The score is the fraction of spacings divisible by the
+        period, minus the fraction 1 / period expected by chance. This is highest
+        for the period itself, rather than its divisors or multiples. All periods
+        score 0 if no trigram repeats.
+    """
+    codes = _letter_codes(text)
+    trigrams = (codes[:-2] * 26 + codes[1:-1]) * 26 + codes[2:]
+    order = np.argsort(trigrams, kind="stable")
+    sorted_trigrams = trigrams[order]
+    repeats = sorted_trigrams[1:] == sorted_trigrams[:-1]
+    spacings = (order[1:] - order[:-1])[repeats]
+    results = []
+    for period in periods:
+        score = 0.0
+        if len(spacings):
+            score = float(np.mean(spacings % period == 0) - 1 / period)
+        results.append((period, score))
+    results.sort(key=lambda t: t[1], reverse=True)
+    return results
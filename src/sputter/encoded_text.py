@@ -0,0 +1,238 @@
+"""A module providing a compact, integer-encoded representation of text.
+
+Cracking loops decrypt, mutate and score the same text many times. Doing so with
+Python strings allocates a new string for every intermediate step. An EncodedText
+stores the text as an array of letter indices instead, so that these operations
+become a few NumPy array operations, and strings are only needed at the edges.
+
+The Vigenere functions in sputter.cipher, sputter.vigenere and sputter.coincidence
+work on EncodedText, as does the crack-caesar command. The Caesar and substitution
+functions in sputter.cipher do not: they apply a cached str.translate table, which
+is faster for a single string. Code that only needs the letter indices of a string,
+such as QuadgramStatistics and the reorder and substitution scorers, uses
+encode_letters or encode_key instead of its own conversion.
+"""
+
+import random
+from typing import Optional
+
+import numpy as np
+
+_ORD_A = ord("A")
+
+
+class EncodedText:
+    """Uppercase text encoded as an array of letter indices and a mask of letters.
+
+    Letters A through Z are stored as the indices 0 through 25. Any other character
+    is stored separately and passed through unchanged by every operation, in the
+    same way that the functions in sputter.cipher pass through non-letters.
+
+    Instances are immutable. Every operation returns a new EncodedText.
+    """
+
+    __slots__ = ("codes", "letters", "_others")
+
+    codes: np.ndarray
+    """A uint8 array holding the index of each letter (A is 0), and 0 for each
+    non-letter."""
+
+    letters: np.ndarray
+    """A bool array that is True at the position of each letter."""
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        letters: Optional[np.ndarray] = None,
+        others: Optional[np.ndarray] = None,
+    ):
+        """Wrap arrays of letter indices.
+
+        Most callers should use from_str instead.
+
+        :param codes: An integer array of letter indices (A is 0).
+        :param letters: A bool array that is True at the position of each letter. If
+            None, every position holds a letter.
+        :param others: A uint32 array of the code points of the non-letters, in order.
+            If None, the non-letters decode as spaces.
+        """
+        codes = np.asarray(codes, dtype=np.uint8)
+        if letters is None:
+            letters = np.ones(len(codes), dtype=bool)
+        if others is None:
+            others = np.full(np.count_nonzero(~letters), ord(" "), dtype=np.uint32)
+        for a in (codes, letters, others):
+            a.flags.writeable = False
+        self.codes = codes
+        self.letters = letters
+        self._others = others
+
+    @classmethod
+    def from_str(cls, s: str) -> "EncodedText":
+        """Encode a string.
+
+        :param s: The string to encode. It is converted to uppercase.
+
+        :return: The encoded text.
+        """
+        code_points = np.frombuffer(s.upper().encode("utf-32-le"), dtype=np.uint32)
+        offsets = code_points - np.uint32(_ORD_A)
+        letters = offsets < 26
+        codes = np.where(letters, offsets, 0).astype(np.uint8)
+        return cls(codes, letters, code_points[~letters].copy())
+
+    def __str__(self) -> str:
+        """Decode the text back to a string."""
+        code_points = np.empty(len(self.codes), dtype=np.uint32)
+        code_points[self.letters] = self.codes[self.letters] + np.uint32(_ORD_A)
+        code_points[~self.letters] = self._others
+        return code_points.tobytes().decode("utf-32-le")
+
+    def __repr__(self) -> str:
+        return f"EncodedText.from_str({str(self)!r})"
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EncodedText):
+            return NotImplemented
+        return (
+            np.array_equal(self.codes, other.codes)
+            and np.array_equal(self.letters, other.letters)
+            and np.array_equal(self._others, other._others)
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.codes.tobytes(), self.letters.tobytes()))
+
+    def with_letter_codes(self, letter_codes: np.ndarray) -> "EncodedText":
+        """Return a copy of the text with its letters replaced.
+
+        :param letter_codes: The new letter indices (A is 0), one for each letter.
+
+        :return: The text with the same non-letters, and the given letters.
+        """
+        codes = self.codes.copy()
+        codes[self.letters] = letter_codes
+        return EncodedText(codes, self.letters, self._others)
+
+    def letter_codes(self) -> np.ndarray:
+        """Return the indices of the letters only, dropping all other characters.
+
+        This is the encoded equivalent of sputter.mung.uppercase_only.
+        """
+        return self.codes[self.letters]
+
+    def quadgram_codes(self) -> np.ndarray:
+        """Return the codes in the form accepted by QuadgramStatistics.
+
+        :return: An integer array of letter indices, with 26 for each non-letter.
+        """
+        return np.where(self.letters, self.codes, 26).astype(np.intp)
+
+    def uppercase_only(self) -> "EncodedText":
+        """Return the text with all non-letters removed."""
+        return EncodedText(self.letter_codes())
+
+    def caesar_shift(self, shift: int) -> "EncodedText":
+        """Shift the letters by a given number of positions in the alphabet.
+
+        :param shift: The number of positions to shift.
+
+        :return: The shifted text.
+        """
+        return self.with_letter_codes((self.letter_codes() + shift % 26) % 26)
+
+    def _vigenere_shifts(self, key: str) -> np.ndarray:
+        key_codes = encode_key(key).astype(np.intp)
+        return np.resize(key_codes, np.count_nonzero(self.letters))
+
+    def vigenere_encrypt(self, key: str) -> "EncodedText":
+        """Encrypt the text using the Vigenere cipher.
+
+        :param key: The key. Must only contain alphabetic characters.
+
+        :return: The encrypted text.
+        """
+        shifts = self._vigenere_shifts(key)
+        return self.with_letter_codes((self.letter_codes() + shifts) % 26)
+
+    def vigenere_decrypt(self, key: str) -> "EncodedText":
+        """Decrypt the text using the Vigenere cipher.
+
+        :param key: The key. Must only contain alphabetic characters.
+
+        :return: The decrypted text.
+        """
+        shifts = self._vigenere_shifts(key)
+        return self.with_letter_codes((self.letter_codes() + 26 - shifts) % 26)
+
+    def substitution_encrypt(self, key: str) -> "EncodedText":
+        """Encrypt the text using a substitution cipher.
+
+        :param key: The key. Must be a permutation of the alphabet.
+
+        :return: The encrypted text.
+        """
+        return self.with_letter_codes(encode_key(key)[self.letter_codes()])
+
+    def substitution_decrypt(self, key: str) -> "EncodedText":
+        """Decrypt the text using a substitution cipher.
+
+        :param key: The key. Must be a permutation of the alphabet.
+
+        :return: The decrypted text.
+        """
+        inverse_key = np.empty(26, dtype=np.uint8)
+        inverse_key[encode_key(key)] = np.arange(26)
+        return self.with_letter_codes(inverse_key[self.letter_codes()])
+
+    def swap(self, i: int, j: int) -> "EncodedText":
+        """Swap the characters at two positions.
+
+        :param i: The first position.
+        :param j: The second position.
+
+        :return: The text with the two characters swapped.
+        """
+        order = np.arange(len(self.codes))
+        order[[i, j]] = order[[j, i]]
+        others = np.zeros(len(self.codes), dtype=np.uint32)
+        others[~self.letters] = self._others
+        letters = self.letters[order]
+        return EncodedText(self.codes[order], letters, others[order][~letters])
+
+    def randomly_swap_letters(self) -> "EncodedText":
+        """Randomly swap two characters.
+
+        This is the encoded equivalent of sputter.mung.randomly_swap_letters. The
+        text must have length of at least two.
+
+        :return: The text with two characters swapped.
+        """
+        i, j = random.sample(range(len(self.codes)), 2)
+        return self.swap(i, j)
+
+
+def encode_letters(s: str) -> np.ndarray:
+    """Encode a string as an array of letter indices, without converting case.
+
+    :param s: The string to encode.
+
+    :return: An intp array holding the index of each uppercase letter (A is 0), and
+        26 for every other character. This is the form accepted by
+        QuadgramStatistics.score_letter_codes.
+    """
+    code_points = np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32)
+    return np.minimum(code_points - np.uint32(_ORD_A), 26).astype(np.intp)
+
+
+def encode_key(key: str) -> np.ndarray:
+    """Encode a key of uppercase letters as a uint8 array of letter indices.
+
+    :param key: The key. Must only contain alphabetic characters.
+
+    :return: The letter indices of the key (A is 0).
+    """
+    return encode_letters(key.upper()).astype(np.uint8)
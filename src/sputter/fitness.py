@@ -2,37 +2,173 @@
 
 import gzip
 import importlib.resources
+import itertools
+import logging
 import math
+import os.path
 import re
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence
+import zlib
 
-from sputter.alphabet_trie import AlphabetTrieNode
+import numpy as np
+
+from sputter.alphabet_trie import CompactAlphabetTrie, CompactAlphabetTrieNode
+from sputter.encoded_text import encode_letters, EncodedText
+from sputter.model_file import (
+    compiled_model_path,
+    ModelFile,
+    read_model_file,
+    write_model_file,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+_ORD_A = ord("A")
+_QUADGRAM_PLACE_VALUES = np.array([26**3, 26**2, 26, 1])
+
+
+def _read_source(filepath: Optional[str], default_data_file: str) -> bytes:
+    """Return the raw bytes of a model source file."""
+    if filepath:
+        with open(filepath, "rb") as f:
+            return f.read()
+    return (
+        importlib.resources.files("sputter.data")
+        .joinpath(default_data_file)
+        .read_bytes()
+    )
+
+
+def _source_lines(source: bytes, filepath: Optional[str]) -> List[str]:
+    """Return the lines of a model source file."""
+    if filepath:
+        return source.decode("utf-8").splitlines()
+    return gzip.decompress(source).decode("utf-8").split("\n")
+
+
+def _load_compiled_model(path: str, kind: str) -> Optional[ModelFile]:
+    """Return the compiled model at path, or None if it is missing or unusable."""
+    try:
+        model = read_model_file(path)
+        if model.metadata.get("kind") != kind:
+            raise ValueError(f"{path} does not contain a {kind} model.")
+        return model
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to read compiled {kind} model: {e}")
+        return None
+
+
+def _check_unchanged(
+    filepath: Optional[str], compiled_path: str, loaded_compiled_path: str
+) -> None:
+    if loaded_compiled_path != compiled_path:
+        raise ValueError(
+            f"The source file {filepath} has changed since the statistics loaded "
+            "from it were pickled."
+        )
+
+
+def _shared_quadgram_statistics(
+    filepath: Optional[str], compiled_path: str
+) -> "QuadgramStatistics":
+    from sputter.registry import quadgram_statistics
+
+    qs = quadgram_statistics(filepath)
+    _check_unchanged(filepath, compiled_path, qs._compiled_path)
+    return qs
+
+
+def _shared_word_statistics(
+    filepath: Optional[str], compiled_path: str
+) -> "WordStatistics":
+    from sputter.registry import word_statistics
+
+    ws = word_statistics(filepath)
+    _check_unchanged(filepath, compiled_path, ws._compiled_path)
+    return ws
+
+
+def _is_shared(model: object) -> bool:
+    from sputter.registry import is_shared
+
+    return is_shared(model)
 
 
 class QuadgramStatistics:
     """Determine text language likelihood based on quadgram frequency."""
 
     def __init__(self, filepath: Optional[str] = None):
-        if filepath:
-            with open(filepath, encoding="utf-8") as f:
-                lines = f.readlines()
-        else:
-            data_file = importlib.resources.files("sputter.data").joinpath(
-                "english_quadgrams.txt.gz"
-            )
-            lines = gzip.decompress(data_file.read_bytes()).decode("utf-8").split("\n")
+        """Load quadgram statistics.
+
+        The first time a given source file is loaded, a compiled binary model is
+        written to the user cache directory. Later constructions memory-map the
+        compiled model instead of parsing the source file.
+
+        :param filepath: The path to a file of quadgrams and their frequencies, one per
+            line. If None, the built-in English quadgram statistics are used.
+        """
+        self._filepath = os.path.abspath(filepath) if filepath else None
+        source = _read_source(filepath, "english_quadgrams.txt.gz")
+        self._compiled_path = compiled_model_path("quadgrams", source)
+        model = _load_compiled_model(self._compiled_path, "quadgrams")
+        if model is not None:
+            self._floor = float(model.metadata["floor"])
+            self._quadgram_log_prob = model.arrays["log_prob"]
+            return
+
         quadgram_freq = {}
         total = 0
-        for line in lines:
+        for line in _source_lines(source, filepath):
             if line:
                 quadgram, freq = line.split()
                 int_freq = int(freq)
                 quadgram_freq[quadgram] = int_freq
                 total += int_freq
         self._floor = math.log(0.01 / total)
-        self._quadgram_log_prob = {
-            quadgram: math.log(freq / total) for quadgram, freq in quadgram_freq.items()
-        }
+        quadgrams = [q for q in quadgram_freq if len(q) == 4]
+        freqs = np.array([quadgram_freq[q] for q in quadgrams], dtype=np.float64)
+        codes = encode_letters("".join(quadgrams)).reshape(-1, 4)
+        valid = (codes < 26).all(axis=1)
+        self._quadgram_log_prob = np.full(26**4, self._floor)
+        self._quadgram_log_prob[codes[valid] @ _QUADGRAM_PLACE_VALUES] = np.log(
+            freqs[valid] / total
+        )
+
+        try:
+            self.compile()
+        except Exception as e:
+            logger.warning(f"Failed to write compiled quadgram model: {e}")
+
+    def __reduce_ex__(self, protocol):
+        # Pickle the registry's shared statistics by source file rather than by value.
+        # Unpickling uses the shared statistics from the registry, so worker processes
+        # load (or inherit) a single memory-mapped copy instead of receiving the whole
+        # table. The compiled path identifies the source contents, so a source file
+        # edited in the meantime is detected rather than silently reloaded. Other
+        # instances are pickled by value.
+        if _is_shared(self):
+            return (_shared_quadgram_statistics, (self._filepath, self._compiled_path))
+        return super().__reduce_ex__(protocol)
+
+    def compile(self, path: Optional[str] = None) -> str:
+        """Write these statistics to a compiled binary model file.
+
+        :param path: The path to write to. If None, the default cache path for the
+            source file these statistics were loaded from is used.
+
+        :return: The path of the written file.
+        """
+        path = path or self._compiled_path
+        write_model_file(
+            path,
+            {"log_prob": self._quadgram_log_prob},
+            {"kind": "quadgrams", "floor": self._floor},
+        )
+        return path
 
     def quadgram_log_prob(self, quadgram: str) -> float:
         """Return the log probability of the quadgram.
@@ -46,7 +182,15 @@ class QuadgramStatistics:
             of negative infinity to zero, where negative infinity is the least likely
             probability and zero is the most likely probability.
         """
-        return self._quadgram_log_prob.get(quadgram, self._floor)
+        if len(quadgram) != 4:
+            return self._floor
+        index = 0
+        for c in quadgram:
+            code = ord(c) - _ORD_A
+            if not 0 <= code < 26:
+                return self._floor
+            index = index * 26 + code
+        return self._quadgram_log_prob.item(index)
 
     def string_score(self, s: str) -> float:
         """Return the log probability score of the string s.
@@ -60,29 +204,146 @@ class QuadgramStatistics:
             range of negative infinity to zero, where negative infinity is the least
             likely probability and zero is the most likely probability.
         """
-        score = 0.0
-        for i in range(len(s) - 3):
-            score += self.quadgram_log_prob(s[i : i + 4])
-        return score
+        if len(s) < 4:
+            return 0.0
+        return float(self.score_letter_codes(encode_letters(s)))
+
+    def encoded_text_score(self, text: EncodedText) -> float:
+        """Return the log probability score of an EncodedText.
+
+        This is equivalent to calling string_score on str(text), without decoding it.
+
+        :param text: The text to score.
+
+        :return: The log probability score of the text.
+        """
+        if len(text) < 4:
+            return 0.0
+        return float(self.score_letter_codes(text.quadgram_codes()))
+
+    def score_many(self, texts: Sequence[str]) -> np.ndarray:
+        """Return the log probability scores of many strings of equal length.
+
+        This is equivalent to calling string_score on each string, but all of the
+        strings are scored together in a single vectorized pass.
+
+        :param texts: The strings to score. All strings must have the same length, and
+            should only contain uppercase letters.
+
+        :return: An array of log probability scores, one for each string in texts.
+
+        :raises ValueError: If the strings do not all have the same length.
+        """
+        if not texts:
+            return np.zeros(0)
+        n = len(texts[0])
+        if any(len(t) != n for t in texts):
+            raise ValueError("All strings passed to score_many must have equal length.")
+        if n < 4:
+            return np.zeros(len(texts))
+        codes = encode_letters("".join(texts)).reshape(len(texts), n)
+        return self.score_letter_codes(codes)
+
+    def score_letter_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Return the log probability scores of integer-encoded text.
+
+        :param codes: An integer array of letter indices, where A is 0 and Z is 25, and
+            26 represents any non-letter character. The last axis holds the text, and
+            must have length at least 4. Any leading axes index separate texts.
+
+        :return: An array of scores with the shape of codes minus its last axis.
+        """
+        letters = codes < 26
+        all_letters = bool(letters.all())
+        if not all_letters:
+            codes = np.where(letters, codes, 0)
+        indices = (
+            (codes[..., :-3] * 26 + codes[..., 1:-2]) * 26 + codes[..., 2:-1]
+        ) * 26 + codes[..., 3:]
+        log_probs = self._quadgram_log_prob[indices]
+        if not all_letters:
+            non_letter_counts = np.cumsum(~letters, axis=-1)
+            non_letter_counts = np.concatenate(
+                [np.zeros_like(non_letter_counts[..., :1]), non_letter_counts], axis=-1
+            )
+            windowed = non_letter_counts[..., 4:] - non_letter_counts[..., :-4]
+            log_probs = np.where(windowed > 0, self._floor, log_probs)
+        return log_probs.sum(axis=-1)
+
+    def quadgram_log_probs(self) -> np.ndarray:
+        """Return the log probability of every quadgram.
+
+        :return: A read-only array of 26**4 log probabilities, in which the quadgram
+            with letter indices (a, b, c, d) (A is 0) is at index
+            ((a * 26 + b) * 26 + c) * 26 + d. Quadgrams that are not in the
+            dictionary have the floor value.
+        """
+        return self._quadgram_log_prob
+
+    def letter_log_probs(self) -> np.ndarray:
+        """Return the log probability of each single letter.
+
+        These are derived from the quadgram statistics, as the frequency with which
+        each letter starts a quadgram.
+
+        :return: An array of 26 log probabilities, where index 0 is A.
+        """
+        probs = np.exp(self._quadgram_log_prob).reshape(26, -1).sum(axis=1)
+        return np.log(probs / probs.sum())
+
+
+def _word_slots(words: Sequence[bytes]) -> np.ndarray:
+    """Build an open addressing hash table of word indices.
+
+    The table has a power of two size at least twice the number of words. Word i is
+    stored at the first free slot at or after crc32(words[i]), wrapping around, as
+    (crc32(words[i]) >> 1) << 32 | i, so that most other words can be skipped
+    without comparing them. Free slots hold -1.
+    """
+    mask = (1 << (2 * len(words)).bit_length()) - 1
+    slots = [-1] * (mask + 1)
+    for i, word in enumerate(words):
+        word_hash = zlib.crc32(word)
+        slot = word_hash & mask
+        while slots[slot] >= 0:
+            slot = (slot + 1) & mask
+        slots[slot] = (word_hash >> 1) << 32 | i
+    return np.array(slots, dtype=np.int64)
 
 
 class WordStatistics:
     """Determine text language likelihood based on word frequency."""
 
     def __init__(self, filepath: Optional[str] = None):
-        if filepath:
-            with open(filepath, encoding="utf-8") as f:
-                lines = f.readlines()
-        else:
-            data_file = importlib.resources.files("sputter.data").joinpath(
-                "english_words_50k.txt.gz"
-            )
-            lines = gzip.decompress(data_file.read_bytes()).decode("utf-8").split("\n")
+        """Load word statistics.
+
+        The first time a given source file is loaded, a compiled binary model is
+        written to the user cache directory. Later constructions memory-map the
+        compiled model instead of parsing the source file. Words are looked up in a
+        hash table stored in the model, so the mapped pages are shared between
+        processes, and no per-word Python objects are built unless
+        word_frequencies or compact_trie is called.
+
+        :param filepath: The path to a file of words and their frequencies, one per
+            line. If None, the built-in English word statistics are used.
+        """
+        self._filepath = os.path.abspath(filepath) if filepath else None
+        source = _read_source(filepath, "english_words_50k.txt.gz")
+        self._compiled_path = compiled_model_path("words", source)
+        model = _load_compiled_model(self._compiled_path, "words")
+        if model is not None:
+            self._arrays = model.arrays
+            self._word_freq_total = int(model.metadata["frequency_total"])
+            self._floor = float(model.metadata["floor"])
+            self._average_word_length = float(model.metadata["average_word_length"])
+            self._init_views()
+            return
+
         non_letter_re = re.compile(r"[^A-Z]")
-        self._word_freq: Dict[str, int] = {}
+        word_freq: Dict[str, int] = {}
         self._word_freq_total = 0
         word_lengths_total = 0
-        for line in lines:
+        for line in _source_lines(source, filepath):
             if line:
                 word, freq = line.split()
                 if not word:
@@ -91,19 +352,113 @@ class WordStatistics:
                 if re.search(non_letter_re, word):
                     continue
                 int_freq = int(freq)
-                self._word_freq[word] = int_freq
+                word_freq[word] = int_freq
                 self._word_freq_total += int_freq
                 word_lengths_total += int_freq * len(word)
         self._floor = math.log(0.01 / self._word_freq_total)
-        self._word_log_prob = {
-            word: math.log(freq / self._word_freq_total)
-            for word, freq in self._word_freq.items()
-        }
         self._average_word_length = word_lengths_total / self._word_freq_total
-        self._trie: Optional[AlphabetTrieNode] = None
+        encoded_words = [word.encode("ascii") for word in word_freq]
+        frequencies = np.array(list(word_freq.values()), dtype=np.int64)
+        self._arrays = {
+            "words": np.frombuffer(b"".join(encoded_words), dtype=np.uint8),
+            "word_offsets": np.cumsum(
+                [0] + [len(word) for word in encoded_words], dtype=np.int64
+            ),
+            "word_slots": _word_slots(encoded_words),
+            "frequencies": frequencies,
+            "log_probs": np.log(frequencies / self._word_freq_total),
+        }
+        self._init_views()
+
+        try:
+            self.compile()
+        except Exception as e:
+            logger.warning(f"Failed to write compiled word model: {e}")
+
+    def _init_views(self) -> None:
+        # memoryviews index faster than NumPy arrays from Python, and return Python
+        # ints and floats.
+        self._trie: Optional[CompactAlphabetTrie] = None
+        self._word_freq: Optional[Dict[str, int]] = None
+        self._words_view = memoryview(self._arrays["words"])
+        self._offsets_view = memoryview(self._arrays["word_offsets"])
+        self._slots_view = memoryview(self._arrays["word_slots"])
+        self._slot_mask = len(self._arrays["word_slots"]) - 1
+        self._log_probs_view = memoryview(self._arrays["log_probs"])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        for name in list(state):
+            if name.endswith("_view") or name in ("_trie", "_word_freq"):
+                del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_views()
+
+    def __reduce_ex__(self, protocol):
+        # Pickle the registry's shared statistics by reference, as for
+        # QuadgramStatistics.
+        if _is_shared(self):
+            return (_shared_word_statistics, (self._filepath, self._compiled_path))
+        return super().__reduce_ex__(protocol)
+
+    def compile(self, path: Optional[str] = None) -> str:
+        """Write these statistics to a compiled binary model file.
+
+        :param path: The path to write to. If None, the default cache path for the
+            source file these statistics were loaded from is used.
+
+        :return: The path of the written file.
+        """
+        path = path or self._compiled_path
+        write_model_file(
+            path,
+            self._arrays,
+            {
+                "kind": "words",
+                "frequency_total": self._word_freq_total,
+                "floor": self._floor,
+                "average_word_length": self._average_word_length,
+            },
+        )
+        return path
+
+    def _words(self) -> List[str]:
+        """Decode the list of all words, in source file order."""
+        words = bytes(self._words_view).decode("ascii")
+        offsets = self._arrays["word_offsets"].tolist()
+        return [words[start:end] for start, end in itertools.pairwise(offsets)]
+
+    def _word_index(self, word: str) -> int:
+        """Return the index of a word in the model arrays, or -1 if it is absent."""
+        if not word.isascii():
+            return -1
+        key = word.encode("ascii")
+        slots = self._slots_view
+        word_hash = zlib.crc32(key)
+        slot = word_hash & self._slot_mask
+        while True:
+            entry = slots[slot]
+            if entry < 0:
+                return -1
+            if entry >> 32 == word_hash >> 1:
+                index = entry & 0xFFFFFFFF
+                offsets = self._offsets_view
+                if self._words_view[offsets[index] : offsets[index + 1]] == key:
+                    return index
+            slot = (slot + 1) & self._slot_mask
 
     def word_frequencies(self) -> Dict[str, int]:
-        """Return a dictionary from word to number of occurrences of that word."""
+        """Return a dictionary from word to number of occurrences of that word.
+
+        The dictionary is built from the model arrays on the first call.
+        """
+        if self._word_freq is None:
+            self._word_freq = dict(
+                zip(self._words(), self._arrays["frequencies"].tolist(), strict=True)
+            )
         return self._word_freq
 
     def word_frequency_total(self) -> int:
@@ -125,11 +480,24 @@ class WordStatistics:
             of negative infinity to zero, where negative infinity is the least likely
             probability and zero is the most likely probability.
         """
+        index = self._word_index(word)
+        if index >= 0:
+            return self._log_probs_view[index]
         if scale_floor_to_word_length:
-            floor = self._floor * len(word) / self._average_word_length
-        else:
-            floor = self._floor
-        return self._word_log_prob.get(word, floor)
+            return self.floor_log_prob(len(word))
+        return self._floor
+
+    def floor_log_prob(self, word_length: Optional[int] = None) -> float:
+        """Return the log probability assigned to words that are not in the dictionary.
+
+        :param word_length: If provided, scale the floor value based on this word
+            length, as word_log_prob does when scale_floor_to_word_length is True.
+
+        :return: The floor log probability.
+        """
+        if word_length is None:
+            return self._floor
+        return self._floor * word_length / self._average_word_length
 
     def spaced_string_score(self, s: str) -> float:
         """Return the log probability score of the string s.
@@ -151,10 +519,14 @@ class WordStatistics:
             score += self.word_log_prob(word)
         return score
 
-    def trie(self) -> AlphabetTrieNode:
-        """Return a trie of all words containing their log probabilities."""
-        if not self._trie:
-            self._trie = AlphabetTrieNode()
-            for word, log_prob in self._word_log_prob.items():
-                self._trie.insert(word, log_prob)
+    def compact_trie(self) -> CompactAlphabetTrie:
+        """Return a compact trie of all words containing their log probabilities."""
+        if self._trie is None:
+            self._trie = CompactAlphabetTrie(
+                self._words(), self._arrays["log_probs"].tolist()
+            )
         return self._trie
+
+    def trie(self) -> CompactAlphabetTrieNode:
+        """Return the root of a trie of all words containing their log probabilities."""
+        return self.compact_trie().root()
@@ -0,0 +1,143 @@
+"""A module for reading and writing precompiled, memory-mappable model files.
+
+A model file stores a set of named NumPy arrays along with a small amount of JSON
+metadata. Arrays are stored uncompressed and aligned, so that they can be
+memory-mapped directly from disk and shared between processes.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import json
+import mmap
+import os
+import os.path
+import platformdirs
+import struct
+import tempfile
+from typing import Any, Dict
+
+import numpy as np
+
+
+FORMAT_VERSION = 2
+"""The version of the model file format. Bumped whenever the layout changes."""
+
+_MAGIC = b"SPUTTER\x00"
+_HEADER_PREFIX = struct.Struct("<8sII")
+_ALIGNMENT = 64
+
+
+@dataclass
+class ModelFile:
+    """The contents of a model file."""
+
+    arrays: Dict[str, np.ndarray]
+    """The arrays stored in the file. These are read-only views of the file's pages."""
+
+    metadata: Dict[str, Any]
+    """The JSON metadata stored in the file."""
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def compiled_model_path(name: str, source: bytes) -> str:
+    """Return the default path of a compiled model file.
+
+    The path is located in the user cache directory, and is keyed by a hash of the
+    source data and the model file format version, so that a change to either results
+    in a different path.
+
+    :param name: The name of the model, such as "quadgrams" or "words".
+    :param source: The source data from which the model is compiled.
+
+    :return: The path at which the compiled model should be stored.
+    """
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    return os.path.join(
+        platformdirs.user_cache_dir(appname="sputter"),
+        "models",
+        f"{name}-{digest}-v{FORMAT_VERSION}.bin",
+    )
+
+
+def write_model_file(
+    path: str, arrays: Dict[str, np.ndarray], metadata: Dict[str, Any]
+) -> None:
+    """Write a model file.
+
+    The file is written to a temporary file and then atomically renamed, so readers
+    never observe a partially written model.
+
+    :param path: The path of the file to write.
+    :param arrays: The named arrays to store.
+    :param metadata: JSON-serializable metadata to store.
+    """
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    array_headers: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    for name, a in arrays.items():
+        array_headers[name] = {
+            "dtype": a.dtype.str,
+            "shape": list(a.shape),
+            "offset": offset,
+        }
+        offset = _align(offset + a.nbytes)
+    header = json.dumps({"arrays": array_headers, "metadata": metadata}).encode("utf-8")
+    data_start = _align(_HEADER_PREFIX.size + len(header))
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        try:
+            f.write(_HEADER_PREFIX.pack(_MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, a in arrays.items():
+                f.seek(data_start + array_headers[name]["offset"])
+                f.write(a.tobytes())
+            f.truncate(data_start + offset)
+            f.close()
+            os.replace(f.name, path)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+
+
+def read_model_file(path: str) -> ModelFile:
+    """Read a model file, memory-mapping its arrays.
+
+    :param path: The path of the file to read.
+
+    :return: The contents of the model file.
+
+    :raises ValueError: If the file is not a model file, or was written with a
+        different format version.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < _HEADER_PREFIX.size:
+        raise ValueError(f"{path} is not a sputter model file.")
+    magic, version, header_length = _HEADER_PREFIX.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a sputter model file.")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"{path} has model file format version {version}, "
+            f"expected {FORMAT_VERSION}."
+        )
+    header_end = _HEADER_PREFIX.size + header_length
+    header = json.loads(buffer[_HEADER_PREFIX.size : header_end].decode("utf-8"))
+    data_start = _align(header_end)
+    arrays = {}
+    for name, array_header in header["arrays"].items():
+        dtype = np.dtype(array_header["dtype"])
+        shape = tuple(array_header["shape"])
+        arrays[name] = np.frombuffer(
+            buffer,
+            dtype=dtype,
+            count=int(np.prod(shape)),
+            offset=data_start + array_header["offset"],
+        ).reshape(shape)
+    return ModelFile(arrays, header["metadata"])
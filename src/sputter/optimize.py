@@ -1,15 +1,226 @@
 """A module to search for optimal inputs with respect to objectives."""
 
-import bisect
+import collections
+import concurrent.futures
+import dataclasses
 from dataclasses import dataclass
+import functools
+import heapq
+import itertools
+import json
 import math
+import multiprocessing
+import multiprocessing.queues
+import os
+import pickle
 import random
-from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+import tempfile
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+from numpy.typing import ArrayLike
 
 
 T = TypeVar("T")
 
 
+class TopN(Generic[T]):
+    """A bounded collection of the lowest scoring distinct states seen so far.
+
+    States are kept in a heap keyed on score, so adding a state costs O(log n) and a
+    state that does not improve on the current worst result is rejected in O(1).
+    Hashable states are deduplicated: adding a state that is already present only
+    updates its score if the new score is lower. Unhashable states are never
+    considered duplicates.
+
+    Among states with equal scores, those added earlier are ranked first, and are
+    retained in preference to those added later.
+    """
+
+    def __init__(self, n: Optional[int] = 10):
+        """Initialize an empty collection.
+
+        :param n: The maximum number of states to keep. If None, all distinct states
+            are kept.
+        """
+        self.n = n
+        self._counter = 0
+        # Live entries, by insertion counter.
+        self._entries: Dict[int, Tuple[T, float]] = {}
+        # The insertion counter of the live entry for each hashable state.
+        self._index: Dict[Any, int] = {}
+        # A max-heap (by score, then insertion order) of (-score, -counter, state).
+        # Entries for replaced states are left in place and skipped when they surface.
+        self._heap: List[Tuple[float, int, T]] = []
+        self._threshold = math.inf
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def threshold(self) -> float:
+        """The score a new state must beat to be kept. Infinite if not yet full."""
+        return self._threshold
+
+    def add(self, state: T, score: float) -> bool:
+        """Offer a state to the collection.
+
+        :param state: The state.
+        :param score: The state's score. Lower scores are better.
+
+        :return: True if the state was kept.
+        """
+        if score >= self._threshold:
+            return False
+        if self.n is not None and self.n <= 0:
+            return False
+        try:
+            existing = self._index.get(state)
+            hashable = True
+        except TypeError:
+            existing = None
+            hashable = False
+        if existing is not None:
+            if score >= self._entries[existing][1]:
+                return False
+            del self._entries[existing]
+        counter = self._counter
+        self._counter += 1
+        self._entries[counter] = (state, score)
+        if hashable:
+            self._index[state] = counter
+        if self.n is not None:
+            heapq.heappush(self._heap, (-score, -counter, state))
+            self._trim()
+        return True
+
+    def update(self, results: Iterable[Tuple[T, float]]) -> None:
+        """Offer many (state, score) tuples to the collection.
+
+        :param results: The (state, score) tuples to add.
+        """
+        for state, score in results:
+            self.add(state, score)
+
+    def _trim(self) -> None:
+        assert self.n is not None
+        heap = self._heap
+        while len(self._entries) > self.n:
+            _, neg_counter, state = heapq.heappop(heap)
+            if self._entries.pop(-neg_counter, None) is not None:
+                self._unindex(state, -neg_counter)
+        if len(heap) > 2 * len(self._entries) + 16:
+            self._heap = heap = [
+                (-score, -counter, state)
+                for counter, (state, score) in self._entries.items()
+            ]
+            heapq.heapify(heap)
+        while heap and -heap[0][1] not in self._entries:
+            heapq.heappop(heap)
+        if len(self._entries) >= self.n and heap:
+            self._threshold = -heap[0][0]
+
+    def _unindex(self, state: T, counter: int) -> None:
+        try:
+            if self._index.get(state) == counter:
+                del self._index[state]
+        except TypeError:
+            pass
+
+    def results(self) -> List[Tuple[T, float]]:
+        """Return the kept states.
+
+        :return: A list of tuples of the form (state, score), sorted by score in
+            ascending order.
+        """
+        return [
+            entry
+            for _, entry in sorted(self._entries.items(), key=lambda t: (t[1][1], t[0]))
+        ]
+
+
+class MemoizedObjective(Generic[T]):
+    """An objective function wrapped with a bounded cache of its scores.
+
+    Searches over small state spaces revisit the same states often. Wrapping the
+    objective of such a search in a MemoizedObjective avoids rescoring them. The
+    cache evicts the least recently used scores once it is full. Unhashable states
+    are always scored by the objective function.
+
+    Instances are picklable, so they may be used with the parallel optimizers. The
+    cached scores are not pickled, so each worker process starts with an empty
+    cache.
+    """
+
+    def __init__(
+        self, objective_function: Callable[[T], float], max_size: Optional[int] = 65536
+    ):
+        """Wrap an objective function.
+
+        :param objective_function: The objective function. It must be deterministic.
+        :param max_size: The maximum number of scores to cache. If None, the cache is
+            unbounded.
+        """
+        self.objective_function = objective_function
+        self.max_size = max_size
+        self.hits = 0
+        """The number of calls answered from the cache."""
+        self.misses = 0
+        """The number of calls that called the objective function."""
+        self._cache: collections.OrderedDict[Any, float] = collections.OrderedDict()
+
+    def __call__(self, state: T) -> float:
+        """Return the score of a state, from the cache if possible."""
+        cache = self._cache
+        try:
+            score = cache[state]
+        except KeyError:
+            pass
+        except TypeError:
+            self.misses += 1
+            return self.objective_function(state)
+        else:
+            cache.move_to_end(state)
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = self.objective_function(state)
+        cache[state] = score
+        if self.max_size is not None and len(cache) > self.max_size:
+            cache.popitem(last=False)
+        return score
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of calls answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def clear(self) -> None:
+        """Empty the cache and reset the hit and miss counters."""
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_cache"] = collections.OrderedDict()
+        return state
+
+
 def brute_force(
     objective_function: Callable[[T], float],
     search_space: Iterable[T],
@@ -25,19 +236,186 @@ def brute_force(
     :return: A list of tuples, where each tuple contains a string from the search space
         and its corresponding score.
     """
-    results: List[Tuple[T, float]] = []
+    top = TopN[T](top_n)
     for s in search_space:
-        score = objective_function(s)
-        if (
-            not results
-            or top_n is None
-            or len(results) < top_n
-            or score < results[-1][1]
-        ):
-            bisect.insort(results, (s, score), key=lambda t: t[1])
-            if top_n is not None:
-                results = results[:top_n]
-    return results
+        top.add(s, objective_function(s))
+    return top.results()
+
+
+def brute_force_batch(
+    batch_objective_function: Callable[[List[T]], ArrayLike],
+    search_space: Iterable[T],
+    top_n: Optional[int] = 10,
+    batch_size: int = 1024,
+) -> List[Tuple[T, float]]:
+    """Search for optimal inputs by testing every input, scoring inputs in batches.
+
+    This returns the same results as brute_force, but the objective is called once
+    per batch of inputs rather than once per input, so that it can score a whole
+    batch with a few vectorized operations.
+
+    :param batch_objective_function: A Callable that takes a list of T as input and
+        returns an array of their scores. Lower scores are better.
+    :param search_space: An iterable of T to test as inputs to the function. It is
+        consumed lazily, one batch at a time.
+    :param top_n: The number of top results to return. If None, return all results.
+    :param batch_size: The maximum number of inputs passed to each call of
+        batch_objective_function.
+
+    :return: A list of tuples, where each tuple contains an input from the search
+        space and its corresponding score, sorted by score in ascending order.
+    """
+    top = TopN[T](top_n)
+    for batch in itertools.batched(search_space, batch_size):
+        states = list(batch)
+        scores = np.asarray(batch_objective_function(states), dtype=float)
+        # Skip the inputs that cannot enter the results without a Python-level loop.
+        for i in np.flatnonzero(scores < top.threshold):
+            top.add(states[i], float(scores[i]))
+    return top.results()
+
+
+def population_search(
+    batch_objective_function: Callable[[List[T]], ArrayLike],
+    initial_population: Iterable[T],
+    neighbor_function: Callable[[T], T],
+    top_n: Optional[int] = 10,
+    generations: int = 100,
+    offspring_per_member: int = 4,
+    progress_callback: Optional[Callable[[int, T, float], None]] = None,
+) -> List[Tuple[T, float]]:
+    """Search for optimal inputs by evolving a population of states.
+
+    In each generation, every member of the population produces offspring using the
+    neighbor function, all of the offspring are scored with a single call to the
+    batch objective, and the best distinct states among the members and their
+    offspring survive to form the next generation.
+
+    :param batch_objective_function: A Callable that takes a list of T as input and
+        returns an array of their scores. Lower scores are better.
+    :param initial_population: The initial states. The population keeps this size.
+    :param neighbor_function: A Callable that takes a T as input and returns a
+        neighboring state. This is typically a small random change to the input.
+    :param top_n: The number of top results to return. If None, all results are
+        returned.
+    :param generations: The number of generations to run.
+    :param offspring_per_member: The number of offspring produced by each member of
+        the population in each generation.
+    :param progress_callback: A callback that is called after each generation. It is
+        passed the generation number, the best state found so far, and the best
+        state score found so far.
+
+    :return: A list of tuples of the form (state, score), sorted by score in
+        ascending order, with each distinct state appearing at most once. The list is
+        truncated to the top_n results if top_n is not None.
+    """
+    population = list(initial_population)
+    population_size = len(population)
+    members = list(
+        zip(
+            population,
+            np.asarray(batch_objective_function(population), dtype=float).tolist(),
+            strict=True,
+        )
+    )
+    results = TopN[T](top_n)
+    results.update(members)
+    best_state, best_score = min(members, key=lambda t: t[1])
+    for generation in range(generations):
+        offspring = [
+            neighbor_function(state)
+            for state, _ in members
+            for _ in range(offspring_per_member)
+        ]
+        offspring_members = list(
+            zip(
+                offspring,
+                np.asarray(batch_objective_function(offspring), dtype=float).tolist(),
+                strict=True,
+            )
+        )
+        results.update(offspring_members)
+        survivors = TopN[T](population_size)
+        survivors.update(members)
+        survivors.update(offspring_members)
+        members = survivors.results()
+        if members[0][1] < best_score:
+            best_state, best_score = members[0]
+        if progress_callback:
+            progress_callback(generation, best_state, best_score)
+    return results.results()
+
+
+# Functions sent once to each worker process by the pool initializer.
+_worker_functions: Tuple[Any, ...] = ()
+
+
+def _set_worker_functions(*functions: Any) -> None:
+    global _worker_functions
+    _worker_functions = functions
+
+
+def _brute_force_chunk(
+    chunk: Tuple[T, ...], top_n: Optional[int]
+) -> List[Tuple[T, float]]:
+    """Evaluate a chunk of a search space with the worker's objective function."""
+    (objective_function,) = _worker_functions
+    return brute_force(objective_function, chunk, top_n)
+
+
+def parallel_brute_force(
+    objective_function: Callable[[T], float],
+    search_space: Iterable[T],
+    top_n: Optional[int] = 10,
+    processes: Optional[int] = None,
+    chunk_size: int = 1024,
+) -> List[Tuple[T, float]]:
+    """Search for optimal inputs by testing every input across a process pool.
+
+    The search space is consumed lazily in chunks, which are evaluated by worker
+    processes. Each worker keeps only the top_n results of each chunk, and these are
+    merged in this process. Only a bounded number of chunks are in flight at once, so
+    the search space may be an arbitrarily long generator.
+
+    The objective function is sent to each worker process once, when the worker
+    starts, so it must be picklable (for example, a module-level function or an
+    instance of a module-level class). The states in the search space are sent to
+    the workers, so they must be picklable too.
+
+    :param objective_function: A Callable that takes a T as input and returns a
+        score. Lower scores are better.
+    :param search_space: An iterable of T to test as inputs to the function.
+    :param top_n: The number of top results to return. If None, return all results.
+    :param processes: The number of worker processes. If None, the number of CPUs is
+        used. If 1, the search is run in this process.
+    :param chunk_size: The number of inputs sent to a worker at a time.
+
+    :return: The same results as brute_force: a list of tuples, where each tuple
+        contains an input from the search space and its corresponding score, sorted
+        by score in ascending order.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1:
+        return brute_force(objective_function, search_space, top_n)
+
+    top = TopN[T](top_n)
+    chunks = itertools.batched(search_space, chunk_size)
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_set_worker_functions,
+        initargs=(objective_function,),
+    ) as executor:
+        # Results are merged in submission order, so that ties are broken exactly
+        # as they are by brute_force.
+        pending: collections.deque = collections.deque()
+        for chunk in chunks:
+            if len(pending) >= 2 * processes:
+                top.update(pending.popleft().result())
+            pending.append(executor.submit(_brute_force_chunk, chunk, top_n))
+        for future in pending:
+            top.update(future.result())
+    return top.results()
 
 
 @dataclass
@@ -64,6 +442,161 @@ class SimulatedAnnealingConfig[T]:
     It is passed the current temperature, the best state found so far, and the best
     state score found so far."""
 
+    max_seconds: Optional[float] = None
+    """If set, the search stops after running for this many seconds."""
+
+    max_evaluations: Optional[int] = None
+    """If set, the search stops after this many evaluations of the objective (or
+    delta) function."""
+
+    plateau_temps: Optional[int] = None
+    """If set, the search stops after this many consecutive temperature changes
+    without an improvement to the best score."""
+
+    checkpoint_path: Optional[str] = None
+    """If set, a SimulatedAnnealingCheckpoint is written to this path after each
+    temperature change and when the search stops. It can be loaded with
+    load_checkpoint and passed to simulated_annealing to resume the search."""
+
+    stats_callback: Optional[Callable[["TemperatureStats"], None]] = None
+    """A callback that is passed the TemperatureStats for each temperature, after
+    the iterations at that temperature are complete (or the search stops)."""
+
+    trace_path: Optional[str] = None
+    """If set, the TemperatureStats for each temperature are appended to this file
+    as a line of JSON."""
+
+
+@dataclass
+class TemperatureStats:
+    """Statistics about the iterations performed at a single temperature."""
+
+    temperature: float
+    """The temperature."""
+
+    iterations: int
+    """The number of iterations performed at this temperature."""
+
+    accepted: int
+    """The number of proposed states that were accepted."""
+
+    improvements: int
+    """The number of accepted states that improved on the best score so far."""
+
+    evaluations: int
+    """The number of evaluations of the objective (or delta) function."""
+
+    seconds: float
+    """The wall-clock time spent at this temperature, in seconds."""
+
+    current_score: float
+    """The score of the current state at the end of these iterations."""
+
+    best_score: float
+    """The best score found so far at the end of these iterations."""
+
+    @property
+    def acceptance_rate(self) -> float:
+        """The fraction of proposed states that were accepted."""
+        return self.accepted / self.evaluations if self.evaluations else 0.0
+
+    @property
+    def evaluations_per_second(self) -> float:
+        """The number of evaluations per second of wall-clock time."""
+        return self.evaluations / self.seconds if self.seconds > 0 else 0.0
+
+
+class _StatsRecorder:
+    """Deliver TemperatureStats to the destinations set in a config."""
+
+    def __init__(self, config: SimulatedAnnealingConfig):
+        self._callback = config.stats_callback
+        self._trace_path = config.trace_path
+        self.enabled = self._callback is not None or self._trace_path is not None
+
+    def record(self, stats: TemperatureStats) -> None:
+        if self._callback:
+            self._callback(stats)
+        if self._trace_path:
+            record = dataclasses.asdict(stats)
+            record["acceptance_rate"] = stats.acceptance_rate
+            record["evaluations_per_second"] = stats.evaluations_per_second
+            with open(self._trace_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+@dataclass
+class SimulatedAnnealingCheckpoint[T]:
+    """The complete state of a simulated annealing search."""
+
+    state: T
+    """The current state."""
+
+    state_score: float
+    """The score of the current state."""
+
+    temperature: float
+    """The current temperature."""
+
+    iteration: int
+    """The number of iterations performed at the current temperature."""
+
+    top: "TopN[T]"
+    """The top results found so far."""
+
+    best_state: T
+    """The best state found so far."""
+
+    best_score: float
+    """The score of the best state found so far."""
+
+    evaluations: int
+    """The total number of evaluations of the objective (or delta) function."""
+
+    plateau_temps: int
+    """The number of consecutive temperature changes without an improvement to the
+    best score."""
+
+    improved: bool
+    """Whether the best score has improved at the current temperature."""
+
+    random_state: Any
+    """The state of the random module, as returned by random.getstate()."""
+
+
+def save_checkpoint(path: str, checkpoint: SimulatedAnnealingCheckpoint) -> None:
+    """Write a simulated annealing checkpoint to a file.
+
+    The checkpoint is written to a temporary file and then atomically renamed, so a
+    search that is interrupted while writing leaves the previous checkpoint intact.
+
+    :param path: The path of the file to write.
+    :param checkpoint: The checkpoint to write. Its states must be picklable.
+    """
+    directory = os.path.dirname(path) or "."
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        try:
+            pickle.dump(checkpoint, f)
+            f.close()
+            os.replace(f.name, path)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+
+
+def load_checkpoint(path: str) -> SimulatedAnnealingCheckpoint:
+    """Read a simulated annealing checkpoint written by save_checkpoint.
+
+    Checkpoints are pickles, so only load checkpoints from trusted sources.
+
+    :param path: The path of the file to read.
+
+    :return: The checkpoint.
+    """
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
 
 def simulated_annealing(
     objective_function: Callable[[T], float],
@@ -71,9 +604,14 @@ def simulated_annealing(
     neighbor_function: Callable[[T], T],
     top_n: Optional[int] = 10,
     config: Optional[SimulatedAnnealingConfig] = None,
+    delta_function: Optional[Callable[[T, T], float]] = None,
+    resume: Optional[SimulatedAnnealingCheckpoint[T]] = None,
 ) -> List[Tuple[T, float]]:
     """Search for optimal inputs for the objective using simulated annealing.
 
+    The search runs until the temperature falls to config.min_temp, or until one of
+    the budgets or the plateau limit in the config is reached.
+
     :param objective_function: A Callable that takes a T as input and returns a
         score. Lower scores are better.
     :param initial_state: The initial state to start the search from. This is
@@ -83,6 +621,15 @@ def simulated_annealing(
     :param top_n: The number of top results to return. If None, all results are
         returned.
     :param config: The configuration for the simulated annealing algorithm.
+    :param delta_function: An optional Callable that takes a state and a neighboring
+        state, and returns the neighbor's score minus the state's score. If provided,
+        it is used to score neighbors instead of objective_function, which is then
+        only called for the initial state. This is useful when the score change
+        caused by a neighbor can be computed more cheaply than a full score.
+    :param resume: A checkpoint to resume the search from. If provided, initial_state
+        and top_n are ignored, and the state of the random module is restored from
+        the checkpoint, so that the resumed search proceeds exactly as it would have
+        without interruption. The budgets in config apply to this call only.
 
     :return: A list of tuples of the form (state, score), sorted by score in
         ascending order. The list is truncated to the top_n results if top_n is not
@@ -90,15 +637,99 @@ def simulated_annealing(
     """
     if config is None:
         config = SimulatedAnnealingConfig()
-    temperature = config.initial_temp
-    state = initial_state
-    state_score = objective_function(state)
-    i = 0
-    results: List[Tuple[T, float]] = []
+    if resume is None:
+        temperature = config.initial_temp
+        state = initial_state
+        state_score = objective_function(state)
+        i = 0
+        top = TopN[T](top_n)
+        best_state, best_score = state, state_score
+        evaluations = 1
+        plateau_temps = 0
+        improved = False
+    else:
+        random.setstate(resume.random_state)
+        temperature = resume.temperature
+        state, state_score = resume.state, resume.state_score
+        i = resume.iteration
+        top = resume.top
+        best_state, best_score = resume.best_state, resume.best_score
+        evaluations = resume.evaluations
+        plateau_temps = resume.plateau_temps
+        improved = resume.improved
+
+    def checkpoint() -> None:
+        if config.checkpoint_path:
+            save_checkpoint(
+                config.checkpoint_path,
+                SimulatedAnnealingCheckpoint(
+                    state=state,
+                    state_score=state_score,
+                    temperature=temperature,
+                    iteration=i,
+                    top=top,
+                    best_state=best_state,
+                    best_score=best_score,
+                    evaluations=evaluations,
+                    plateau_temps=plateau_temps,
+                    improved=improved,
+                    random_state=random.getstate(),
+                ),
+            )
+
+    deadline = (
+        time.monotonic() + config.max_seconds
+        if config.max_seconds is not None
+        else None
+    )
+    max_evaluations = (
+        (resume.evaluations if resume else 0) + config.max_evaluations
+        if config.max_evaluations is not None
+        else None
+    )
+    recorder = _StatsRecorder(config)
+    step_start_time = time.perf_counter()
+    step_start_evaluations = evaluations
+    accepted = improvements = 0
+
+    def record_stats() -> None:
+        nonlocal step_start_time, step_start_evaluations, accepted, improvements
+        if recorder.enabled and evaluations > step_start_evaluations:
+            now = time.perf_counter()
+            recorder.record(
+                TemperatureStats(
+                    temperature=temperature,
+                    iterations=evaluations - step_start_evaluations,
+                    accepted=accepted,
+                    improvements=improvements,
+                    evaluations=evaluations - step_start_evaluations,
+                    seconds=now - step_start_time,
+                    current_score=state_score,
+                    best_score=best_score,
+                )
+            )
+            step_start_time = now
+        step_start_evaluations = evaluations
+        accepted = improvements = 0
+
     while temperature > config.min_temp:
+        if (
+            (max_evaluations is not None and evaluations >= max_evaluations)
+            or (deadline is not None and time.monotonic() >= deadline)
+            or (
+                config.plateau_temps is not None
+                and plateau_temps >= config.plateau_temps
+            )
+        ):
+            break
         neighbor_state = neighbor_function(state)
-        neighbor_score = objective_function(neighbor_state)
-        delta_score = neighbor_score - state_score
+        if delta_function is None:
+            neighbor_score = objective_function(neighbor_state)
+            delta_score = neighbor_score - state_score
+        else:
+            delta_score = delta_function(state, neighbor_state)
+            neighbor_score = state_score + delta_score
+        evaluations += 1
         if delta_score < 0:
             acceptance_probability = 1.0
         else:
@@ -106,27 +737,587 @@ def simulated_annealing(
         if acceptance_probability > random.random():
             state = neighbor_state
             state_score = neighbor_score
-            if (
-                not results
-                or top_n is None
-                or len(results) < top_n
-                or state_score < results[-1][1]
-            ):
-                result_index = bisect.bisect_left(
-                    results, state_score, key=lambda t: t[1]
-                )
-                if (
-                    not results
-                    or result_index >= len(results)
-                    or results[result_index][0] != state
-                ):
-                    results.insert(result_index, (state, state_score))
-                    if top_n is not None and len(results) > top_n:
-                        results = results[:top_n]
+            accepted += 1
+            if state_score < best_score:
+                best_state, best_score = state, state_score
+                improved = True
+                improvements += 1
+            top.add(state, state_score)
         i += 1
         if i >= config.iterations_per_temp:
+            i = 0
+            record_stats()
             temperature *= config.alpha
+            plateau_temps = 0 if improved else plateau_temps + 1
+            improved = False
+            if config.progress_callback:
+                config.progress_callback(temperature, best_state, best_score)
+            checkpoint()
+    record_stats()
+    checkpoint()
+    return top.results()
+
+
+_progress_queue: Optional[multiprocessing.queues.Queue] = None
+
+
+def _set_progress_queue(queue: Optional[multiprocessing.queues.Queue]) -> None:
+    global _progress_queue
+    _progress_queue = queue
+
+
+def _annealing_chain(
+    objective_function: Callable[[T], float],
+    initial_state_function: Callable[[], T],
+    neighbor_function: Callable[[T], T],
+    top_n: Optional[int],
+    delta_function: Optional[Callable[[T, T], float]],
+    config: SimulatedAnnealingConfig,
+    deadline: Optional[float],
+    chain_index: int,
+    seed: int,
+) -> List[Tuple[T, float]]:
+    """Run a single, independently seeded simulated annealing chain.
+
+    If deadline is not None, it is a time.time() value shared by every chain, and
+    the chain's max_seconds is reduced to the time left until then.
+    """
+    random.seed(seed)
+    if deadline is not None:
+        config = dataclasses.replace(
+            config, max_seconds=max(deadline - time.time(), 0.0)
+        )
+    if config.checkpoint_path:
+        config = dataclasses.replace(
+            config, checkpoint_path=f"{config.checkpoint_path}.{chain_index}"
+        )
+    if config.trace_path:
+        config = dataclasses.replace(
+            config, trace_path=f"{config.trace_path}.{chain_index}"
+        )
+    queue = _progress_queue
+    if queue is not None:
+
+        def progress_callback(temperature: float, state: T, state_score: float):
+            queue.put((chain_index, temperature, state, state_score))
+
+        config = dataclasses.replace(config, progress_callback=progress_callback)
+    return simulated_annealing(
+        objective_function,
+        initial_state_function(),
+        neighbor_function,
+        top_n=top_n,
+        config=config,
+        delta_function=delta_function,
+    )
+
+
+def _merge_results(
+    result_lists: Iterable[List[Tuple[T, float]]], top_n: Optional[int]
+) -> List[Tuple[T, float]]:
+    """Merge lists of results, keeping the best score for each distinct state."""
+    top = TopN[T](top_n)
+    for results in result_lists:
+        top.update(results)
+    return top.results()
+
+
+def parallel_simulated_annealing(
+    objective_function: Callable[[T], float],
+    initial_state_function: Callable[[], T],
+    neighbor_function: Callable[[T], T],
+    top_n: Optional[int] = 10,
+    config: Optional[SimulatedAnnealingConfig] = None,
+    delta_function: Optional[Callable[[T, T], float]] = None,
+    num_chains: Optional[int] = None,
+    processes: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Tuple[T, float]]:
+    """Search for optimal inputs using many independent simulated annealing chains.
+
+    Each chain starts from its own initial state and runs simulated_annealing in a
+    process pool. The results of all chains are merged into a single list.
+
+    The objective, initial state, neighbor and delta functions are sent to worker
+    processes, so they must be picklable (for example, module-level functions or
+    instances of module-level classes).
+
+    :param objective_function: A Callable that takes a T as input and returns a
+        score. Lower scores are better.
+    :param initial_state_function: A Callable that returns an initial state for a
+        chain. This is typically a random state. It is called once per chain, after
+        the chain's random seed has been set.
+    :param neighbor_function: A Callable that takes a T as input and returns a
+        neighboring state.
+    :param top_n: The number of top results to return. If None, all results are
+        returned.
+    :param config: The configuration used by every chain. Its max_seconds limits
+        the whole search rather than each chain, so chains that start late (because
+        there are more chains than processes) only get the time that is left. Its
+        progress_callback is
+        called in this process whenever any chain changes temperature, and is passed
+        that chain's temperature along with the best state and score found by any
+        chain so far. If its checkpoint_path or trace_path is set, chain i writes to
+        that path with the suffix ".i". Its stats_callback is only called when the
+        chains are run in this process.
+    :param delta_function: An optional Callable as accepted by simulated_annealing.
+    :param num_chains: The number of chains to run. If None, one chain is run per
+        worker process.
+    :param processes: The number of worker processes. If None, the number of CPUs is
+        used. If 1, the chains are run sequentially in this process.
+    :param seed: The base random seed. Chain i is seeded with seed + i, so results
+        are reproducible for a given seed. If None, a random base seed is chosen.
+
+    :return: A list of tuples of the form (state, score), sorted by score in
+        ascending order, with each distinct state appearing at most once. The list is
+        truncated to the top_n results if top_n is not None.
+    """
+    if config is None:
+        config = SimulatedAnnealingConfig()
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if num_chains is None:
+        num_chains = processes
+    if seed is None:
+        seed = random.randrange(2**32)
+    progress_callback = config.progress_callback
+    # time.time() rather than time.monotonic(), since the deadline is compared
+    # against clocks in other processes.
+    deadline = (
+        time.time() + config.max_seconds if config.max_seconds is not None else None
+    )
+    chain_function = functools.partial(
+        _annealing_chain,
+        objective_function,
+        initial_state_function,
+        neighbor_function,
+        top_n,
+        delta_function,
+    )
+
+    best: Optional[Tuple[T, float]] = None
+
+    def report_progress(temperature: float, state: T, state_score: float) -> None:
+        nonlocal best
+        if best is None or state_score < best[1]:
+            best = (state, state_score)
+        if progress_callback:
+            progress_callback(temperature, best[0], best[1])
+
+    if processes <= 1:
+        random_state = random.getstate()
+        config = dataclasses.replace(config, progress_callback=report_progress)
+        try:
+            result_lists = [
+                chain_function(config, deadline, chain_index, seed + chain_index)
+                for chain_index in range(num_chains)
+            ]
+        finally:
+            random.setstate(random_state)
+        return _merge_results(result_lists, top_n)
+
+    context = multiprocessing.get_context()
+    queue = context.Queue() if progress_callback else None
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=context,
+        initializer=_set_progress_queue,
+        initargs=(queue,),
+    ) as executor:
+        chain_config = dataclasses.replace(
+            config, progress_callback=None, stats_callback=None
+        )
+        futures = [
+            executor.submit(
+                chain_function, chain_config, deadline, chain_index, seed + chain_index
+            )
+            for chain_index in range(num_chains)
+        ]
+        pending = set(futures)
+        while pending:
+            _, pending = concurrent.futures.wait(pending, timeout=0.1)
+            while queue is not None and not queue.empty():
+                _, temperature, state, state_score = queue.get()
+                report_progress(temperature, state, state_score)
+        return _merge_results((f.result() for f in futures), top_n)
+
+
+@dataclass
+class ParallelTemperingConfig[T]:
+    """Configuration for parallel tempering."""
+
+    temperatures: Optional[List[float]] = None
+    """The temperatures of the replicas. If None, num_replicas temperatures are
+    spaced geometrically from min_temp to max_temp."""
+
+    num_replicas: int = 8
+    """The number of replicas, if temperatures is None."""
+
+    min_temp: float = 1.0
+    """The lowest temperature, if temperatures is None."""
+
+    max_temp: float = 1000.0
+    """The highest temperature, if temperatures is None."""
+
+    sweeps: int = 1000
+    """The number of sweeps. In each sweep, every replica performs
+    iterations_per_sweep iterations at its temperature, and then exchanges between
+    replicas at neighboring temperatures are attempted."""
+
+    iterations_per_sweep: int = 100
+    """The number of iterations each replica performs in each sweep."""
+
+    max_seconds: Optional[float] = None
+    """If set, the search stops after the first sweep that ends after running for
+    this many seconds."""
+
+    progress_callback: Optional[Callable[[int, T, float], None]] = None
+    """A callback that is called after each sweep.
+
+    It is passed the number of completed sweeps, the best state found so far, and
+    the best state score found so far."""
+
+    def replica_temperatures(self) -> List[float]:
+        """Return the replica temperatures, in ascending order."""
+        if self.temperatures is not None:
+            return sorted(self.temperatures)
+        if self.num_replicas == 1:
+            return [self.min_temp]
+        ratio = self.max_temp / self.min_temp
+        return [
+            self.min_temp * ratio ** (k / (self.num_replicas - 1))
+            for k in range(self.num_replicas)
+        ]
+
+
+def _metropolis_sweep(
+    objective_function: Callable[[T], float],
+    neighbor_function: Callable[[T], T],
+    delta_function: Optional[Callable[[T, T], float]],
+    state: T,
+    state_score: float,
+    temperature: float,
+    iterations: int,
+    top_n: Optional[int],
+    seed: int,
+) -> Tuple[T, float, List[Tuple[T, float]]]:
+    """Run Metropolis iterations at a fixed temperature.
+
+    :return: The final state, its score, and the top results visited.
+    """
+    random.seed(seed)
+    top = TopN[T](top_n)
+    for _ in range(iterations):
+        neighbor_state = neighbor_function(state)
+        if delta_function is None:
+            neighbor_score = objective_function(neighbor_state)
+            delta_score = neighbor_score - state_score
+        else:
+            delta_score = delta_function(state, neighbor_state)
+            neighbor_score = state_score + delta_score
+        if delta_score < 0 or math.exp(-delta_score / temperature) > random.random():
+            state = neighbor_state
+            state_score = neighbor_score
+            top.add(state, state_score)
+    return state, state_score, top.results()
+
+
+def _worker_metropolis_sweep(
+    state: T,
+    state_score: float,
+    temperature: float,
+    iterations: int,
+    top_n: Optional[int],
+    seed: int,
+) -> Tuple[T, float, List[Tuple[T, float]]]:
+    """Run _metropolis_sweep with the worker's functions."""
+    objective_function, neighbor_function, delta_function = _worker_functions
+    return _metropolis_sweep(
+        objective_function,
+        neighbor_function,
+        delta_function,
+        state,
+        state_score,
+        temperature,
+        iterations,
+        top_n,
+        seed,
+    )
+
+
+def parallel_tempering(
+    objective_function: Callable[[T], float],
+    initial_state: T,
+    neighbor_function: Callable[[T], T],
+    top_n: Optional[int] = 10,
+    config: Optional[ParallelTemperingConfig] = None,
+    delta_function: Optional[Callable[[T, T], float]] = None,
+    processes: Optional[int] = 1,
+    seed: Optional[int] = None,
+) -> List[Tuple[T, float]]:
+    """Search for optimal inputs for the objective using parallel tempering.
+
+    Parallel tempering (also known as replica exchange) runs several replicas of a
+    Metropolis search, each at its own fixed temperature. After each sweep, replicas
+    at neighboring temperatures exchange states with the Metropolis exchange
+    probability, which lets states found by the hot, freely exploring replicas move
+    down to the cold replicas, and lets the cold replicas escape local optima.
+
+    :param objective_function: A Callable that takes a T as input and returns a
+        score. Lower scores are better.
+    :param initial_state: The initial state of every replica.
+    :param neighbor_function: A Callable that takes a T as input and returns a
+        neighboring state. This is typically a small random change to the input.
+    :param top_n: The number of top results to return. If None, all results are
+        returned.
+    :param config: The configuration for the parallel tempering algorithm.
+    :param delta_function: An optional Callable as accepted by simulated_annealing.
+    :param processes: The number of worker processes to run replicas in. If None,
+        the number of CPUs is used. If 1, the replicas are run in this process. When
+        using worker processes, the objective, neighbor and delta functions are sent
+        to each worker once, and so must be picklable. Replica states are sent to
+        the workers every sweep, so this is only worthwhile when a sweep is
+        expensive.
+    :param seed: The random seed. Results are reproducible for a given seed,
+        regardless of the number of processes. If None, a random seed is chosen.
+
+    :return: A list of tuples of the form (state, score), sorted by score in
+        ascending order. The list is truncated to the top_n results if top_n is not
+        None.
+    """
+    if config is None:
+        config = ParallelTemperingConfig()
+    if processes is None:
+        processes = os.cpu_count() or 1
+    rng = random.Random(seed if seed is not None else random.randrange(2**32))
+    temperatures = config.replica_temperatures()
+    initial_score = objective_function(initial_state)
+    replicas = [(initial_state, initial_score)] * len(temperatures)
+    top = TopN[T](top_n)
+    top.add(initial_state, initial_score)
+    best_state, best_score = initial_state, initial_score
+    deadline = (
+        time.monotonic() + config.max_seconds
+        if config.max_seconds is not None
+        else None
+    )
+
+    executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+    if processes > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_set_worker_functions,
+            initargs=(objective_function, neighbor_function, delta_function),
+        )
+    try:
+        for sweep in range(config.sweeps):
+            seeds = [rng.randrange(2**32) for _ in replicas]
+            if executor is not None:
+                futures = [
+                    executor.submit(
+                        _worker_metropolis_sweep,
+                        state,
+                        state_score,
+                        temperature,
+                        config.iterations_per_sweep,
+                        top_n,
+                        replica_seed,
+                    )
+                    for (state, state_score), temperature, replica_seed in zip(
+                        replicas, temperatures, seeds, strict=True
+                    )
+                ]
+                sweep_results = [f.result() for f in futures]
+            else:
+                random_state = random.getstate()
+                sweep_results = [
+                    _metropolis_sweep(
+                        objective_function,
+                        neighbor_function,
+                        delta_function,
+                        state,
+                        state_score,
+                        temperature,
+                        config.iterations_per_sweep,
+                        top_n,
+                        replica_seed,
+                    )
+                    for (state, state_score), temperature, replica_seed in zip(
+                        replicas, temperatures, seeds, strict=True
+                    )
+                ]
+                random.setstate(random_state)
+
+            replicas = []
+            for state, state_score, results in sweep_results:
+                replicas.append((state, state_score))
+                top.update(results)
+                if results and results[0][1] < best_score:
+                    best_state, best_score = results[0]
+
+            # Attempt exchanges between alternating pairs of neighboring temperatures.
+            for k in range(sweep % 2, len(replicas) - 1, 2):
+                delta = (replicas[k][1] - replicas[k + 1][1]) * (
+                    1 / temperatures[k] - 1 / temperatures[k + 1]
+                )
+                if delta >= 0 or math.exp(delta) > rng.random():
+                    replicas[k], replicas[k + 1] = replicas[k + 1], replicas[k]
+
+            if config.progress_callback:
+                config.progress_callback(sweep + 1, best_state, best_score)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return top.results()
+
+
+def permutation_annealing(
+    batch_objective_function: Callable[[np.ndarray], ArrayLike],
+    n: int,
+    num_chains: int = 256,
+    top_n: Optional[int] = 10,
+    config: Optional[SimulatedAnnealingConfig] = None,
+    initial_states: Optional[np.ndarray] = None,
+    seed: Optional[int] = None,
+) -> List[Tuple[Tuple[int, ...], float]]:
+    """Search for optimal permutations using many simulated annealing chains at once.
+
+    The states of all chains are held in a single (num_chains, n) integer array, in
+    which each row is a permutation of range(n). In each iteration, a random swap of
+    two elements is proposed for every chain, all of the proposals are scored with a
+    single call to the batch objective, and each proposal is accepted or rejected
+    with a vectorized Metropolis test. All chains share the same temperature
+    schedule.
+
+    :param batch_objective_function: A Callable that takes a (k, n) integer array of
+        permutations and returns an array of their k scores. Lower scores are better.
+    :param n: The length of the permutations.
+    :param num_chains: The number of chains.
+    :param top_n: The number of top results to return. If None, all results are
+        returned.
+    :param config: The configuration for the simulated annealing schedule. Each
+        iteration evaluates num_chains states, which is counted towards
+        max_evaluations. The progress_callback is passed permutations as tuples.
+        The current_score of each TemperatureStats is the lowest current score of
+        any chain, and improvements counts the iterations that improved on the best
+        score so far.
+    :param initial_states: An optional (num_chains, n) integer array of initial
+        permutations. If None, random permutations are used.
+    :param seed: The random seed. If None, a random seed is chosen.
+
+    :return: A list of tuples of the form (permutation, score), where permutation is
+        a tuple of ints, sorted by score in ascending order. The list is truncated to
+        the top_n results if top_n is not None.
+
+    :raises ValueError: If n is less than 2, or config specifies a checkpoint path,
+        which is not supported.
+    """
+    if config is None:
+        config = SimulatedAnnealingConfig()
+    if n < 2:
+        raise ValueError("permutation_annealing requires permutations of length 2+.")
+    if config.checkpoint_path:
+        raise ValueError("permutation_annealing does not support checkpoints.")
+    rng = np.random.default_rng(seed)
+    if initial_states is None:
+        states = rng.permuted(np.tile(np.arange(n), (num_chains, 1)), axis=1)
+    else:
+        states = np.array(initial_states, dtype=np.intp)
+        num_chains = len(states)
+    scores = np.asarray(batch_objective_function(states), dtype=float)
+    evaluations = num_chains
+    chains = np.arange(num_chains)
+
+    top = TopN[Tuple[int, ...]](top_n)
+    for k in np.argsort(scores, kind="stable"):
+        top.add(tuple(states[k].tolist()), float(scores[k]))
+    best_index = int(np.argmin(scores))
+    best_state, best_score = (
+        tuple(states[best_index].tolist()),
+        float(scores[best_index]),
+    )
+
+    deadline = (
+        time.monotonic() + config.max_seconds
+        if config.max_seconds is not None
+        else None
+    )
+    temperature = config.initial_temp
+    i = 0
+    plateau_temps = 0
+    improved = False
+
+    recorder = _StatsRecorder(config)
+    step_start_time = time.perf_counter()
+    step_start_evaluations = evaluations
+    accepted_count = improvements = 0
+
+    def record_stats() -> None:
+        nonlocal step_start_time, step_start_evaluations, accepted_count, improvements
+        if recorder.enabled and evaluations > step_start_evaluations:
+            now = time.perf_counter()
+            recorder.record(
+                TemperatureStats(
+                    temperature=temperature,
+                    iterations=(evaluations - step_start_evaluations) // num_chains,
+                    accepted=accepted_count,
+                    improvements=improvements,
+                    evaluations=evaluations - step_start_evaluations,
+                    seconds=now - step_start_time,
+                    current_score=float(scores.min()),
+                    best_score=best_score,
+                )
+            )
+            step_start_time = now
+        step_start_evaluations = evaluations
+        accepted_count = improvements = 0
+
+    while temperature > config.min_temp:
+        if (
+            (
+                config.max_evaluations is not None
+                and evaluations >= config.max_evaluations
+            )
+            or (deadline is not None and time.monotonic() >= deadline)
+            or (
+                config.plateau_temps is not None
+                and plateau_temps >= config.plateau_temps
+            )
+        ):
+            break
+        first = rng.integers(n, size=num_chains)
+        second = (first + rng.integers(1, n, size=num_chains)) % n
+        proposals = states.copy()
+        proposals[chains, first] = states[chains, second]
+        proposals[chains, second] = states[chains, first]
+        proposal_scores = np.asarray(batch_objective_function(proposals), dtype=float)
+        evaluations += num_chains
+        delta_scores = proposal_scores - scores
+        with np.errstate(over="ignore"):
+            accepted = (delta_scores < 0) | (
+                rng.random(num_chains) < np.exp(-delta_scores / temperature)
+            )
+        states[accepted] = proposals[accepted]
+        scores[accepted] = proposal_scores[accepted]
+        accepted_count += int(np.count_nonzero(accepted))
+        for k in np.flatnonzero(accepted & (proposal_scores < top.threshold)):
+            top.add(tuple(states[k].tolist()), float(scores[k]))
+        iteration_best = int(np.argmin(scores))
+        if scores[iteration_best] < best_score:
+            best_state = tuple(states[iteration_best].tolist())
+            best_score = float(scores[iteration_best])
+            improved = True
+            improvements += 1
+        i += 1
+        if i >= config.iterations_per_temp:
             i = 0
+            record_stats()
+            temperature *= config.alpha
+            plateau_temps = 0 if improved else plateau_temps + 1
+            improved = False
             if config.progress_callback:
-                config.progress_callback(temperature, results[0][0], results[0][1])
-    return results
+                config.progress_callback(temperature, best_state, best_score)
+    record_stats()
+    return top.results()
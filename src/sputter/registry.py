@@ -0,0 +1,105 @@
+"""A module providing shared, lazily loaded language models.
+
+Loading a language model takes a noticeable amount of time, so functions throughout
+sputter that are not explicitly passed a model use the shared instances from this
+registry. Each model is loaded the first time it is requested and then reused for
+the lifetime of the process, unless it is explicitly invalidated.
+"""
+
+import os.path
+import threading
+from typing import Dict, Optional
+
+from sputter.alphabet_trie import CompactAlphabetTrie
+from sputter.fitness import QuadgramStatistics, WordStatistics
+
+
+_lock = threading.RLock()
+_quadgram_statistics: Dict[Optional[str], QuadgramStatistics] = {}
+_word_statistics: Dict[Optional[str], WordStatistics] = {}
+
+
+def _key(filepath: Optional[str]) -> Optional[str]:
+    return os.path.abspath(filepath) if filepath else None
+
+
+def quadgram_statistics(filepath: Optional[str] = None) -> QuadgramStatistics:
+    """Return the shared QuadgramStatistics for a source file.
+
+    :param filepath: The path to the quadgram source file. If None, the built-in
+        English quadgram statistics are used.
+
+    :return: The shared QuadgramStatistics, loading it if necessary.
+    """
+    key = _key(filepath)
+    with _lock:
+        qs = _quadgram_statistics.get(key)
+        if qs is None:
+            qs = QuadgramStatistics(filepath)
+            _quadgram_statistics[key] = qs
+        return qs
+
+
+def word_statistics(filepath: Optional[str] = None) -> WordStatistics:
+    """Return the shared WordStatistics for a source file.
+
+    :param filepath: The path to the word source file. If None, the built-in English
+        word statistics are used.
+
+    :return: The shared WordStatistics, loading it if necessary.
+    """
+    key = _key(filepath)
+    with _lock:
+        ws = _word_statistics.get(key)
+        if ws is None:
+            ws = WordStatistics(filepath)
+            _word_statistics[key] = ws
+        return ws
+
+
+def word_trie(filepath: Optional[str] = None) -> CompactAlphabetTrie:
+    """Return the shared word trie for a source file.
+
+    :param filepath: The path to the word source file. If None, the built-in English
+        word statistics are used.
+
+    :return: The compact trie of the shared WordStatistics, building it if necessary.
+    """
+    ws = word_statistics(filepath)
+    with _lock:
+        return ws.compact_trie()
+
+
+def is_shared(model: object) -> bool:
+    """Return whether a model is one of the shared models held by this registry.
+
+    :param model: The model to look for.
+
+    :return: True if model is currently shared, and has not been invalidated.
+    """
+    with _lock:
+        return any(
+            shared is model
+            for shared in (*_quadgram_statistics.values(), *_word_statistics.values())
+        )
+
+
+def invalidate(filepath: Optional[str] = None) -> None:
+    """Drop the shared models loaded from a source file.
+
+    The next request for a dropped model loads it again.
+
+    :param filepath: The path to the source file whose models should be dropped. If
+        None, the built-in models are dropped.
+    """
+    key = _key(filepath)
+    with _lock:
+        _quadgram_statistics.pop(key, None)
+        _word_statistics.pop(key, None)
+
+
+def invalidate_all() -> None:
+    """Drop all shared models."""
+    with _lock:
+        _quadgram_statistics.clear()
+        _word_statistics.clear()
@@ -0,0 +1,291 @@
+"""A module for reordering a sequence of ngrams into likely text."""
+
+import random
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sputter.encoded_text import encode_letters
+from sputter.fitness import QuadgramStatistics, WordStatistics
+from sputter.registry import quadgram_statistics, word_statistics
+import sputter.spacer as spacer
+
+
+class ReorderObjective:
+    """Score orderings of ngrams by the likelihood of their concatenation.
+
+    An instance is a callable objective for use with sputter.optimize, returning the
+    negated score of the concatenated text (lower is better). Instances are
+    picklable, so they may be used with parallel_simulated_annealing.
+    """
+
+    def __init__(
+        self,
+        enumeration: Optional[List[int]] = None,
+        qs: Optional[QuadgramStatistics] = None,
+        ws: Optional[WordStatistics] = None,
+    ):
+        """Initialize the objective.
+
+        :param enumeration: If provided, the concatenated text is split into words of
+            these lengths and scored by word statistics. Otherwise, it is scored by
+            quadgram statistics.
+        :param qs: The QuadgramStatistics to use. If None, the shared default is used.
+        :param ws: The WordStatistics to use. If None, the shared default is used.
+        """
+        self.enumeration = enumeration
+        if enumeration:
+            self._ws = ws or word_statistics()
+        else:
+            self._qs = qs or quadgram_statistics()
+
+    def __call__(self, ngrams: Sequence[str]) -> float:
+        """Return the negated score of the concatenation of ngrams."""
+        s = "".join(ngrams)
+        if self.enumeration:
+            s = spacer.space_with_enumeration(s, self.enumeration)
+            return -self._ws.spaced_string_score(s)
+        return -self._qs.string_score(s)
+
+
+class ReorderQuadgramScorer:
+    """Score many orderings of a fixed set of ngrams at once by quadgram statistics.
+
+    An instance is a batch objective for sputter.optimize.permutation_annealing,
+    where each permutation is an ordering of the indices of the ngrams.
+    """
+
+    def __init__(self, ngrams: Sequence[str], qs: Optional[QuadgramStatistics] = None):
+        """Precompute the letter indices of the ngrams.
+
+        :param ngrams: The ngrams to order. These should only contain uppercase
+            letters.
+        :param qs: The QuadgramStatistics to use. If None, the shared default is used.
+        """
+        self._qs = qs or quadgram_statistics()
+        self._codes = encode_letters("".join(ngrams))
+        self._lengths = np.array([len(ngram) for ngram in ngrams], dtype=np.intp)
+        self._starts = np.concatenate([[0], np.cumsum(self._lengths)[:-1]])
+
+    def text_codes(self, orders: np.ndarray) -> np.ndarray:
+        """Return the letter indices of the concatenated ngrams of many orderings.
+
+        :param orders: A (k, n) integer array, in which each row is an ordering of
+            the indices of the n ngrams.
+
+        :return: A (k, total length) array of letter indices (A is 0).
+        """
+        orders = np.asarray(orders)
+        k = len(orders)
+        lengths = self._lengths[orders]
+        # For each character of each concatenation, find the ngram it comes from and
+        # its offset within that ngram.
+        ngram_ids = np.repeat(orders.ravel(), lengths.ravel()).reshape(k, -1)
+        slot_starts = np.cumsum(lengths, axis=1) - lengths
+        char_slot_starts = np.repeat(slot_starts.ravel(), lengths.ravel()).reshape(
+            k, -1
+        )
+        offsets = np.arange(ngram_ids.shape[1]) - char_slot_starts
+        return self._codes[self._starts[ngram_ids] + offsets]
+
+    def __call__(self, orders: np.ndarray) -> np.ndarray:
+        """Return the negated quadgram scores of many orderings.
+
+        :param orders: A (k, n) integer array, in which each row is an ordering of
+            the indices of the n ngrams.
+
+        :return: An array of the k negated quadgram scores.
+        """
+        codes = self.text_codes(orders)
+        if codes.shape[1] < 4:
+            return np.zeros(len(codes))
+        return -self._qs.score_letter_codes(codes)
+
+
+EXACT_REORDER_LIMIT = 12
+"""The largest number of ngrams for which the reorder command uses exact_reorder.
+
+The time and memory used by exact_reorder grow in proportion to 2 ** len(ngrams)."""
+
+EXACT_REORDER_MAX_TABLE_SIZE = 1 << 22
+"""The largest exact_reorder_table_size for which the reorder command uses
+exact_reorder. Each table entry takes 17 bytes, so this is about 70 MB."""
+
+
+def _tail_transitions(ngrams: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """Find every possible three letter tail of a concatenation of ngrams.
+
+    :return: The tails, and a (tails, ngrams) array of the index of the tail that
+        results from appending each ngram to each tail.
+    """
+    tails = [""]
+    tail_ids = {"": 0}
+    next_tail_list: List[List[int]] = []
+    while len(next_tail_list) < len(tails):
+        tail = tails[len(next_tail_list)]
+        next_tail_list.append([])
+        for ngram in ngrams:
+            next_tail = (tail + ngram)[-3:]
+            if next_tail not in tail_ids:
+                tail_ids[next_tail] = len(tails)
+                tails.append(next_tail)
+            next_tail_list[-1].append(tail_ids[next_tail])
+    return tails, np.array(next_tail_list, dtype=np.intp).reshape(len(tails), -1)
+
+
+def exact_reorder_table_size(ngrams: Sequence[str], top_n: int = 10) -> int:
+    """Return the number of entries in each table used by exact_reorder.
+
+    This is 2 ** len(ngrams) * tails * top_n, where tails is the number of distinct
+    three letter tails that concatenations of the ngrams can end with. Short ngrams
+    can end with many different tails, so the size depends on the ngrams as well as
+    their number.
+
+    :param ngrams: The ngrams to order.
+    :param top_n: The number of orderings to return.
+
+    :return: The number of table entries.
+    """
+    tails, _ = _tail_transitions(ngrams)
+    return (1 << len(ngrams)) * len(tails) * max(top_n, 0)
+
+
+def exact_reorder(
+    ngrams: Sequence[str],
+    top_n: int = 10,
+    qs: Optional[QuadgramStatistics] = None,
+) -> List[Tuple[Tuple[str, ...], float]]:
+    """Find the orderings of ngrams whose concatenations have the best quadgram scores.
+
+    Each quadgram of the concatenated text ends within exactly one ngram, and starts
+    at most three letters before it. So the score contributed by appending an ngram
+    depends only on the last three letters of the text so far, and the best
+    orderings can be found exactly with a Held-Karp style dynamic program over
+    (set of ngrams used, last three letters). The k best partial orderings are kept
+    for each such state, so that the top_n best complete orderings are found.
+
+    :param ngrams: The ngrams to order. These should only contain uppercase letters.
+        Repeated ngrams are interchangeable, so each distinct ordering is returned
+        at most once.
+    :param top_n: The number of orderings to return. The tables used take memory in
+        proportion to top_n; see exact_reorder_table_size.
+    :param qs: The QuadgramStatistics to use. If None, the shared default is used.
+
+    :return: A list of tuples of the form (ordering, score), sorted by score in
+        ascending order, where score is the value of ReorderObjective for the
+        ordering (the negated quadgram score of the concatenation).
+    """
+    qs = qs or quadgram_statistics()
+    n = len(ngrams)
+    k = top_n
+    if k <= 0:
+        return []
+    if n == 0:
+        return [((), 0.0)]
+
+    # Find every possible three letter tail of a concatenation, and the score and
+    # resulting tail of appending each ngram to each tail.
+    tails, next_tails = _tail_transitions(ngrams)
+    scores = np.array(
+        [[qs.string_score(tail + ngram) for ngram in ngrams] for tail in tails]
+    )
+    num_tails = len(tails)
+
+    # Identical ngrams must be used in index order, so that each distinct ordering
+    # is only found once.
+    later_copies = [0] * n
+    earlier_copies = [0] * n
+    for i in range(n):
+        for j in range(n):
+            if ngrams[i] == ngrams[j]:
+                if j > i:
+                    later_copies[i] |= 1 << j
+                elif j < i:
+                    earlier_copies[i] |= 1 << j
+
+    # best[mask, tail, rank] is the rank-th best score of an ordering of the ngrams
+    # in mask that ends with tail. The back arrays record how it was reached.
+    best = np.full((1 << n, num_tails, k), -np.inf)
+    back_ngram = np.zeros((1 << n, num_tails, k), dtype=np.int8)
+    back_tail = np.zeros((1 << n, num_tails, k), dtype=np.int32)
+    back_rank = np.zeros((1 << n, num_tails, k), dtype=np.int32)
+    best[0, 0, 0] = 0.0
+    ngram_bits = 1 << np.arange(n)
+    for mask in range(1, 1 << n):
+        last = np.array(
+            [
+                i
+                for i in range(n)
+                if mask >> i & 1
+                and not mask & later_copies[i]
+                and mask & earlier_copies[i] == earlier_copies[i]
+            ],
+            dtype=np.intp,
+        )
+        if not len(last):
+            continue
+        candidates = best[mask ^ ngram_bits[last]] + scores[:, last].T[:, :, None]
+        targets = np.broadcast_to(next_tails[:, last].T[:, :, None], candidates.shape)
+        flat = np.flatnonzero(candidates > -np.inf)
+        if not len(flat):
+            continue
+        candidate_scores = candidates.ravel()[flat]
+        candidate_targets = targets.ravel()[flat]
+        order = np.lexsort((-candidate_scores, candidate_targets))
+        sorted_targets = candidate_targets[order]
+        group_starts = np.flatnonzero(
+            np.concatenate([[True], sorted_targets[1:] != sorted_targets[:-1]])
+        )
+        group_sizes = np.diff(np.append(group_starts, len(order)))
+        ranks = np.arange(len(order)) - np.repeat(group_starts, group_sizes)
+        keep = ranks < k
+        selected = flat[order[keep]]
+        target_tails = sorted_targets[keep]
+        target_ranks = ranks[keep]
+        last_index, prev_tail, prev_rank = np.unravel_index(selected, candidates.shape)
+        best[mask, target_tails, target_ranks] = candidates.ravel()[selected]
+        back_ngram[mask, target_tails, target_ranks] = last[last_index]
+        back_tail[mask, target_tails, target_ranks] = prev_tail
+        back_rank[mask, target_tails, target_ranks] = prev_rank
+
+    full = (1 << n) - 1
+    final_scores = best[full].ravel()
+    final = np.lexsort((-final_scores,))[:k]
+    results: List[Tuple[Tuple[str, ...], float]] = []
+    for index in final:
+        if final_scores[index] == -np.inf:
+            break
+        tail, rank = np.unravel_index(index, (num_tails, k))
+        mask = full
+        order_indices = []
+        while mask:
+            i = int(back_ngram[mask, tail, rank])
+            order_indices.append(i)
+            tail, rank = back_tail[mask, tail, rank], back_rank[mask, tail, rank]
+            mask ^= 1 << i
+        ordering = tuple(ngrams[i] for i in reversed(order_indices))
+        results.append((ordering, -float(final_scores[index])))
+    return results
+
+
+def randomly_swap_ngrams(ngrams: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Swap two randomly chosen ngrams in an ordering.
+
+    :param ngrams: The ordering of ngrams.
+
+    :return: A copy of the ordering with two ngrams swapped.
+    """
+    i, j = sorted(random.sample(range(len(ngrams)), 2))
+    return (
+        ngrams[:i] + (ngrams[j],) + ngrams[i + 1 : j] + (ngrams[i],) + ngrams[j + 1 :]
+    )
+
+
+def random_ordering(ngrams: Sequence[str]) -> Tuple[str, ...]:
+    """Return a uniformly random ordering of ngrams.
+
+    :param ngrams: The ngrams to order.
+
+    :return: A tuple containing the ngrams in a random order.
+    """
+    return tuple(random.sample(list(ngrams), len(ngrams)))
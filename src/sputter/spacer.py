@@ -1,8 +1,22 @@
 """A module for inserting spaces into unspaced text."""
 
-from typing import List, Optional, Tuple
+import heapq
+import math
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from sputter.alphabet_trie import CompactAlphabetTrie
 from sputter.fitness import WordStatistics
+from sputter.registry import word_statistics
+
+
+_ORD_A = ord("A")
+
+
+def _child(trie: CompactAlphabetTrie, node: int, code: int) -> int:
+    """Return the child of node for a letter index, or NO_NODE for a non-letter."""
+    if node == trie.NO_NODE or not 0 <= code < 26:
+        return trie.NO_NODE
+    return trie.child(node, code)
 
 
 def space(
@@ -13,35 +27,203 @@ def space(
 ) -> List[Tuple[str, float]]:
     """Insert spaces into unspaced text.
 
-    :param s: The unspaced text. Must only contain uppercase letters.
-    :param top_n: The number of results to return.
-    :param ws: A WordStatistics object. If None, one will be constructed.
-    :param state_size_limit: The maximum number of states to keep in memory.
+    This finds the exact top_n spacings using a k-best Viterbi search. For each
+    position in the text, the k best partial spacings ending at that position are kept
+    as back-pointers, which are extended by walking the word trie from that position.
+    Words not in the dictionary are scored with the length-scaled floor value, and may
+    be no longer than the longest word in the dictionary.
+
+    :param s: The unspaced text. Characters other than uppercase letters never form
+        part of a dictionary word, so any word containing one is floor scored.
+    :param top_n: The number of results to return. If None, up to state_size_limit
+        results are returned.
+    :param ws: A WordStatistics object. If None, the shared default is used.
+    :param state_size_limit: The number of partial spacings to keep per position when
+        top_n is None.
 
     :return: A list of tuples, where each tuple contains a spaced text and its score.
     """
     if ws is None:
-        ws = WordStatistics()
-
-    type StateList = List[Tuple[float, List[str]]]
-
-    states: StateList = [(0.0, [])]
-
-    for c in s:
-        new_states: StateList = []
-        for score, state in states:
-            if state:
-                new_words = state[:-1] + [state[-1] + c]
-                new_score = (
-                    score
-                    + ws.word_log_prob(state[-1], True)
-                    - ws.word_log_prob(new_words[-1], True)
-                )
-                new_states.append((new_score, new_words))
-            new_states.append((score - ws.word_log_prob(c, True), state + [c]))
-        states = sorted(new_states)[:state_size_limit]
-
-    return [(" ".join(words), score) for score, words in states[:top_n]]
+        ws = word_statistics()
+    k = top_n if top_n is not None else state_size_limit
+    if k <= 0:
+        return []
+    trie = ws.compact_trie()
+    max_word_length = max(trie.max_word_length, 1)
+    floor_costs = [-ws.floor_log_prob(length) for length in range(max_word_length + 1)]
+    codes = [ord(c) - _ORD_A for c in s]
+    n = len(s)
+
+    # candidates[j] collects (cost, i, r) tuples for spacings of s[:j] whose last word
+    # is s[i:j], extending the r-th best spacing of s[:i].
+    candidates: List[List[Tuple[float, int, int]]] = [[] for _ in range(n + 1)]
+    candidates[0].append((0.0, -1, -1))
+    best: List[List[Tuple[float, int, int]]] = []
+    for i in range(n + 1):
+        best.append(heapq.nsmallest(k, candidates[i]))
+        candidates[i] = []
+        if i == n:
+            break
+        prefix_costs = [cost for cost, _, _ in best[i]]
+        node = trie.ROOT
+        for j in range(i + 1, min(n, i + max_word_length) + 1):
+            node = _child(trie, node, codes[j - 1])
+            value = trie.value(node) if node != trie.NO_NODE else None
+            word_cost = floor_costs[j - i] if value is None else -value
+            candidates[j].extend(
+                (prefix_cost + word_cost, i, r)
+                for r, prefix_cost in enumerate(prefix_costs)
+            )
+
+    results = []
+    for cost, i, r in best[n]:
+        words = []
+        j = n
+        while i >= 0:
+            words.append(s[i:j])
+            j = i
+            _, i, r = best[i][r]
+        results.append((" ".join(reversed(words)), cost))
+    return results
+
+
+class _StreamingSpacer:
+    """The state of a streaming Viterbi search for the best spacing of a text.
+
+    Positions are absolute boundaries between characters of the text seen so far.
+    All hypotheses that may still be extended share the spacing up to the committed
+    boundary base, so only the text after base is kept.
+    """
+
+    def __init__(self, ws: WordStatistics, max_window: int):
+        self._trie = ws.compact_trie()
+        self._max_word_length = max(self._trie.max_word_length, 1)
+        self._floor_costs = [
+            -ws.floor_log_prob(length) for length in range(self._max_word_length + 1)
+        ]
+        self._max_window = max(max_window, self._max_word_length)
+        self._reset(0, 0.0, "")
+
+    def _reset(self, base: int, base_cost: float, text: str) -> None:
+        self._base = base
+        self._text: List[str] = []
+        # _costs[p - base] is the cost of the best spacing ending at boundary p, and
+        # _backs[p - base] is the boundary at which the last word of that spacing
+        # starts.
+        self._costs = [base_cost]
+        self._backs = [-1]
+        # The trie node reached by each word that starts at a recent boundary.
+        self._active: List[Tuple[int, int]] = []
+        for c in text:
+            self._advance(c)
+
+    def _advance(self, c: str) -> None:
+        trie = self._trie
+        end = self._base + len(self._text) + 1
+        self._text.append(c)
+        code = ord(c) - _ORD_A
+        self._active = [
+            (start, _child(trie, node, code))
+            for start, node in self._active
+            if end - start <= self._max_word_length
+        ]
+        self._active.append((end - 1, _child(trie, trie.ROOT, code)))
+        best_cost = math.inf
+        best_start = -1
+        for start, node in self._active:
+            value = trie.value(node) if node != trie.NO_NODE else None
+            word_cost = self._floor_costs[end - start] if value is None else -value
+            cost = self._costs[start - self._base] + word_cost
+            if cost < best_cost:
+                best_cost = cost
+                best_start = start
+        self._costs.append(best_cost)
+        self._backs.append(best_start)
+
+    def _common_ancestor(self, a: int, b: int) -> int:
+        while a != b:
+            if a > b:
+                a = self._backs[a - self._base]
+            else:
+                b = self._backs[b - self._base]
+        return a
+
+    def _commit(self, boundary: int) -> List[str]:
+        """Commit the best spacing up to boundary, and return its words."""
+        words = []
+        end = boundary
+        while end > self._base:
+            start = self._backs[end - self._base]
+            words.append("".join(self._text[start - self._base : end - self._base]))
+            end = start
+        words.reverse()
+        offset = boundary - self._base
+        self._base = boundary
+        self._text = self._text[offset:]
+        self._costs = self._costs[offset:]
+        self._backs = self._backs[offset:]
+        self._backs[0] = -1
+        self._active = [(s, n) for s, n in self._active if s >= boundary]
+        return words
+
+    def push(self, c: str) -> List[str]:
+        """Add a character, and return any words that have become committed."""
+        self._advance(c)
+        end = self._base + len(self._text)
+        # Any continuation of the text must extend the best spacing ending at one of
+        # these boundaries, so their common ancestor can be committed.
+        boundary = end
+        for q in range(max(self._base, end + 1 - self._max_word_length), end):
+            boundary = self._common_ancestor(boundary, q)
+        if boundary > self._base:
+            return self._commit(boundary)
+        if len(self._text) <= self._max_window:
+            return []
+        # No agreement within the window, so commit to the current best spacing,
+        # leaving enough uncommitted text for the next word, and rescore the rest.
+        boundary = end
+        while boundary > end + 1 - self._max_word_length:
+            boundary = self._backs[boundary - self._base]
+        text = "".join(self._text[boundary - self._base :])
+        base_cost = self._costs[boundary - self._base]
+        words = self._commit(boundary)
+        self._reset(boundary, base_cost, text)
+        return words
+
+    def finish(self) -> List[str]:
+        """Commit and return the remaining words of the best spacing."""
+        return self._commit(self._base + len(self._text))
+
+
+def space_stream(
+    chunks: Iterable[str],
+    ws: Optional[WordStatistics] = None,
+    max_window: int = 1024,
+) -> Iterator[str]:
+    """Insert spaces into a stream of unspaced text.
+
+    Words are yielded as soon as every hypothesis that may still be extended agrees on
+    them, so arbitrarily long texts can be spaced using a bounded amount of memory.
+    Words are scored as by word_log_prob(word, scale_floor_to_word_length=True), and
+    unless the window limit is reached, the yielded words are the same as the best
+    result of space.
+
+    :param chunks: An iterable of chunks of unspaced text, such as single characters or
+        lines. As for space, words containing non-letters are floor scored.
+    :param ws: A WordStatistics object. If None, the shared default is used.
+    :param max_window: The maximum number of uncommitted characters to keep. If the
+        hypotheses do not agree within this many characters, the current best spacing
+        is committed.
+
+    :return: An iterator of the words of the spaced text.
+    """
+    if ws is None:
+        ws = word_statistics()
+    spacer = _StreamingSpacer(ws, max_window)
+    for chunk in chunks:
+        for c in chunk:
+            yield from spacer.push(c)
+    yield from spacer.finish()
 
 
 def space_with_enumeration(s: str, enumeration: List[int]) -> str:
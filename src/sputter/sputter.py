@@ -7,29 +7,65 @@ from sputter.cipher import (
     substitution_generate_random_key,
     vigenere_decrypt,
 )
-from sputter.coincidence import delta_bar
-from sputter.fitness import QuadgramStatistics, WordStatistics
+from sputter.coincidence import delta_bars
+from sputter.encoded_text import EncodedText
 from sputter.mung import (
     randomly_swap_letters,
     uppercase_and_spaces_only,
     uppercase_only,
 )
-from sputter.optimize import brute_force, simulated_annealing, SimulatedAnnealingConfig
+from sputter.optimize import (
+    MemoizedObjective,
+    brute_force_batch,
+    parallel_simulated_annealing,
+    simulated_annealing,
+    SimulatedAnnealingConfig,
+)
+from sputter.registry import quadgram_statistics, word_statistics
+from sputter.reorder import (
+    EXACT_REORDER_LIMIT,
+    EXACT_REORDER_MAX_TABLE_SIZE,
+    exact_reorder,
+    exact_reorder_table_size,
+    random_ordering,
+    randomly_swap_ngrams,
+    ReorderObjective,
+)
+from sputter.substitution import SubstitutionWordScorer
 import sputter.spacer as spacer
 import sputter.unweaver as unweaver
+import sputter.vigenere as vigenere
 from sputter.word_features import WordFeatureStatistics
 
-import random
+import functools
+import numpy as np
 import rich
 from rich.console import Console
 import typer
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 from typing_extensions import Annotated
 
 
 app = typer.Typer()
 console = Console()
 
+ChainsOption = Annotated[
+    int,
+    typer.Option(
+        "--chains",
+        "-c",
+        help="The number of independent annealing chains to run in parallel.",
+    ),
+]
+MaxSecondsOption = Annotated[
+    Optional[float],
+    typer.Option(
+        "--max-seconds",
+        "-t",
+        help="Stop searching after this many seconds.",
+    ),
+]
+
 
 @app.command()
 def anagram(
@@ -52,7 +88,7 @@ def anagram(
     ] = 5,
 ):
     """Find words that can be formed from the given letters."""
-    ws = WordStatistics()
+    ws = word_statistics()
     with console.status("Searching...") as status:
 
         def progress_callback(words: List[List[str]], score: float) -> None:
@@ -70,6 +106,13 @@ def anagram(
         rich.print(f"{score:8.2f} {words}")
 
 
+@app.command()
+def compile_models():
+    """Compile the built-in language models to memory-mappable binary files."""
+    for model in (quadgram_statistics(), word_statistics()):
+        rich.print(f"Wrote {model.compile()}")
+
+
 @app.command()
 def crack_caesar(
     ciphertext: Annotated[str, typer.Argument(help="The text to decrypt.")],
@@ -79,13 +122,15 @@ def crack_caesar(
     ] = 5,
 ):
     """Crack a ciphertext encrypted with a Caesar cipher."""
-    qs = QuadgramStatistics()
-    ciphertext_no_spaces = uppercase_only(ciphertext)
+    qs = quadgram_statistics()
+    codes = EncodedText.from_str(ciphertext).letter_codes().astype(np.intp)
 
-    def objective(shift):
-        return -qs.string_score(caesar_shift(ciphertext_no_spaces, shift))
+    def batch_objective(shifts: List[int]) -> np.ndarray:
+        if len(codes) < 4:
+            return np.zeros(len(shifts))
+        return -qs.score_letter_codes((codes + np.array(shifts)[:, None]) % 26)
 
-    results = brute_force(objective, range(26), top_n=num_results)
+    results = brute_force_batch(batch_objective, range(26), top_n=num_results)
     for shift, score in results:
         rich.print(f"{score:8.2f} {shift:02} {caesar_shift(ciphertext, shift)}")
 
@@ -97,14 +142,12 @@ def crack_substitution(
         int,
         typer.Option("--num-results", "-n", help="The number of results to return."),
     ] = 5,
+    chains: ChainsOption = 1,
+    max_seconds: MaxSecondsOption = None,
 ):
     """Crack a ciphertext encrypted with a substitution cipher."""
-    ws = WordStatistics()
-
     ciphertext = uppercase_and_spaces_only(ciphertext)
-
-    def objective(key):
-        return -ws.spaced_string_score(substitution_decrypt(ciphertext, key))
+    scorer = SubstitutionWordScorer(ciphertext)
 
     with console.status("Searching...") as status:
 
@@ -113,15 +156,28 @@ def crack_substitution(
         ) -> None:
             status.update(f"{temperature:10.2f} {state} {state_score:6.2f}")
 
-        results = simulated_annealing(
-            objective,
-            substitution_generate_random_key(),
-            randomly_swap_letters,
-            top_n=num_results,
-            config=SimulatedAnnealingConfig(
-                progress_callback=progress_callback,
-            ),
+        config = SimulatedAnnealingConfig(
+            progress_callback=progress_callback, max_seconds=max_seconds
         )
+        if chains > 1:
+            results = parallel_simulated_annealing(
+                scorer,
+                substitution_generate_random_key,
+                randomly_swap_letters,
+                top_n=num_results,
+                config=config,
+                delta_function=scorer.delta,
+                num_chains=chains,
+            )
+        else:
+            results = simulated_annealing(
+                scorer,
+                substitution_generate_random_key(),
+                randomly_swap_letters,
+                top_n=num_results,
+                config=config,
+                delta_function=scorer.delta,
+            )
 
     for key, score in results:
         rich.print(f"{score:8.2f} {key} {substitution_decrypt(ciphertext, key)}")
@@ -139,17 +195,19 @@ def crack_vigenere(
         typer.Option("--num-results", "-n", help="The number of results to return."),
     ] = 5,
 ):
-    """Crack a ciphertext encrypted with a Vigenere cipher."""
-    qs = QuadgramStatistics()
-    ws = WordStatistics()
+    """Crack a ciphertext encrypted with a Vigenere cipher.
 
+    Keys are solved for one letter at a time. Key lengths for which the ciphertext
+    is too short to do so are instead tried with every dictionary word of that length.
+    """
     key_lengths = set()
     if key_length is not None:
         key_lengths.add(key_length)
     else:
         key_length_iocs = []
-        for i in range(2, 16):
-            ioc = delta_bar(ciphertext, i)
+        for i, ioc in zip(
+            range(2, 16), delta_bars(ciphertext, range(2, 16)), strict=True
+        ):
             rich.print(f"Delta bar for key length {i:2}: {ioc}")
             key_length_iocs.append((i, ioc))
         key_length_iocs.sort(key=lambda t: t[1], reverse=True)
@@ -157,12 +215,13 @@ def crack_vigenere(
 
     rich.print(f"Will attempt to decrypt with key lengths: {sorted(key_lengths)}")
 
-    def objective(k):
-        return -qs.string_score(vigenere_decrypt(ciphertext, k))
-
-    with console.status("Brute forcing decryption..."):
-        key_candidates = [w for w in ws.word_frequencies() if len(w) in key_lengths]
-        results = brute_force(objective, key_candidates, top_n=num_results)
+    with console.status("Solving key columns..."):
+        results = vigenere.crack_vigenere(
+            ciphertext,
+            sorted(key_lengths),
+            num_results,
+            candidate_keys=word_statistics().word_frequencies(),
+        )
     for key, score in results[:num_results]:
         rich.print(f"{score:8.2f} {key} {vigenere_decrypt(ciphertext, key)}")
 
@@ -200,26 +259,27 @@ def reorder(
         int,
         typer.Option("--num-results", "-n", help="The number of results to return."),
     ] = 5,
+    chains: ChainsOption = 1,
+    max_seconds: MaxSecondsOption = None,
 ):
-    """Reorder a sequence of ngrams to maximize the likelihood of the resulting text."""
+    """Reorder a sequence of ngrams to maximize the likelihood of the resulting text.
+
+    Without an enumeration, small sets of ngrams are reordered exactly, as long as
+    the tables needed for -n results are small enough. Otherwise,
+    simulated annealing is used.
+    """
     initial_state = tuple(uppercase_only(w) for w in ngrams)
 
     if enumeration:
         enumeration_lengths = [int(i) for i in enumeration.split(" ")]
 
-    qs = QuadgramStatistics()
-    ws = WordStatistics()
-
-    def objective(ns: Tuple[str, ...]) -> float:
-        s = "".join(ns)
-        if enumeration:
-            s = spacer.space_with_enumeration(s, enumeration_lengths)
-            return -ws.spaced_string_score(s)
-        return -qs.string_score(s)
-
-    def randomly_swap_ngrams(ns: Tuple[str, ...]) -> Tuple[str, ...]:
-        i, j = sorted(random.sample(range(len(ns)), 2))
-        return ns[:i] + (ns[j],) + ns[i + 1 : j] + (ns[i],) + ns[j + 1 :]
+    ws = word_statistics()
+    objective: Callable[[Tuple[str, ...]], float] = ReorderObjective(
+        enumeration_lengths if enumeration else None
+    )
+    if len(initial_state) <= 8:
+        # There are few enough orderings that the search revisits them constantly.
+        objective = MemoizedObjective(objective)
 
     with console.status("Searching...") as status:
 
@@ -228,21 +288,39 @@ def reorder(
         ) -> None:
             status.update(f"{temperature:10.2f} {state} {state_score:6.2f}")
 
-        results = simulated_annealing(
-            objective,
-            initial_state,
-            randomly_swap_ngrams,
-            top_n=num_results,
-            config=SimulatedAnnealingConfig(
-                progress_callback=progress_callback,
-            ),
+        config = SimulatedAnnealingConfig(
+            progress_callback=progress_callback, max_seconds=max_seconds
         )
+        if (
+            not enumeration
+            and len(initial_state) <= EXACT_REORDER_LIMIT
+            and exact_reorder_table_size(initial_state, num_results)
+            <= EXACT_REORDER_MAX_TABLE_SIZE
+        ):
+            results = exact_reorder(initial_state, top_n=num_results)
+        elif chains > 1:
+            results = parallel_simulated_annealing(
+                objective,
+                functools.partial(random_ordering, initial_state),
+                randomly_swap_ngrams,
+                top_n=num_results,
+                config=config,
+                num_chains=chains,
+            )
+        else:
+            results = simulated_annealing(
+                objective,
+                initial_state,
+                randomly_swap_ngrams,
+                top_n=num_results,
+                config=config,
+            )
 
     for ns, score in results:
         if enumeration:
             s = spacer.space_with_enumeration("".join(ns), enumeration_lengths)
         else:
-            s = spacer.space("".join(ns), top_n=1)[0][0]
+            s = spacer.space("".join(ns), top_n=1, ws=ws)[0][0]
         rich.print(f"{score:8.2f} {s}")
 
 
@@ -0,0 +1,224 @@
+"""A module for incrementally scoring substitution cipher keys.
+
+Changing a few letters of a substitution key only changes the plaintext at the
+positions where the corresponding ciphertext letters occur. The scorers in this
+module precompute those positions, so that the score change caused by a key change
+(such as swapping two letters) can be computed by rescoring only the affected parts of
+the plaintext.
+
+Keys use the same format as the substitution functions in sputter.cipher: the
+letter at index i of the key is the ciphertext letter for the i-th plaintext letter.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from sputter.encoded_text import encode_key, EncodedText
+from sputter.fitness import QuadgramStatistics, WordStatistics
+from sputter.mung import uppercase_and_spaces_only
+from sputter.registry import quadgram_statistics, word_statistics
+
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_ORD_A = ord("A")
+
+
+def key_from_codes(codes: Sequence[int]) -> str:
+    """Return the substitution key whose letter indices (A is 0) are codes.
+
+    This converts permutations found by sputter.optimize.permutation_annealing
+    back into keys.
+
+    :param codes: A permutation of range(26).
+
+    :return: The key.
+    """
+    return "".join(ALPHABET[c] for c in codes)
+
+
+def _changed_letters(key: str, new_key: str) -> Set[str]:
+    """Return the ciphertext letters that decrypt differently under the two keys."""
+    return {c for k, nk in zip(key, new_key, strict=True) if k != nk for c in (k, nk)}
+
+
+class SubstitutionQuadgramScorer:
+    """Score substitution keys by the quadgram statistics of the decrypted text.
+
+    An instance is a callable objective for use with sputter.optimize, returning the
+    negated quadgram score of the plaintext (lower is better).
+
+    delta keeps the quadgram indices of the plaintext decrypted with the last key it
+    was passed. Annealing passes the same key until a neighbor is accepted, and then
+    passes that neighbor, so the indices only need to be updated at the windows that
+    were rescored, rather than rebuilt for every call.
+    """
+
+    def __init__(self, ciphertext: str, qs: Optional[QuadgramStatistics] = None):
+        """Precompute the quadgram windows affected by each ciphertext letter.
+
+        :param ciphertext: The ciphertext. Non-letter characters are ignored.
+        :param qs: The QuadgramStatistics to use. If None, the shared default is used.
+        """
+        self._qs = qs or quadgram_statistics()
+        self._cipher_codes = (
+            EncodedText.from_str(ciphertext).letter_codes().astype(np.intp)
+        )
+        window_count = max(len(self._cipher_codes) - 3, 0)
+        # window_weights[c, w] is the amount by which the quadgram index of window w
+        # changes when the plaintext letter of ciphertext letter c increases by 1.
+        window_weights = np.zeros((26, window_count), dtype=np.int32)
+        for offset in range(4):
+            np.add.at(
+                window_weights,
+                (
+                    self._cipher_codes[offset : offset + window_count],
+                    np.arange(window_count),
+                ),
+                26 ** (3 - offset),
+            )
+        self._window_weights = window_weights
+        self._swap_windows: Dict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]] = {}
+        self._key: Optional[str] = None
+        self._indices = np.zeros(window_count, dtype=np.intp)
+        self._log_probs = np.zeros(window_count)
+        self._pending: Optional[Tuple[str, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def _plaintext_codes(self, key: str, positions: np.ndarray) -> np.ndarray:
+        inverse_key = np.empty(26, dtype=np.intp)
+        inverse_key[encode_key(key)] = np.arange(26)
+        return inverse_key[self._cipher_codes[positions]]
+
+    def _changed_windows(
+        self, letters: Tuple[int, ...]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the windows containing any of letters, and their weights.
+
+        The results for pairs of letters, which are what a swap changes, are cached.
+
+        :return: The window indices, and a (len(letters), windows) array of the
+            weights of each letter in those windows.
+        """
+        result = self._swap_windows.get(letters)
+        if result is None:
+            weights = self._window_weights[list(letters)]
+            windows = np.flatnonzero(weights.any(axis=0))
+            result = (windows, weights[:, windows])
+            if len(letters) == 2:
+                self._swap_windows[letters] = result
+        return result
+
+    def _set_key(self, key: str) -> None:
+        """Make the cached window indices those of the plaintext for key."""
+        if key == self._key:
+            return
+        if self._pending is not None and self._pending[0] == key:
+            _, windows, indices, log_probs = self._pending
+            self._indices[windows] = indices
+            self._log_probs[windows] = log_probs
+        else:
+            codes = self._plaintext_codes(key, np.arange(len(self._cipher_codes)))
+            self._indices = (
+                (codes[:-3] * 26 + codes[1:-2]) * 26 + codes[2:-1]
+            ) * 26 + codes[3:]
+            self._log_probs = self._qs.quadgram_log_probs()[self._indices]
+        self._key = key
+        self._pending = None
+
+    def __call__(self, key: str) -> float:
+        """Return the negated quadgram score of the ciphertext decrypted with key."""
+        if len(self._cipher_codes) < 4:
+            return 0.0
+        positions = np.arange(len(self._cipher_codes))
+        return -float(
+            self._qs.score_letter_codes(self._plaintext_codes(key, positions))
+        )
+
+    def score_batch(self, keys: np.ndarray) -> np.ndarray:
+        """Return the objective values of many keys at once.
+
+        This is a batch objective for sputter.optimize.permutation_annealing.
+
+        :param keys: A (k, 26) integer array, in which each row holds the letter
+            indices (A is 0) of a key.
+
+        :return: An array of the k negated quadgram scores.
+        """
+        keys = np.asarray(keys)
+        if len(self._cipher_codes) < 4:
+            return np.zeros(len(keys))
+        inverse_keys = np.empty_like(keys)
+        np.put_along_axis(
+            inverse_keys, keys, np.broadcast_to(np.arange(26), keys.shape), axis=1
+        )
+        return -self._qs.score_letter_codes(inverse_keys[:, self._cipher_codes])
+
+    def delta(self, key: str, new_key: str) -> float:
+        """Return the change in objective value when replacing key with new_key.
+
+        Only the quadgrams containing a ciphertext letter whose decryption differs
+        between the two keys are rescored.
+        """
+        changed = sorted(_changed_letters(key, new_key))
+        if not changed or len(self._cipher_codes) < 4:
+            return 0.0
+        self._set_key(key)
+        letters = [ord(c) - _ORD_A for c in changed]
+        letter_changes = [new_key.index(c) - key.index(c) for c in changed]
+        windows, weights = self._changed_windows(tuple(letters))
+        indices = self._indices[windows]
+        for change, letter_weights in zip(letter_changes, weights, strict=True):
+            indices += change * letter_weights
+        log_probs = self._qs.quadgram_log_probs()[indices]
+        self._pending = (new_key, windows, indices, log_probs)
+        return float(self._log_probs[windows].sum() - log_probs.sum())
+
+
+class SubstitutionWordScorer:
+    """Score substitution keys by the word statistics of the decrypted text.
+
+    An instance is a callable objective for use with sputter.optimize, returning the
+    negated word score of the spaced plaintext (lower is better).
+    """
+
+    def __init__(self, ciphertext: str, ws: Optional[WordStatistics] = None):
+        """Precompute the ciphertext words containing each ciphertext letter.
+
+        :param ciphertext: The ciphertext, with spaces between words. Characters other
+            than letters and spaces are ignored.
+        :param ws: The WordStatistics to use. If None, the shared default is used.
+        """
+        self._ws = ws or word_statistics()
+        word_counts = Counter(
+            w for w in uppercase_and_spaces_only(ciphertext).split(" ") if w
+        )
+        self._words = list(word_counts)
+        self._word_counts = [word_counts[w] for w in self._words]
+        self._letter_words: Dict[str, List[int]] = {c: [] for c in ALPHABET}
+        for i, word in enumerate(self._words):
+            for c in set(word):
+                self._letter_words[c].append(i)
+
+    def _score(self, key: str, word_ids: Iterable[int]) -> float:
+        table = str.maketrans(key, ALPHABET)
+        return sum(
+            self._word_counts[i]
+            * self._ws.word_log_prob(self._words[i].translate(table))
+            for i in word_ids
+        )
+
+    def __call__(self, key: str) -> float:
+        """Return the negated word score of the ciphertext decrypted with key."""
+        return -self._score(key, range(len(self._words)))
+
+    def delta(self, key: str, new_key: str) -> float:
+        """Return the change in objective value when replacing key with new_key.
+
+        Only the words containing a ciphertext letter whose decryption differs
+        between the two keys are rescored.
+        """
+        word_ids: Set[int] = set()
+        for c in _changed_letters(key, new_key):
+            word_ids.update(self._letter_words[c])
+        return self._score(key, word_ids) - self._score(new_key, word_ids)
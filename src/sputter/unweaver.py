@@ -3,8 +3,13 @@
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-from sputter.alphabet_trie import AlphabetTrieNode
+import numpy as np
+
 from sputter.fitness import WordStatistics
+from sputter.registry import word_statistics
+
+
+_ORD_A = ord("A")
 
 
 @dataclass
@@ -21,7 +26,22 @@ class Config:
     """The maximum number of states to keep in memory at any given time."""
 
     ws: Optional[WordStatistics] = None
-    """A WordStatistics object. If None, one will be constructed."""
+    """A WordStatistics object. If None, the shared default is used."""
+
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return the indices of the k greatest scores, in descending order of score.
+
+    Ties are broken in favor of lower indices, as a stable sort would.
+    """
+    if len(scores) > k:
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        at = np.flatnonzero(scores == threshold)[: k - len(above)]
+        indices = np.concatenate([above, at])
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.lexsort((indices, -scores[indices]))]
 
 
 def unweave(
@@ -41,75 +61,89 @@ def unweave(
         config = Config()
     ws = config.ws
     if ws is None:
-        ws = WordStatistics()
-    trie = ws.trie()
+        ws = word_statistics()
+    trie = ws.compact_trie()
     max_words = config.max_words
 
-    @dataclass
-    class State:
-        """A state in the search."""
-
-        score: float
-        trie_nodes: List[AlphabetTrieNode]
-        words: List[str]
-
-        def __lt__(self, other: "State") -> bool:
-            return self.score < other.score
-
-        def advance(self, c: str) -> List["State"]:
-            """Return the set of states that may be created by adding a character."""
-            new_states = []
-            for i, (node, word) in enumerate(
-                zip(self.trie_nodes, self.words, strict=True)
-            ):
-                new_node = node.subtrie(c)
-                if new_node is not None:
-                    node_score = node.value or node.max_descendant_value
-                    new_node_score = new_node.value or new_node.max_descendant_value
-                    assert node_score is not None
-                    assert new_node_score is not None
-                    new_nodes = (
-                        self.trie_nodes[:i] + [new_node] + self.trie_nodes[i + 1 :]
-                    )
-                    new_words = self.words[:i] + [word + c] + self.words[i + 1 :]
-                    new_score = self.score - node_score + new_node_score
-                    new_states.append(State(new_score, new_nodes, new_words))
-            if not max_words or len(self.trie_nodes) < max_words:
-                new_node = trie.subtrie(c)
-                if new_node is not None:
-                    new_node_score = new_node.value or new_node.max_descendant_value
-                    assert new_node_score is not None
-                    new_score = self.score + new_node_score
-                    new_states.append(
-                        State(
-                            new_score,
-                            self.trie_nodes + [new_node],
-                            self.words + [c],
-                        )
-                    )
-            return new_states
-
-        def is_complete(self) -> bool:
-            """Return True if this state is complete."""
-            return all(node.value is not None for node in self.trie_nodes)
-
-    states: List[State] = [State(0.0, [], [])]
+    # The score of a node is the value of its word if it is complete, or otherwise the
+    # best value of any word it may still become. Each array has an extra entry at the
+    # end, so that indexing with -1 (no node) is valid.
+    node_scores = np.append(
+        np.where(np.isnan(trie.values), trie.max_descendant_values, trie.values), 0.0
+    )
+    node_completes = np.append(~np.isnan(trie.values), True)
+    # Each node is assigned a random hash, and the hash of a state is the sum of the
+    # hashes of its nodes, which identifies the multiset of its partial words
+    # regardless of their order.
+    node_hashes = np.append(
+        np.random.default_rng(0).integers(
+            0, np.iinfo(np.uint64).max, size=len(trie), dtype=np.uint64
+        ),
+        np.uint64(0),
+    )
+
+    # Row i of nodes holds the trie node ids of the partial words of state i, in the
+    # order in which the words were started, padded with -1.
+    nodes = np.zeros((1, 0), dtype=np.int32)
+    word_counts = np.zeros(1, dtype=np.intp)
+    scores = np.zeros(1)
+    hashes = np.zeros(1, dtype=np.uint64)
     for c in s:
-        new_states: List[State] = []
-        word_sets = set()
-        for state in states:
-            for new_state in state.advance(c):
-                word_set = tuple(sorted(new_state.words))
-                if word_set not in word_sets:
-                    word_sets.add(word_set)
-                    new_states.append(new_state)
-        states = sorted(new_states, reverse=True)[: config.state_size_limit]
-    states = [
-        state
-        for state in states
-        if state.is_complete()
-        and (not config.min_words or len(state.words) >= config.min_words)
-    ]
-    if top_n:
-        states = states[:top_n]
-    return [(state.words, -state.score) for state in states]
+        children = np.append(trie.children[:, ord(c) - _ORD_A], trie.NO_NODE)
+        state_count, width = nodes.shape
+        root_child = children[trie.ROOT]
+
+        # Candidate j of state i either extends word j, or (for j == width) starts a
+        # new word. Candidates are considered in state order, then word order.
+        old_nodes = np.concatenate(
+            [nodes, np.full((state_count, 1), trie.NO_NODE, dtype=np.int32)], axis=1
+        )
+        new_nodes = np.concatenate(
+            [children[nodes], np.full((state_count, 1), root_child, dtype=np.int32)],
+            axis=1,
+        )
+        valid = new_nodes != trie.NO_NODE
+        if max_words:
+            valid[:, width] &= word_counts < max_words
+        candidates = np.flatnonzero(valid)
+        parents, slots = np.divmod(candidates, width + 1)
+        old_nodes = old_nodes.ravel()[candidates]
+        new_nodes = new_nodes.ravel()[candidates]
+        candidate_scores = scores[parents] - node_scores[old_nodes]
+        candidate_scores += node_scores[new_nodes]
+        candidate_hashes = hashes[parents] - node_hashes[old_nodes]
+        candidate_hashes += node_hashes[new_nodes]
+
+        # Keep the first candidate with each multiset of words, and then the best
+        # state_size_limit of those.
+        _, firsts = np.unique(candidate_hashes, return_index=True)
+        firsts.sort()
+        selected = firsts[
+            _top_indices(candidate_scores[firsts], config.state_size_limit)
+        ]
+
+        parents = parents[selected]
+        starts_word = slots[selected] == width
+        slots = np.where(starts_word, word_counts[parents], slots[selected])
+        word_counts = word_counts[parents] + starts_word
+        new_width = int(word_counts.max(initial=0))
+        kept_width = min(width, new_width)
+        nodes_selected = np.full(
+            (len(selected), new_width), trie.NO_NODE, dtype=np.int32
+        )
+        nodes_selected[:, :kept_width] = nodes[parents, :kept_width]
+        nodes_selected[np.arange(len(selected)), slots] = new_nodes[selected]
+        nodes = nodes_selected
+        scores = candidate_scores[selected]
+        hashes = candidate_hashes[selected]
+
+    results = []
+    complete = node_completes[nodes].all(axis=1)
+    if config.min_words:
+        complete &= word_counts >= config.min_words
+    for i in np.flatnonzero(complete):
+        words = [trie.word(int(node)) for node in nodes[i, : word_counts[i]]]
+        results.append((words, -float(scores[i])))
+        if top_n and len(results) >= top_n:
+            break
+    return results
@@ -0,0 +1,212 @@
+"""A module for cracking Vigenere ciphers one key letter at a time.
+
+For a key of length p, every p-th letter of the ciphertext is encrypted with the same
+Caesar shift. Each of these p columns can be solved independently, by correlating
+its letter counts with the letter frequencies of the language under all 26 shifts.
+This costs 26 * p cheap evaluations, independent of the length of the ciphertext
+and of any dictionary, and usually recovers most of the key. The key is then
+polished by coordinate ascent on the quadgram score of the full plaintext, which
+fixes the columns that are too short for frequency analysis alone.
+
+When the columns are very short, even the ascent finds keys that fit the few
+letters better than the real key does. For such texts, crack_vigenere can instead
+score a list of candidate keys, such as dictionary words.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sputter.encoded_text import encode_key, EncodedText
+from sputter.fitness import QuadgramStatistics
+from sputter.optimize import brute_force_batch, TopN
+from sputter.registry import quadgram_statistics
+
+_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_KEY_LETTER_COST = math.log(26)
+
+MIN_COLUMN_LENGTH = 12
+"""The fewest letters per key letter for which crack_vigenere solves for the key
+rather than scoring its candidate keys."""
+
+
+def _key_from_shifts(shifts: np.ndarray) -> str:
+    return "".join(_ALPHABET[s] for s in shifts)
+
+
+class VigenereSolver:
+    """Recover Vigenere keys of given lengths for a fixed ciphertext."""
+
+    def __init__(self, ciphertext: str, qs: Optional[QuadgramStatistics] = None):
+        """Encode the ciphertext.
+
+        :param ciphertext: The ciphertext. Only letters are decrypted, and the other
+            characters are passed through as in sputter.cipher.vigenere_decrypt.
+        :param qs: The QuadgramStatistics to use. If None, the shared default is used.
+        """
+        self._qs = qs or quadgram_statistics()
+        self._text = EncodedText.from_str(ciphertext)
+        self._letter_codes = self._text.letter_codes().astype(np.intp)
+
+    @property
+    def num_letters(self) -> int:
+        """The number of letters in the ciphertext."""
+        return len(self._letter_codes)
+
+    def column_scores(self, period: int) -> np.ndarray:
+        """Score every shift of every column by frequency correlation.
+
+        :param period: The key length.
+
+        :return: A (period, 26) array, in which entry (i, s) is the log likelihood of
+            the letters of column i decrypted with shift s under the single letter
+            frequencies of the language. Higher is better.
+        """
+        columns = np.arange(len(self._letter_codes)) % period
+        counts = np.bincount(
+            columns * 26 + self._letter_codes, minlength=period * 26
+        ).reshape(period, 26)
+        # Decrypting with shift s turns plaintext letter c into ciphertext letter c + s.
+        shifted = (np.arange(26)[:, None] + np.arange(26)) % 26
+        return counts[:, shifted] @ self._qs.letter_log_probs()
+
+    def score_shifts(self, shifts: np.ndarray) -> np.ndarray:
+        """Score many keys by the quadgram statistics of the plaintext.
+
+        :param shifts: A (k, period) integer array, in which each row holds the letter
+            indices (A is 0) of a key.
+
+        :return: An array of the k negated quadgram scores. Lower is better.
+        """
+        shifts = np.asarray(shifts, dtype=np.intp)
+        if len(self._text) < 4:
+            return np.zeros(len(shifts))
+        key_indices = np.arange(len(self._letter_codes)) % shifts.shape[1]
+        plaintexts = np.full((len(shifts), len(self._text)), 26, dtype=np.intp)
+        plaintexts[:, self._text.letters] = (
+            self._letter_codes - shifts[:, key_indices]
+        ) % 26
+        return -self._qs.score_letter_codes(plaintexts)
+
+    def score_keys(self, keys: Sequence[str]) -> np.ndarray:
+        """Score many keys of one length by the quadgram statistics of the plaintext.
+
+        :param keys: The keys. These must only contain letters.
+
+        :return: An array of the negated quadgram scores, one for each key. Lower is
+            better.
+        """
+        if not keys:
+            return np.zeros(0)
+        return self.score_shifts(np.stack([encode_key(key) for key in keys]))
+
+    def _ascend(self, shifts: np.ndarray, top: TopN[str]) -> Tuple[np.ndarray, float]:
+        period = len(shifts)
+        score = float(self.score_shifts(shifts[None, :])[0])
+        top.add(_key_from_shifts(shifts), score)
+        columns = np.repeat(np.arange(period), 26)
+        letters = np.tile(np.arange(26), period)
+        while True:
+            candidates = np.repeat(shifts[None, :], 26 * period, axis=0)
+            candidates[np.arange(26 * period), columns] = letters
+            scores = self.score_shifts(candidates)
+            if top.n is not None:
+                scores_kept = np.argsort(scores, kind="stable")[: top.n]
+            else:
+                scores_kept = np.arange(len(scores))
+            for i in scores_kept:
+                top.add(_key_from_shifts(candidates[i]), float(scores[i]))
+            best = int(scores.argmin())
+            if scores[best] >= score:
+                return shifts, score
+            shifts, score = candidates[best], float(scores[best])
+
+    def solve(
+        self,
+        period: int,
+        top_n: int = 10,
+        initial_keys: Sequence[str] = (),
+    ) -> List[Tuple[str, float]]:
+        """Find the best keys of one length.
+
+        Starting from the key found by frequency correlation, every change of a
+        single key letter is scored in one batch, and the best change is applied.
+        This repeats until no change improves the key. Applying only the best change
+        of each pass keeps a wrong key letter from dragging its neighbors along.
+
+        :param period: The key length.
+        :param top_n: The number of keys to return.
+        :param initial_keys: Additional keys of length period to start the ascent
+            from.
+
+        :return: A list of tuples of the form (key, score), sorted by score in
+            ascending order, where score is the negated quadgram score of the
+            plaintext.
+        """
+        top: TopN[str] = TopN(top_n)
+        self._ascend(self.column_scores(period).argmax(axis=1), top)
+        for key in initial_keys:
+            self._ascend(encode_key(key).astype(np.intp), top)
+        return top.results()
+
+
+def crack_vigenere(
+    ciphertext: str,
+    periods: Iterable[int],
+    top_n: int = 10,
+    qs: Optional[QuadgramStatistics] = None,
+    candidate_keys: Iterable[str] = (),
+) -> List[Tuple[str, float]]:
+    """Find the most likely keys for a Vigenere ciphertext.
+
+    A longer key can always fit the plaintext statistics at least as well as a
+    shorter one (a repeated key of the shorter length is one of its options), so
+    keys of different lengths are compared after adding the cost of describing the
+    key, len(key) * ln(26), to the score of each. A key whose length is a multiple
+    of another tried length is also searched for starting from the best key of that
+    length, repeated.
+
+    If the ciphertext has fewer than MIN_COLUMN_LENGTH letters per key letter, and
+    there are candidate keys of that length, those candidates are scored instead of
+    solving for the key.
+
+    :param ciphertext: The ciphertext.
+    :param periods: The key lengths to try.
+    :param top_n: The number of keys to return.
+    :param qs: The QuadgramStatistics to use. If None, the shared default is used.
+    :param candidate_keys: Keys to score for key lengths that are too long for the
+        ciphertext, such as the words of a dictionary. Keys containing non-letters
+        are ignored.
+
+    :return: A list of tuples of the form (key, score), sorted by score in ascending
+        order, where score is the negated quadgram score of the plaintext plus the
+        cost of describing the key.
+    """
+    solver = VigenereSolver(ciphertext, qs)
+    periods = sorted(set(periods))
+    short_periods = {
+        period for period in periods if solver.num_letters < MIN_COLUMN_LENGTH * period
+    }
+    candidates: Dict[int, List[str]] = {period: [] for period in short_periods}
+    if short_periods:
+        for key in candidate_keys:
+            if len(key) in candidates and key.isascii() and key.isalpha():
+                candidates[len(key)].append(key.upper())
+
+    top: TopN[str] = TopN(top_n)
+    best_keys: Dict[int, str] = {}
+    for period in periods:
+        if candidates.get(period):
+            results = brute_force_batch(solver.score_keys, candidates[period], top_n)
+        else:
+            initial_keys = [
+                key * (period // len(key))
+                for length, key in best_keys.items()
+                if period % length == 0
+            ]
+            results = solver.solve(period, top_n, initial_keys)
+        if results:
+            best_keys[period] = results[0][0]
+        top.update((key, score + period * _KEY_LETTER_COST) for key, score in results)
+    return top.results()
@@ -3,17 +3,22 @@
 Inspired by https://github.com/rdeits/Collective.jl.
 """
 
-from collections import defaultdict
 from dataclasses import dataclass
-import json
+import functools
+import hashlib
 import logging
 import math
 import os
 import os.path
 import platformdirs
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
+
+from sputter.encoded_text import encode_letters
 from sputter.fitness import WordStatistics
+from sputter.model_file import compiled_model_path, read_model_file, write_model_file
+from sputter.registry import word_statistics
 
 
 logger = logging.getLogger(__name__)
@@ -224,6 +229,109 @@ class WordFeaturePrecomputes:
         return self.word_letter_counts[ord(letter) - WordFeaturePrecomputes.__ORD_A]
 
 
+def _letter_indices(letters: Set[str]) -> np.ndarray:
+    return np.array(sorted(ord(c) - ord("A") for c in letters), dtype=np.intp)
+
+
+class WordListPrecomputes:
+    """Precomputes for evaluating word features over many words at once.
+
+    Each array has one row per word, so that a feature can be evaluated for every
+    word with a few array operations. Quantities shared by several features are
+    computed on first use and then reused.
+    """
+
+    words: List[str]
+    """The words. These must only contain uppercase letters."""
+
+    codes: np.ndarray
+    """A (words, max word length) uint8 array of letter indices, where A is 0.
+    Positions past the end of a word hold 26."""
+
+    letter_counts: np.ndarray
+    """A (words, 26) array of letter counts, where column 0 is A, 1 is B, etc."""
+
+    def __init__(self, words: Sequence[str]):
+        """Precompute the letter indices and letter counts of the words.
+
+        :param words: The words. These must only contain uppercase letters.
+
+        :raises ValueError: If a word contains any character other than A to Z.
+        """
+        self.words = list(words)
+        lengths = np.array([len(word) for word in self.words], dtype=np.intp)
+        rows = np.repeat(np.arange(len(self.words)), lengths)
+        columns = np.arange(len(rows)) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        letters = encode_letters("".join(self.words))
+        invalid = np.flatnonzero(letters == 26)
+        if len(invalid):
+            word = self.words[rows[invalid[0]]]
+            raise ValueError(f"Word {word!r} contains characters other than A to Z.")
+        self.codes = np.full(
+            (len(self.words), int(lengths.max(initial=0))), 26, dtype=np.uint8
+        )
+        self.codes[rows, columns] = letters
+        self.letter_counts = np.bincount(
+            rows * 26 + letters, minlength=len(self.words) * 26
+        ).reshape(-1, 26)
+        self._substring_counts: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    @functools.cached_property
+    def letter_bank(self) -> np.ndarray:
+        """A (words, 26) bool array that is True for each letter in each word."""
+        return self.letter_counts > 0
+
+    @functools.cached_property
+    def alternates_vowel_consonant(self) -> np.ndarray:
+        """A bool array that is True for each word alternating vowels and consonants."""
+        is_vowel = np.isin(self.codes, _letter_indices(VOWELS))
+        changes = is_vowel[:, 1:] != is_vowel[:, :-1]
+        return (changes | (self.codes[:, 1:] == 26)).all(axis=1)
+
+    @functools.cached_property
+    def double_letter_counts(self) -> np.ndarray:
+        """The number of pairs of equal adjacent letters in each word."""
+        doubles = (self.codes[:, 1:] == self.codes[:, :-1]) & (self.codes[:, 1:] < 26)
+        return doubles.sum(axis=1)
+
+    @functools.cached_property
+    def bigram_presence(self) -> np.ndarray:
+        """A (words, 677) bool array that is True for each bigram in each word.
+
+        Column 26 * i + j is the bigram of letters i and j. Column 676 is unused.
+        """
+        bigrams = self.codes[:, :-1].astype(np.intp) * 26 + self.codes[:, 1:]
+        bigrams[(self.codes[:, :-1] == 26) | (self.codes[:, 1:] == 26)] = 26 * 26
+        presence = np.zeros((len(self.words), 26 * 26 + 1), dtype=bool)
+        presence[np.arange(len(self.words))[:, None], bigrams] = True
+        return presence
+
+    def substring_counts(self, substrings: Sequence[str]) -> np.ndarray:
+        """Return the number of the substrings that appear in each word.
+
+        :param substrings: The distinct substrings to look for. Substrings of one or
+            two letters are looked up in the letter bank or the bigram presence
+            array. Longer substrings are searched for in each word.
+
+        :return: An array holding the number of the substrings in each word.
+        """
+        key = tuple(substrings)
+        if key not in self._substring_counts:
+            counts = np.zeros(len(self.words), dtype=np.intp)
+            for s in substrings:
+                if len(s) == 1:
+                    counts += self.letter_bank[:, ord(s) - ord("A")]
+                elif len(s) == 2:
+                    bigram = (ord(s[0]) - ord("A")) * 26 + ord(s[1]) - ord("A")
+                    counts += self.bigram_presence[:, bigram]
+                else:
+                    counts += np.array([s in word for word in self.words], dtype=bool)
+            self._substring_counts[key] = counts
+        return self._substring_counts[key]
+
+
 class WordFeature:
     """A base class for detecting an interesting feature of a word."""
 
@@ -234,6 +342,17 @@ class WordFeature:
         """Return true iff the word has this feature."""
         raise NotImplementedError
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        """Return a bool array that is True for each word that has this feature.
+
+        Subclasses should override this with a vectorized implementation. The default
+        calls evaluate for each word.
+        """
+        return np.array(
+            [self.evaluate(WordFeaturePrecomputes(word)) for word in precomputes.words],
+            dtype=bool,
+        )
+
 
 @dataclass(frozen=True)
 class LetterCountFeature(WordFeature):
@@ -254,6 +373,10 @@ class LetterCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"at least {self.min_count} occurrences of {self.letter}"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        column = ord(self.letter) - ord("A")
+        return precomputes.letter_counts[:, column] >= self.min_count
+
 
 @dataclass(frozen=True)
 class RepeatedLetterFeature(WordFeature):
@@ -277,6 +400,10 @@ class RepeatedLetterFeature(WordFeature):
     def __repr__(self) -> str:
         return f"at least {self.min_letter_count} letters repeated at least {self.min_repeat_count} times each"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        repeated = precomputes.letter_counts >= self.min_repeat_count
+        return repeated.sum(axis=1) >= self.min_letter_count
+
 
 @dataclass(frozen=True)
 class UniqueLetterCountFeature(WordFeature):
@@ -294,6 +421,9 @@ class UniqueLetterCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"exactly {self.count} unique letters"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        return precomputes.letter_bank.sum(axis=1) == self.count
+
 
 @dataclass(frozen=True)
 class UniqueVowelCountFeature(WordFeature):
@@ -311,6 +441,10 @@ class UniqueVowelCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"exactly {self.count} unique vowels"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        vowels = precomputes.letter_bank[:, _letter_indices(VOWELS)]
+        return vowels.sum(axis=1) == self.count
+
 
 @dataclass(frozen=True)
 class UniqueConsonantCountFeature(WordFeature):
@@ -328,6 +462,10 @@ class UniqueConsonantCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"exactly {self.count} unique consonants"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        consonants = precomputes.letter_bank[:, _letter_indices(CONSONANTS)]
+        return consonants.sum(axis=1) == self.count
+
 
 @dataclass(frozen=True)
 class AlternatesVowelConsonantFeature(WordFeature):
@@ -350,6 +488,9 @@ class AlternatesVowelConsonantFeature(WordFeature):
     def __repr__(self) -> str:
         return "alternates between vowels and consonants"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        return precomputes.alternates_vowel_consonant
+
 
 @dataclass(frozen=True)
 class DoubleLettersFeature(WordFeature):
@@ -374,6 +515,9 @@ class DoubleLettersFeature(WordFeature):
     def __repr__(self) -> str:
         return f"exactly {self.count} pairs of double letters"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        return precomputes.double_letter_counts == self.count
+
 
 @dataclass(frozen=True)
 class CardinalDirectionsCountFeature(WordFeature):
@@ -394,6 +538,10 @@ class CardinalDirectionsCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"at least {self.min_count} cardinal directions"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        counts = precomputes.letter_counts[:, _letter_indices(CARDINAL_DIRECTIONS)]
+        return counts.sum(axis=1) >= self.min_count
+
 
 @dataclass(frozen=True)
 class ChemicalElementSymbolCountFeature(WordFeature):
@@ -415,6 +563,10 @@ class ChemicalElementSymbolCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"at least {self.min_count} unique chemical element symbols"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        counts = precomputes.substring_counts(CHEMICAL_ELEMENT_SYMBOLS)
+        return counts >= self.min_count
+
 
 @dataclass(frozen=True)
 class StateAbbreviationCountFeature(WordFeature):
@@ -436,12 +588,19 @@ class StateAbbreviationCountFeature(WordFeature):
     def __repr__(self) -> str:
         return f"at least {self.min_count} unique US state abbreviations"
 
+    def evaluate_many(self, precomputes: WordListPrecomputes) -> np.ndarray:
+        return precomputes.substring_counts(STATE_ABBREVIATIONS) >= self.min_count
+
 
 ALL_FEATURES: List[WordFeature] = [
     AlternatesVowelConsonantFeature(),
 ]
 ALL_FEATURES.extend(
-    [LetterCountFeature(letter, count) for letter in ALPHABET for count in range(1, 5)]
+    [
+        LetterCountFeature(letter, count)
+        for letter in sorted(ALPHABET)
+        for count in range(1, 5)
+    ]
 )
 ALL_FEATURES.extend(
     [
@@ -477,59 +636,177 @@ class WordFeatureResult:
     """The log probability of the feature evaluating true for the set of words."""
 
 
+@dataclass
+class WordFeatureMatrix:
+    """Which of a list of words have each of a list of word features."""
+
+    features: List[WordFeature]
+    """The word features, one for each row."""
+
+    words: List[str]
+    """The words, one for each column."""
+
+    bits: np.ndarray
+    """A (features, ceil(words / 8)) uint8 array holding the bool feature by word
+    matrix, packed along the word axis by np.packbits."""
+
+    @classmethod
+    def evaluate(
+        cls, features: Sequence[WordFeature], words: Sequence[str]
+    ) -> "WordFeatureMatrix":
+        """Evaluate every feature for every word.
+
+        :param features: The word features to evaluate.
+        :param words: The words to evaluate. These must only contain uppercase
+            letters.
+
+        :return: The feature matrix.
+        """
+        precomputes = WordListPrecomputes(words)
+        matrix = np.empty((len(features), len(precomputes.words)), dtype=bool)
+        for i, feature in enumerate(features):
+            matrix[i] = feature.evaluate_many(precomputes)
+        return cls(list(features), precomputes.words, np.packbits(matrix, axis=1))
+
+    def to_array(self) -> np.ndarray:
+        """Return the unpacked (features, words) bool matrix."""
+        return np.unpackbits(self.bits, axis=1, count=len(self.words)).view(bool)
+
+    def weighted_counts(self, weights: Sequence[float]) -> np.ndarray:
+        """Return the total weight of the words that have each feature.
+
+        :param weights: The weight of each word, such as its frequency.
+
+        :return: An array holding the sum of the weights of the words with each
+            feature.
+        """
+        return self.to_array() @ np.asarray(weights, dtype=float)
+
+
+_LEGACY_CACHE_FILENAME = "word_feature_log_prob.json"
+
+
+def _remove_legacy_cache() -> None:
+    """Remove the JSON cache written by earlier versions, which is no longer read."""
+    path = os.path.join(
+        platformdirs.user_cache_dir(appname="sputter"), _LEGACY_CACHE_FILENAME
+    )
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to remove legacy word feature cache: {e}")
+
+
+def _feature_cache_source(
+    word_frequencies: Dict[str, int], features: Sequence[WordFeature]
+) -> bytes:
+    """Return bytes identifying a corpus and a list of feature definitions."""
+    parts = [
+        "\n".join(word_frequencies).encode("ascii"),
+        np.array(list(word_frequencies.values()), dtype=np.int64).tobytes(),
+        "\n".join(f"{type(ft).__qualname__} {ft!r}" for ft in features).encode(),
+    ]
+    return b"".join(hashlib.sha256(part).digest() for part in parts)
+
+
 class WordFeatureStatistics:
     """A class for computing statistics about word features."""
 
     def __init__(self, ws: Optional[WordStatistics] = None):
         """Initialize a set of word feature statistics based on word frequencies.
 
-        :param ws: The WordStatistics to use. If None, a new WordStatistics will be
-            created.
-        """
-        self._ws = ws or WordStatistics()
+        The first time the statistics are computed for a given corpus and set of
+        features, they are written to a binary cache file in the user cache
+        directory, along with the feature by word matrix of the corpus. The file is
+        keyed by a hash of the corpus and the feature definitions, so a change to
+        either is never served stale results.
 
-        feature_log_prob_json_path = os.path.join(
-            platformdirs.user_cache_dir(appname="sputter"),
-            "word_feature_log_prob.json",
+        :param ws: The WordStatistics to use. If None, the shared default
+            WordStatistics is used.
+        """
+        self._ws = ws or word_statistics()
+        word_frequencies = self._ws.word_frequencies()
+        words = list(word_frequencies)
+        self._compiled_path = compiled_model_path(
+            "word_features", _feature_cache_source(word_frequencies, ALL_FEATURES)
         )
+        feature_names = [repr(ft) for ft in ALL_FEATURES]
+
         try:
-            if os.path.exists(feature_log_prob_json_path):
-                with open(feature_log_prob_json_path, "r") as f:
-                    feature_log_prob_json = json.load(f)
-                if {repr(ft) for ft in ALL_FEATURES} == set(
-                    feature_log_prob_json.keys()
-                ):
-                    self._feature_log_prob = {}
-                    for ft in ALL_FEATURES:
-                        self._feature_log_prob[ft] = feature_log_prob_json[repr(ft)]
-                    return
+            model = read_model_file(self._compiled_path)
+            if model.metadata.get("kind") != "word_features":
+                raise ValueError(
+                    f"{self._compiled_path} does not contain word feature statistics."
+                )
+            if model.metadata.get("features") != feature_names:
+                raise ValueError(f"{self._compiled_path} has different features.")
+            self._feature_log_prob = dict(
+                zip(ALL_FEATURES, model.arrays["log_probs"].tolist(), strict=True)
+            )
+            self._feature_matrix = WordFeatureMatrix(
+                list(ALL_FEATURES), words, model.arrays["feature_bits"]
+            )
+            return
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logger.warning(f"Failed to read feature log probabilities cache: {e}")
+            logger.warning(f"Failed to read word feature statistics cache: {e}")
 
         logger.info("Computing word feature log probabilities...")
 
-        feature_count: Dict[WordFeature, int] = defaultdict(int)
-
-        for word, freq in self._ws.word_frequencies().items():
-            precomputes = WordFeaturePrecomputes(word)
-            for feature in ALL_FEATURES:
-                if feature.evaluate(precomputes):
-                    feature_count[feature] += freq
+        self._feature_matrix = WordFeatureMatrix.evaluate(ALL_FEATURES, words)
+        feature_counts = self._feature_matrix.weighted_counts(
+            list(word_frequencies.values())
+        )
 
         word_frequency_total = self._ws.word_frequency_total()
         self._feature_log_prob = {
-            feature: math.log(feature_count.get(feature, 0.01) / word_frequency_total)
-            for feature in ALL_FEATURES
+            feature: math.log((count or 0.01) / word_frequency_total)
+            for feature, count in zip(
+                ALL_FEATURES, feature_counts.tolist(), strict=True
+            )
         }
 
         try:
-            os.makedirs(os.path.dirname(feature_log_prob_json_path), exist_ok=True)
-            with open(feature_log_prob_json_path, "w") as f:
-                json.dump(
-                    {repr(ft): lp for ft, lp in self._feature_log_prob.items()}, f
-                )
+            self.compile()
         except Exception as e:
-            logger.warning(f"Failed to cache feature log probabilities: {e}")
+            logger.warning(f"Failed to cache word feature statistics: {e}")
+        _remove_legacy_cache()
+
+    def compile(self, path: Optional[str] = None) -> str:
+        """Write these statistics to a binary cache file.
+
+        :param path: The path to write to. If None, the default cache path for the
+            corpus and features these statistics were computed from is used.
+
+        :return: The path of the written file.
+        """
+        path = path or self._compiled_path
+        write_model_file(
+            path,
+            {
+                "log_probs": np.array(
+                    list(self._feature_log_prob.values()), dtype=np.float64
+                ),
+                "feature_bits": self._feature_matrix.bits,
+            },
+            {
+                "kind": "word_features",
+                "features": [repr(ft) for ft in self._feature_log_prob],
+                "word_count": len(self._feature_matrix.words),
+            },
+        )
+        return path
+
+    def feature_matrix(self) -> WordFeatureMatrix:
+        """Return the matrix of which corpus words have each feature.
+
+        :return: The WordFeatureMatrix of all features over the words of the
+            corpus, in the order of WordStatistics.word_frequencies.
+        """
+        return self._feature_matrix
 
     def evaluate_words(
         self, words: List[str], top_n: Optional[int] = 10
@@ -543,11 +820,14 @@ class WordFeatureStatistics:
         :return: A list of WordFeatureResults, one for each word feature. The list is
             sorted by log probability, from least likely to most likely.
         """
-        precomputes = [WordFeaturePrecomputes(word) for word in words]
+        matrix = WordFeatureMatrix.evaluate(
+            list(self._feature_log_prob), words
+        ).to_array()
         results = []
-        for feature, feature_log_prob in self._feature_log_prob.items():
-            evals = [feature.evaluate(precompute) for precompute in precomputes]
-            if any(evals):
+        for (feature, feature_log_prob), evals in zip(
+            self._feature_log_prob.items(), matrix, strict=True
+        ):
+            if evals.any():
                 satisfied_words = [
                     word for word, e in zip(words, evals, strict=True) if e
                 ]
@@ -0,0 +1,25 @@
+"""Shared pytest fixtures."""
+
+import platformdirs
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_cache_dir(tmp_path_factory):
+    """Redirect the sputter cache directory to a temporary directory.
+
+    Every test uses this, so compiled models (including the built-in ones) are
+    written there rather than to the user's cache. XDG_CACHE_HOME is also set, so
+    that worker processes started without fork use the same directory. The
+    directory is shared by the whole session, so the built-in models are only
+    compiled once.
+    """
+    cache_dir = tmp_path_factory.mktemp("cache")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("XDG_CACHE_HOME", str(cache_dir))
+        monkeypatch.setattr(
+            platformdirs,
+            "user_cache_dir",
+            lambda appname=None, *args, **kwargs: str(cache_dir / (appname or "")),
+        )
+        yield cache_dir
@@ -47,3 +47,35 @@ class AlphabetTrieTestCase(unittest.TestCase):
         assert node.subtrie("H").min_descendant_value == 3.0
         assert node.subtrie("H").max_descendant_value == 3.0
         assert node.subtrie("HREE").value == 3.0
+
+    def test_compact_alphabet_trie(self):
+        """Tests the CompactAlphabetTrie class."""
+        trie = alphabet_trie.CompactAlphabetTrie(
+            ["TWO", "ONE", "THREE", "TO"], [2.0, 1.0, 3.0, 4.0]
+        )
+        root = trie.root()
+        assert root.value is None
+        assert root.min_descendant_value == 1.0
+        assert root.max_descendant_value == 4.0
+        assert root.subtrie("ONE").value == 1.0
+        assert root.subtrie("ONES") is None
+        assert root.subtrie("X") is None
+
+        node = root.subtrie("T")
+        assert isinstance(node, alphabet_trie.CompactAlphabetTrieNode)
+        assert node.value is None
+        assert node.min_descendant_value == 2.0
+        assert node.max_descendant_value == 4.0
+        assert node.subtrie("O").value == 4.0
+        assert node.subtrie("O").max_descendant_value == 4.0
+        assert node.subtrie("WO").value == 2.0
+        assert node.subtrie("H").max_descendant_value == 3.0
+        assert node.subtrie("HREE").value == 3.0
+        assert node == root.subtrie("T")
+
+        index = trie.find("THR")
+        assert trie.word(index) == "THR"
+        assert trie.child(index, ord("E") - ord("A")) == trie.find("THRE")
+        assert trie.child(index, ord("X") - ord("A")) == trie.NO_NODE
+        assert trie.find("THX") == trie.NO_NODE
+        assert len(trie) == 12
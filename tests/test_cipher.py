@@ -2,6 +2,8 @@
 
 import unittest
 
+import numpy as np
+
 from sputter import cipher
 
 
@@ -32,3 +34,48 @@ class CipherTestCase(unittest.TestCase):
         assert len(set(key)) == 26
         ciphertext = cipher.substitution_encrypt("FLEE AT ONCE", key)
         assert cipher.substitution_decrypt(ciphertext, key) == "FLEE AT ONCE"
+
+    def test_non_letters(self):
+        """Test that non-letters are passed through without consuming the key."""
+        assert cipher.vigenere_encrypt("a-b, c!", "BC") == "B-D, D!"
+        assert cipher.caesar_shift("it's 9", 1) == "JU'T 9"
+        key = "ZYXWVUTSRQPONMLKJIHGFEDCBA"
+        assert cipher.substitution_encrypt("Az, 1", key) == "ZA, 1"
+        assert cipher.substitution_decrypt("ZA, 1", key) == "AZ, 1"
+
+    def test_batches(self):
+        """Test the functions that apply many keys or decrypt many texts."""
+        ciphertext = "LXFOPV EFRNHR"
+        keys = ["LEMON", "B", "LEMONADE", "A"]
+        assert cipher.vigenere_decrypt_keys(ciphertext, keys) == [
+            cipher.vigenere_decrypt(ciphertext, key) for key in keys
+        ]
+        codes = cipher.vigenere_decrypt_codes(
+            np.array([ord(c) - ord("A") for c in "LXFOPVEFRNHR"]), keys
+        )
+        assert "".join(chr(c + ord("A")) for c in codes[0]) == "ATTACKATDAWN"
+        assert cipher.vigenere_decrypt_texts(["BCD", "YZA"], "B") == ["ABC", "XYZ"]
+        texts = ["", "Lxfo pvef!", "", "straße RNHR", "1234", "Ab"]
+        assert cipher.vigenere_decrypt_texts(texts, "LEMON") == [
+            cipher.vigenere_decrypt(text, "LEMON") for text in texts
+        ]
+        assert cipher.vigenere_decrypt_texts([], "LEMON") == []
+        assert cipher.caesar_shift_keys("FUS ION", [6, 0, -1]) == [
+            "LAY OUT",
+            "FUS ION",
+            "ETR HNM",
+        ]
+        substitution_keys = [
+            cipher.substitution_generate_random_key() for _ in range(3)
+        ]
+        assert cipher.substitution_decrypt_keys("FLEE AT ONCE", substitution_keys) == [
+            cipher.substitution_decrypt("FLEE AT ONCE", key)
+            for key in substitution_keys
+        ]
+        key = substitution_keys[0]
+        assert cipher.substitution_decrypt_texts(
+            [cipher.substitution_encrypt(t, key) for t in ("FLEE", "AT ONCE")], key
+        ) == ["FLEE", "AT ONCE"]
+        assert cipher.substitution_decrypt_texts(texts, key) == [
+            cipher.substitution_decrypt(text, key) for text in texts
+        ]
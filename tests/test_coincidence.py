@@ -3,6 +3,7 @@
 import pytest
 import unittest
 
+from sputter import cipher
 from sputter import coincidence
 from sputter.mung import uppercase_only
 
@@ -45,3 +46,46 @@ class CoincidenceTestCase(unittest.TestCase):
             assert coincidence.delta_bar(
                 uppercase_only(text), modulus
             ) == pytest.approx(expected, abs=0.01)
+
+    def test_column_indices_of_coincidence(self):
+        """Test the index of coincidence of each column, including empty columns."""
+        iocs = coincidence.column_indices_of_coincidence("AB-AB-AC", 2)
+        assert iocs.tolist() == [1.0, pytest.approx(1.0 / 3)]
+        assert coincidence.column_indices_of_coincidence("A", 3).tolist() == [1.0] * 3
+
+    def test_delta_bars(self):
+        """Test that batch delta bars match individual delta bars."""
+        text = "QPWKA LVRXC QZIKG RBPFA EOMFL JMSDZ VDHXC XJYEB IMTRQ WNMEA"
+        moduli = range(1, 60)
+        expected = [coincidence.delta_bar(text, m) for m in moduli]
+        assert coincidence.delta_bars(text, moduli).tolist() == pytest.approx(expected)
+        assert len(coincidence.delta_bars(text, [])) == 0
+
+    def test_autocorrelation(self):
+        """Test that FFT coincidence counts match direct counts."""
+        text = "QPWKA LVRXC QZIKG RBPFA EOMFL JMSDZ VDHXC XJYEB IMTRQ WNMEA"
+        letters = uppercase_only(text)
+        counts = coincidence.autocorrelation(text)
+        assert len(counts) == len(letters)
+        for shift, count in enumerate(counts):
+            assert count == sum(
+                a == b for a, b in zip(letters, letters[shift:], strict=False)
+            )
+        assert len(coincidence.autocorrelation("")) == 0
+
+    def test_period_detectors(self):
+        """Test that both period detectors rank the key length first."""
+        plaintext = (
+            "IT WAS THE BEST OF TIMES IT WAS THE WORST OF TIMES IT WAS THE AGE OF "
+            "WISDOM IT WAS THE AGE OF FOOLISHNESS IT WAS THE EPOCH OF BELIEF"
+        )
+        ciphertext = cipher.vigenere_encrypt(plaintext * 5, "LEMON")
+        for detector in (
+            coincidence.autocorrelation_periods,
+            coincidence.kasiski_periods,
+        ):
+            results = detector(ciphertext, range(1, 21))
+            assert len(results) == 20
+            assert results[0][0] == 5
+            assert results[0][1] > results[1][1]
+            assert detector("", [2, 3]) == [(2, 0.0), (3, 0.0)]
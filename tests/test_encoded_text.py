@@ -0,0 +1,77 @@
+"""Tests for the encoded_text module."""
+
+import pickle
+import random
+import unittest
+
+import pytest
+
+from sputter import cipher
+from sputter import fitness
+from sputter import mung
+from sputter.encoded_text import encode_key, encode_letters, EncodedText
+
+
+TEXT = "The quick brown fox, jumps over the lazy dog!"
+
+
+class EncodedTextTestCase(unittest.TestCase):
+    """Tests for the EncodedText class."""
+
+    def test_round_trip(self):
+        """Test that encoding and decoding preserves the uppercased text."""
+        text = EncodedText.from_str(TEXT)
+        assert str(text) == TEXT.upper()
+        assert len(text) == len(TEXT)
+        assert str(text.uppercase_only()) == mung.uppercase_only(TEXT)
+        assert text == EncodedText.from_str(TEXT.upper())
+        assert hash(text) == hash(EncodedText.from_str(TEXT.upper()))
+        assert pickle.loads(pickle.dumps(text)) == text
+        assert str(EncodedText.from_str("")) == ""
+
+    def test_ciphers(self):
+        """Test that the cipher operations match the sputter.cipher functions."""
+        text = EncodedText.from_str(TEXT)
+        assert str(text.caesar_shift(3)) == cipher.caesar_shift(TEXT, 3)
+        assert str(text.caesar_shift(-29)) == cipher.caesar_shift(TEXT, -29)
+        assert str(text.vigenere_encrypt("LEMON")) == cipher.vigenere_encrypt(
+            TEXT, "LEMON"
+        )
+        assert str(text.vigenere_decrypt("LEMON")) == cipher.vigenere_decrypt(
+            TEXT, "LEMON"
+        )
+        random.seed(0)
+        key = cipher.substitution_generate_random_key()
+        ciphertext = text.substitution_encrypt(key)
+        assert str(ciphertext) == cipher.substitution_encrypt(TEXT, key)
+        assert str(ciphertext.substitution_decrypt(key)) == TEXT.upper()
+
+    def test_swap(self):
+        """Test the swap operations."""
+        text = EncodedText.from_str("AB, CD")
+        assert str(text.swap(0, 3)) == " B,ACD"
+        assert str(text.swap(1, 4)) == "AC, BD"
+        random.seed(0)
+        swapped = text.randomly_swap_letters()
+        assert sorted(str(swapped)) == sorted("AB, CD")
+        assert swapped != text
+
+    def test_encode_letters(self):
+        """Test that the shared string encoders agree with EncodedText."""
+        upper = TEXT.upper()
+        text = EncodedText.from_str(upper)
+        assert encode_letters(upper).tolist() == text.quadgram_codes().tolist()
+        assert encode_letters("Ab1É").tolist() == [0, 26, 26, 26]
+        assert encode_key("lemon").tolist() == [11, 4, 12, 14, 13]
+
+    def test_quadgram_score(self):
+        """Test scoring encoded text with quadgram statistics."""
+        qs = fitness.QuadgramStatistics()
+        text = EncodedText.from_str(TEXT)
+        assert qs.encoded_text_score(text) == pytest.approx(
+            qs.string_score(TEXT.upper())
+        )
+        assert qs.encoded_text_score(text.uppercase_only()) == pytest.approx(
+            qs.string_score(mung.uppercase_only(TEXT))
+        )
+        assert qs.encoded_text_score(EncodedText.from_str("THE")) == 0.0
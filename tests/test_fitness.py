@@ -1,7 +1,13 @@
 """Tests for the fitness module."""
 
+import os.path
+import pickle
+import pytest
+import tempfile
 import unittest
 
+import numpy as np
+
 from sputter import fitness
 
 
@@ -14,6 +20,9 @@ class QuadgramStatisticsTestCase(unittest.TestCase):
     def test_quadgram_log_prob(self):
         """Test that quadgram log probabilities are computed correctly."""
         assert self.qs.quadgram_log_prob("THIS") > self.qs.quadgram_log_prob("QXZJ")
+        index = ((19 * 26 + 7) * 26 + 8) * 26 + 18
+        assert self.qs.quadgram_log_prob("THIS") == self.qs.quadgram_log_probs()[index]
+        assert self.qs.quadgram_log_prob("this") == self.qs.quadgram_log_prob("THI")
 
     def test_string_score(self):
         """Test that the score of a common string is greater than that of a rare one."""
@@ -21,6 +30,49 @@ class QuadgramStatisticsTestCase(unittest.TestCase):
             "QXZJVJIAOLOX"
         )
 
+    def test_string_score_non_letters(self):
+        """Test that quadgrams containing non-letters receive the floor score."""
+        floor = self.qs.quadgram_log_prob("QXZ ")
+        assert floor == self.qs.quadgram_log_prob("1234")
+        assert floor < self.qs.quadgram_log_prob("THIS")
+        assert self.qs.string_score("THIS IS") == pytest.approx(
+            self.qs.quadgram_log_prob("THIS")
+            + self.qs.quadgram_log_prob("HIS ")
+            + self.qs.quadgram_log_prob("IS I")
+            + self.qs.quadgram_log_prob("S IS")
+        )
+        assert self.qs.string_score("ABC") == 0.0
+
+    def test_score_many(self):
+        """Test that batch scores match individual string scores."""
+        texts = ["THISISATEST", "QXZJVJIAOLO", "ANOTHERTEST"]
+        scores = self.qs.score_many(texts)
+        assert len(scores) == 3
+        for text, score in zip(texts, scores, strict=True):
+            assert score == pytest.approx(self.qs.string_score(text))
+        assert len(self.qs.score_many([])) == 0
+        with pytest.raises(ValueError, match="equal length"):
+            self.qs.score_many(["THIS", "THAT", "OTHER"])
+
+    def test_letter_log_probs(self):
+        """Test that single letter log probabilities form a plausible distribution."""
+        log_probs = self.qs.letter_log_probs()
+        assert log_probs.shape == (26,)
+        assert np.exp(log_probs).sum() == pytest.approx(1.0)
+        assert log_probs.argmax() == ord("E") - ord("A")
+        assert log_probs[ord("E") - ord("A")] > log_probs[ord("Z") - ord("A")]
+
+    def test_compiled_model(self):
+        """Test that statistics loaded from a compiled model match the source."""
+        with tempfile.TemporaryDirectory() as d:
+            source_path = os.path.join(d, "quadgrams.txt")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write("THIS 30\nHISI 20\nISIS 10\n")
+            parsed = fitness.QuadgramStatistics(source_path)
+            loaded = fitness.QuadgramStatistics(source_path)
+            assert parsed.string_score("THISIS") == loaded.string_score("THISIS")
+            assert parsed.quadgram_log_prob("QXZJ") == loaded.quadgram_log_prob("QXZJ")
+
 
 class WordStatisticsTestCase(unittest.TestCase):
     """Tests for the WordStatistics class."""
@@ -43,6 +95,39 @@ class WordStatisticsTestCase(unittest.TestCase):
             "RARE TERMS USED INTERNALLY"
         ) > self.ws.spaced_string_score("QXJZV VJWXZ QZVJ QXJV")
 
+    def test_compiled_model(self):
+        """Test that statistics loaded from a compiled model match the source."""
+        with tempfile.TemporaryDirectory() as d:
+            source_path = os.path.join(d, "words.txt")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write("THE 30\nTEST 20\nRARE 10\nDON'T 5\n")
+            parsed = fitness.WordStatistics(source_path)
+            loaded = fitness.WordStatistics(source_path)
+            assert parsed.word_frequencies() == loaded.word_frequencies()
+            assert loaded.word_frequencies() == {"THE": 30, "TEST": 20, "RARE": 10}
+            assert parsed.word_frequency_total() == loaded.word_frequency_total()
+            for word in ["THE", "TEST", "RARE", "ZXQ"]:
+                assert parsed.word_log_prob(word, True) == loaded.word_log_prob(
+                    word, True
+                )
+
+            compiled_path = os.path.join(d, "words.bin")
+            assert loaded.compile(compiled_path) == compiled_path
+            assert os.path.getsize(compiled_path) > 0
+
+    def test_word_lookup_without_dicts(self):
+        """Test that word lookups are served from the model arrays."""
+        ws = fitness.WordStatistics()
+        assert ws.word_log_prob("THE") > ws.word_log_prob("RARE")
+        assert ws._word_freq is None
+        floor = ws.floor_log_prob()
+        assert ws.word_log_prob("the") == floor
+        assert ws.word_log_prob("ÉTÉ") == floor
+        assert ws.word_log_prob("") == floor
+        restored = pickle.loads(pickle.dumps(ws))
+        assert restored.word_log_prob("THE") == ws.word_log_prob("THE")
+        assert ws.word_frequencies()["THE"] > 0
+
     def test_trie(self):
         """Test that the trie is built correctly."""
         trie = self.ws.trie()
@@ -0,0 +1,53 @@
+"""Tests for the model_file module."""
+
+import os.path
+import pytest
+import tempfile
+import unittest
+
+import numpy as np
+
+from sputter import model_file
+
+
+class ModelFileTestCase(unittest.TestCase):
+    """Tests for the model_file module."""
+
+    def test_round_trip(self):
+        """Test that arrays and metadata survive writing and reading."""
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "model.bin")
+            model_file.write_model_file(
+                path,
+                {
+                    "floats": np.array([1.5, -2.0, 3.25]),
+                    "bytes": np.frombuffer(b"ABC", dtype=np.uint8),
+                    "matrix": np.arange(12, dtype=np.int32).reshape(3, 4),
+                    "empty": np.zeros(0, dtype=np.int64),
+                },
+                {"kind": "test", "value": 1.25},
+            )
+            model = model_file.read_model_file(path)
+            assert model.metadata == {"kind": "test", "value": 1.25}
+            assert model.arrays["floats"].tolist() == [1.5, -2.0, 3.25]
+            assert model.arrays["bytes"].tobytes() == b"ABC"
+            assert model.arrays["matrix"].shape == (3, 4)
+            assert model.arrays["matrix"][2, 3] == 11
+            assert len(model.arrays["empty"]) == 0
+            assert not model.arrays["floats"].flags.writeable
+
+    def test_invalid_file(self):
+        """Test that files that are not model files are rejected."""
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "model.bin")
+            with open(path, "wb") as f:
+                f.write(b"not a model file at all")
+            with pytest.raises(ValueError, match="not a sputter model file"):
+                model_file.read_model_file(path)
+
+    def test_compiled_model_path(self):
+        """Test that compiled model paths are keyed by the source data."""
+        path = model_file.compiled_model_path("words", b"A 1")
+        assert path == model_file.compiled_model_path("words", b"A 1")
+        assert path != model_file.compiled_model_path("words", b"A 2")
+        assert path != model_file.compiled_model_path("quadgrams", b"A 1")
@@ -1,11 +1,39 @@
 """Tests for the optimize module."""
 
+import dataclasses
+import json
+import os
+import pickle
 import random
+import tempfile
+import time
 import unittest
 
+import numpy as np
+import pytest
+
 from sputter import optimize
 
 
+def _distance_from_m(c):
+    return float(abs(ord("M") - ord(c)))
+
+
+def _random_letter():
+    return chr(random.randrange(ord("A"), ord("Z") + 1))
+
+
+def _step_letter(c):
+    return chr(max(ord("A"), min(ord("Z"), ord(c) + random.choice([-1, 1]))))
+
+
+_SMALL_CONFIG: optimize.SimulatedAnnealingConfig = optimize.SimulatedAnnealingConfig(
+    iterations_per_temp=10,
+    initial_temp=10.0,
+    min_temp=1.0,
+)
+
+
 class OptimizeTestCase(unittest.TestCase):
     """Tests for the optimize module."""
 
@@ -33,3 +61,384 @@ class OptimizeTestCase(unittest.TestCase):
         assert len(results) == 10
         assert results[0][0] == "M"
         assert results[0][1] == 0.0
+
+    def test_simulated_annealing_delta_function(self):
+        """Tests the simulated_annealing function with a delta function."""
+        objective_calls = []
+
+        def objective(c):
+            objective_calls.append(c)
+            return float(abs(ord("M") - ord(c)))
+
+        results = optimize.simulated_annealing(
+            objective,
+            "A",
+            lambda c: chr(
+                max(ord("A"), min(ord("Z"), ord(c) + random.choice([-1, 1])))
+            ),
+            config=optimize.SimulatedAnnealingConfig(
+                iterations_per_temp=10,
+                initial_temp=10.0,
+                min_temp=1.0,
+            ),
+            delta_function=lambda c, nc: float(
+                abs(ord("M") - ord(nc)) - abs(ord("M") - ord(c))
+            ),
+        )
+        assert objective_calls == ["A"]
+        assert results[0][0] == "M"
+        assert results[0][1] == 0.0
+
+    def test_parallel_simulated_annealing(self):
+        """Tests the parallel_simulated_annealing function."""
+        progress = []
+        config = optimize.SimulatedAnnealingConfig(
+            iterations_per_temp=10,
+            initial_temp=10.0,
+            min_temp=1.0,
+            progress_callback=lambda t, state, score: progress.append(score),
+        )
+        for processes in (1, 2):
+            progress.clear()
+            results = optimize.parallel_simulated_annealing(
+                _distance_from_m,
+                _random_letter,
+                _step_letter,
+                config=config,
+                num_chains=3,
+                processes=processes,
+                seed=1,
+            )
+            assert len({state for state, _ in results}) == len(results)
+            assert results[0] == ("M", 0.0)
+            assert progress
+            assert progress == sorted(progress, reverse=True)
+
+    def test_parallel_simulated_annealing_seed(self):
+        """Tests that parallel_simulated_annealing is reproducible given a seed."""
+        serial = optimize.parallel_simulated_annealing(
+            _distance_from_m,
+            _random_letter,
+            _step_letter,
+            top_n=None,
+            config=_SMALL_CONFIG,
+            num_chains=2,
+            processes=1,
+            seed=7,
+        )
+        parallel = optimize.parallel_simulated_annealing(
+            _distance_from_m,
+            _random_letter,
+            _step_letter,
+            top_n=None,
+            config=_SMALL_CONFIG,
+            num_chains=2,
+            processes=2,
+            seed=7,
+        )
+        assert serial == parallel
+
+    def test_parallel_simulated_annealing_max_seconds(self):
+        """Tests that max_seconds limits all chains together, not each chain."""
+        config = optimize.SimulatedAnnealingConfig(max_seconds=0.2)
+        start = time.monotonic()
+        results = optimize.parallel_simulated_annealing(
+            _distance_from_m,
+            _random_letter,
+            _step_letter,
+            config=config,
+            num_chains=4,
+            processes=1,
+            seed=3,
+        )
+        assert time.monotonic() - start < 0.5
+        assert results
+
+    def test_top_n(self):
+        """Tests the TopN class."""
+        top = optimize.TopN[str](3)
+        assert top.add("A", 5.0)
+        assert top.add("B", 3.0)
+        assert top.add("C", 4.0)
+        assert top.threshold == 5.0
+        assert not top.add("D", 5.0)
+        assert top.add("E", 1.0)
+        assert not top.add("B", 3.5)
+        assert top.add("C", 2.0)
+        assert top.results() == [("E", 1.0), ("C", 2.0), ("B", 3.0)]
+        assert len(top) == 3
+
+    def test_top_n_ties_and_unbounded(self):
+        """Tests the TopN class with tied scores and no bound."""
+        top = optimize.TopN[str](2)
+        top.update([("A", 1.0), ("B", 1.0), ("C", 1.0), ("A", 1.0)])
+        assert top.results() == [("A", 1.0), ("B", 1.0)]
+        unbounded = optimize.TopN[str](None)
+        unbounded.update([("A", 2.0), ("B", 1.0), ("A", 0.0)])
+        assert unbounded.results() == [("A", 0.0), ("B", 1.0)]
+
+    def test_top_n_unhashable(self):
+        """Tests the TopN class with unhashable states."""
+        top = optimize.TopN[list](2)
+        top.update([(["A"], 2.0), (["A"], 1.0), (["B"], 3.0)])
+        assert top.results() == [(["A"], 1.0), (["A"], 2.0)]
+
+    def test_brute_force_duplicates(self):
+        """Tests that brute_force returns each distinct state at most once."""
+        assert optimize.brute_force(len, ["AA", "B", "AA", "CCC"], None) == [
+            ("B", 1),
+            ("AA", 2),
+            ("CCC", 3),
+        ]
+
+    def test_parallel_brute_force(self):
+        """Tests the parallel_brute_force function."""
+        letters = [chr(ord("A") + i % 26) for i in range(200)]
+        expected = optimize.brute_force(_distance_from_m, letters, 5)
+        for processes in (1, 2):
+            results = optimize.parallel_brute_force(
+                _distance_from_m,
+                (c for c in letters),
+                top_n=5,
+                processes=processes,
+                chunk_size=7,
+            )
+            assert results == expected
+        assert expected[0] == ("M", 0.0)
+
+    def test_brute_force_batch(self):
+        """Tests the brute_force_batch function."""
+        letters = [chr(ord("A") + i % 26) for i in range(100)]
+        batch_sizes = []
+
+        def batch_objective(cs):
+            batch_sizes.append(len(cs))
+            return np.abs(np.array([ord(c) for c in cs]) - ord("M"))
+
+        results = optimize.brute_force_batch(
+            batch_objective, iter(letters), top_n=5, batch_size=32
+        )
+        assert results == optimize.brute_force(_distance_from_m, letters, 5)
+        assert batch_sizes == [32, 32, 32, 4]
+
+    def test_population_search(self):
+        """Tests the population_search function."""
+        random.seed(0)
+        generations = []
+        results = optimize.population_search(
+            lambda cs: np.abs(np.array([ord(c) for c in cs]) - ord("M")),
+            ["A", "Z", "B"],
+            _step_letter,
+            top_n=3,
+            generations=20,
+            progress_callback=lambda g, state, score: generations.append(g),
+        )
+        assert results == [("M", 0.0), ("L", 1.0), ("N", 1.0)]
+        assert generations == list(range(20))
+
+    def test_simulated_annealing_budgets(self):
+        """Tests the simulated_annealing budget and plateau options."""
+        objective_calls = []
+
+        def objective(c):
+            objective_calls.append(c)
+            return _distance_from_m(c)
+
+        optimize.simulated_annealing(
+            objective,
+            "A",
+            _step_letter,
+            config=optimize.SimulatedAnnealingConfig(max_evaluations=25),
+        )
+        assert len(objective_calls) == 25
+
+        start = time.monotonic()
+        optimize.simulated_annealing(
+            _distance_from_m,
+            "A",
+            _step_letter,
+            config=optimize.SimulatedAnnealingConfig(max_seconds=0.05),
+        )
+        assert time.monotonic() - start < 1.0
+
+        temperatures = []
+        optimize.simulated_annealing(
+            _distance_from_m,
+            "M",
+            _step_letter,
+            config=optimize.SimulatedAnnealingConfig(
+                iterations_per_temp=10,
+                plateau_temps=3,
+                progress_callback=lambda t, state, score: temperatures.append(t),
+            ),
+        )
+        assert len(temperatures) == 3
+
+    def test_simulated_annealing_checkpoint(self):
+        """Tests resuming simulated_annealing from a checkpoint."""
+        config = optimize.SimulatedAnnealingConfig(
+            iterations_per_temp=10,
+            initial_temp=10.0,
+            min_temp=1.0,
+        )
+        random.seed(3)
+        expected = optimize.simulated_annealing(
+            _distance_from_m, "A", _step_letter, top_n=None, config=config
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.pickle")
+            random.seed(3)
+            optimize.simulated_annealing(
+                _distance_from_m,
+                "A",
+                _step_letter,
+                top_n=None,
+                config=dataclasses.replace(
+                    config, max_evaluations=115, checkpoint_path=path
+                ),
+            )
+            checkpoint = optimize.load_checkpoint(path)
+            assert checkpoint.evaluations == 115
+            assert checkpoint.iteration == 4
+            random.seed(99)
+            results = optimize.simulated_annealing(
+                _distance_from_m,
+                "Z",
+                _step_letter,
+                top_n=None,
+                config=config,
+                resume=checkpoint,
+            )
+        assert results == expected
+
+    def test_parallel_tempering(self):
+        """Tests the parallel_tempering function."""
+        sweeps = []
+        config = optimize.ParallelTemperingConfig(
+            num_replicas=4,
+            min_temp=0.5,
+            max_temp=20.0,
+            sweeps=10,
+            iterations_per_sweep=10,
+            progress_callback=lambda sweep, state, score: sweeps.append(sweep),
+        )
+        serial = optimize.parallel_tempering(
+            _distance_from_m, "A", _step_letter, config=config, seed=5
+        )
+        assert sweeps == list(range(1, 11))
+        assert serial[0] == ("M", 0.0)
+        assert len({state for state, _ in serial}) == len(serial)
+        parallel = optimize.parallel_tempering(
+            _distance_from_m, "A", _step_letter, config=config, processes=2, seed=5
+        )
+        assert parallel == serial
+
+    def test_parallel_tempering_temperatures(self):
+        """Tests the ParallelTemperingConfig replica temperatures."""
+        config = optimize.ParallelTemperingConfig(
+            num_replicas=3, min_temp=1.0, max_temp=100.0
+        )
+        assert config.replica_temperatures() == pytest.approx([1.0, 10.0, 100.0])
+        config = optimize.ParallelTemperingConfig(temperatures=[5.0, 2.0])
+        assert config.replica_temperatures() == [2.0, 5.0]
+
+    def test_permutation_annealing(self):
+        """Tests the permutation_annealing function."""
+
+        def displacement(orders):
+            return np.abs(orders - np.arange(orders.shape[1])).sum(axis=1)
+
+        temperatures = []
+        results = optimize.permutation_annealing(
+            displacement,
+            6,
+            num_chains=16,
+            top_n=3,
+            config=optimize.SimulatedAnnealingConfig(
+                iterations_per_temp=20,
+                initial_temp=5.0,
+                min_temp=0.1,
+                progress_callback=lambda t, state, score: temperatures.append(t),
+            ),
+            seed=0,
+        )
+        assert results[0] == ((0, 1, 2, 3, 4, 5), 0.0)
+        assert [score for _, score in results] == [0.0, 2.0, 2.0]
+        assert temperatures
+
+        with pytest.raises(ValueError, match="length 2"):
+            optimize.permutation_annealing(displacement, 1)
+
+    def test_simulated_annealing_stats(self):
+        """Tests the simulated_annealing telemetry options."""
+        random.seed(0)
+        stats = []
+        with tempfile.TemporaryDirectory() as directory:
+            trace_path = os.path.join(directory, "trace.jsonl")
+            optimize.simulated_annealing(
+                _distance_from_m,
+                "A",
+                _step_letter,
+                config=dataclasses.replace(
+                    _SMALL_CONFIG,
+                    max_evaluations=215,
+                    stats_callback=stats.append,
+                    trace_path=trace_path,
+                ),
+            )
+            with open(trace_path) as f:
+                trace = [json.loads(line) for line in f]
+        assert [s.iterations for s in stats] == [10] * 21 + [4]
+        assert sum(s.evaluations for s in stats) == 214
+        assert stats[0].temperature == 10.0
+        assert all(0 <= s.accepted <= s.iterations for s in stats)
+        assert all(0 <= s.improvements <= s.accepted for s in stats)
+        best_scores = [s.best_score for s in stats]
+        assert best_scores == sorted(best_scores, reverse=True)
+        assert stats[-1].best_score == 0.0
+        assert len(trace) == len(stats)
+        assert trace[0]["accepted"] == stats[0].accepted
+        assert trace[0]["acceptance_rate"] == stats[0].acceptance_rate
+
+    def test_permutation_annealing_stats(self):
+        """Tests the permutation_annealing telemetry options."""
+        stats = []
+        optimize.permutation_annealing(
+            lambda orders: orders[:, 0].astype(float),
+            3,
+            num_chains=4,
+            config=dataclasses.replace(_SMALL_CONFIG, stats_callback=stats.append),
+            seed=0,
+        )
+        assert len(stats) == 22
+        assert all(s.iterations == 10 and s.evaluations == 40 for s in stats)
+        assert stats[-1].best_score == 0.0
+
+    def test_memoized_objective(self):
+        """Tests the MemoizedObjective class."""
+        calls = []
+
+        def objective(cs):
+            calls.append(cs)
+            return _distance_from_m(cs[0])
+
+        memoized = optimize.MemoizedObjective(objective, max_size=2)
+        assert [memoized(c) for c in "AABAC"] == [12.0, 12.0, 11.0, 12.0, 10.0]
+        assert calls == ["A", "B", "C"]
+        assert memoized(["A"]) == 12.0
+        assert memoized.hits == 2
+        assert memoized.misses == 4
+        assert len(memoized) == 2
+        memoized("B")
+        assert calls[-1] == "B"
+        assert memoized.hit_rate == pytest.approx(2 / 7)
+
+    def test_memoized_objective_pickle(self):
+        """Tests that a MemoizedObjective pickles without its cache."""
+        memoized = optimize.MemoizedObjective(_distance_from_m)
+        memoized("A")
+        restored = pickle.loads(pickle.dumps(memoized))
+        assert len(restored) == 0
+        assert restored("M") == 0.0
+        assert restored.max_size == memoized.max_size
@@ -0,0 +1,69 @@
+"""Tests for the registry module."""
+
+import copy
+import os.path
+import pickle
+import pytest
+import tempfile
+import unittest
+
+from sputter import fitness
+from sputter import registry
+
+
+class RegistryTestCase(unittest.TestCase):
+    """Tests for the registry module."""
+
+    def test_shared_models(self):
+        """Test that models are shared until invalidated."""
+        qs = registry.quadgram_statistics()
+        assert registry.quadgram_statistics() is qs
+        ws = registry.word_statistics()
+        assert registry.word_statistics() is ws
+        assert registry.word_trie() is ws.compact_trie()
+
+        registry.invalidate()
+        assert registry.quadgram_statistics() is not qs
+        assert registry.word_statistics() is not ws
+
+    def test_keyed_by_source_file(self):
+        """Test that models loaded from different source files are kept separate."""
+        with tempfile.TemporaryDirectory() as d:
+            source_path = os.path.join(d, "words.txt")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write("THE 30\nTEST 20\n")
+            ws = registry.word_statistics(source_path)
+            assert ws is not registry.word_statistics()
+            assert ws is registry.word_statistics(os.path.join(d, ".", "words.txt"))
+            assert ws.word_frequencies() == {"THE": 30, "TEST": 20}
+
+            registry.invalidate_all()
+            assert registry.word_statistics(source_path) is not ws
+            registry.invalidate(source_path)
+
+    def test_pickling(self):
+        """Test that only shared models are pickled by reference."""
+        with tempfile.TemporaryDirectory() as d:
+            source_path = os.path.join(d, "words.txt")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write("THE 30\nTEST 20\n")
+            shared = registry.word_statistics(source_path)
+            assert registry.is_shared(shared)
+            assert pickle.loads(pickle.dumps(shared)) is shared
+            assert copy.deepcopy(shared) is shared
+
+            private = fitness.WordStatistics(os.path.relpath(source_path))
+            assert not registry.is_shared(private)
+            assert private._filepath == os.path.abspath(source_path)
+            copied = pickle.loads(pickle.dumps(private))
+            assert copied is not shared
+            assert copied is not private
+            assert copied.word_frequencies() == {"THE": 30, "TEST": 20}
+
+            pickled = pickle.dumps(shared)
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write("THE 10\n")
+            registry.invalidate(source_path)
+            with pytest.raises(ValueError, match="has changed"):
+                pickle.loads(pickled)
+            registry.invalidate(source_path)
@@ -0,0 +1,93 @@
+"""Tests for the reorder module."""
+
+import itertools
+import pickle
+import random
+import unittest
+
+import numpy as np
+import pytest
+
+from sputter import optimize
+from sputter import reorder
+
+
+class ReorderTestCase(unittest.TestCase):
+    """Tests for the reorder module."""
+
+    def test_reorder_objective(self):
+        """Tests the ReorderObjective class."""
+        objective = reorder.ReorderObjective()
+        assert objective(("MEETME", "ATTHE", "STATION")) < objective(
+            ("ATTHE", "MEETME", "STATION")
+        )
+        enumeration_objective = reorder.ReorderObjective([6, 2, 4])
+        assert enumeration_objective(("ATTACK", "AT", "DAWN")) < (
+            enumeration_objective(("DAWN", "AT", "ATTACK"))
+        )
+
+    def test_reorder_objective_pickle(self):
+        """Tests that a ReorderObjective survives a pickle round trip."""
+        objective = reorder.ReorderObjective([6, 2, 4])
+        restored = pickle.loads(pickle.dumps(objective))
+        ngrams = ("ATTACK", "AT", "DAWN")
+        assert restored(ngrams) == objective(ngrams)
+
+    def test_randomly_swap_ngrams(self):
+        """Tests the randomly_swap_ngrams function."""
+        random.seed(0)
+        ngrams = ("A", "B", "C", "D")
+        swapped = reorder.randomly_swap_ngrams(ngrams)
+        assert sorted(swapped) == list(ngrams)
+        assert sum(a != b for a, b in zip(ngrams, swapped, strict=True)) == 2
+
+    def test_random_ordering(self):
+        """Tests the random_ordering function."""
+        ordering = reorder.random_ordering(["A", "B", "C", "D"])
+        assert isinstance(ordering, tuple)
+        assert sorted(ordering) == ["A", "B", "C", "D"]
+
+    def test_reorder_quadgram_scorer(self):
+        """Tests the ReorderQuadgramScorer class."""
+        ngrams = ["ATTACK", "AT", "DAWN", "X"]
+        scorer = reorder.ReorderQuadgramScorer(ngrams)
+        objective = reorder.ReorderObjective()
+        orders = np.array([[0, 1, 2, 3], [3, 2, 1, 0], [1, 3, 0, 2]])
+        assert scorer.text_codes(orders[1:2]).tolist() == [
+            [ord(c) - ord("A") for c in "XDAWNATATTACK"]
+        ]
+        assert scorer(orders) == pytest.approx(
+            [objective([ngrams[i] for i in order]) for order in orders]
+        )
+
+    def test_exact_reorder(self):
+        """Tests that exact_reorder matches an exhaustive search."""
+        objective = reorder.ReorderObjective()
+        for ngrams in (["AND", "ATE", "ERC", "ERE", "FTH"], ["AT", "AT", "TACK", "A"]):
+            results = reorder.exact_reorder(ngrams, top_n=4)
+            expected = optimize.brute_force(
+                objective, set(itertools.permutations(ngrams)), top_n=4
+            )
+            assert [score for _, score in results] == pytest.approx(
+                [score for _, score in expected]
+            )
+            assert results[0][0] == expected[0][0]
+            assert len(set(results)) == len(results)
+            for ordering, score in results:
+                assert sorted(ordering) == sorted(ngrams)
+                assert score == pytest.approx(objective(ordering))
+        assert reorder.exact_reorder(["AT", "AT"]) == [
+            (("AT", "AT"), pytest.approx(objective(("AT", "AT"))))
+        ]
+        assert reorder.exact_reorder([]) == [((), 0.0)]
+
+    def test_exact_reorder_table_size(self):
+        """Tests that the table size counts the tails the ngrams can end with."""
+        # The tails are "", "AT" and "TAT".
+        assert reorder.exact_reorder_table_size(["AT", "AT"], top_n=3) == 4 * 3 * 3
+        assert reorder.exact_reorder_table_size([], top_n=10) == 10
+        # Single letters can end with any of 1 + 12 + 12**2 + 12**3 tails.
+        letters = list("ABCDEFGHIJKL")
+        assert reorder.exact_reorder_table_size(letters, top_n=5) > (
+            reorder.EXACT_REORDER_MAX_TABLE_SIZE
+        )
@@ -21,6 +21,54 @@ class SpacerTestCase(unittest.TestCase):
             spacer.space("THISISALONGERSTRINGTOSPACE", ws=self.ws)[0][0]
             == "THIS IS A LONGER STRING TO SPACE"
         )
+        assert spacer.space("", ws=self.ws) == [("", 0.0)]
+
+    def test_space_non_letters(self):
+        """Tests that words containing non-letters are floor scored."""
+        for spaced, score in spacer.space("hello", top_n=5, ws=self.ws):
+            assert spaced.replace(" ", "") == "hello"
+            assert score == pytest.approx(
+                -sum(self.ws.word_log_prob(w, True) for w in spaced.split(" "))
+            )
+        spaced, score = spacer.space("HELLO WORLD", top_n=1, ws=self.ws)[0]
+        assert spaced == "HELLO   WORLD"
+        assert score == pytest.approx(
+            -sum(self.ws.word_log_prob(w, True) for w in ["HELLO", " ", "WORLD"])
+        )
+
+    def test_space_top_n(self):
+        """Tests that the space function returns distinct results in score order."""
+        results = spacer.space("ITWASTHEBESTOFTIMES", top_n=20, ws=self.ws)
+        assert len(results) == 20
+        assert results[0][0] == "IT WAS THE BEST OF TIMES"
+        assert len({spaced for spaced, _ in results}) == 20
+        scores = [score for _, score in results]
+        assert scores == sorted(scores)
+        for spaced, score in results:
+            assert spaced.replace(" ", "") == "ITWASTHEBESTOFTIMES"
+            assert score == pytest.approx(
+                -sum(self.ws.word_log_prob(w, True) for w in spaced.split(" "))
+            )
+
+    def test_space_stream(self):
+        """Tests the space_stream function."""
+        text = "ITWASTHEBESTOFTIMESITWASTHEWORSTOFTIMESHELLOXQWORLD"
+        expected = spacer.space(text, top_n=1, ws=self.ws)[0][0].split(" ")
+        assert list(spacer.space_stream(text, ws=self.ws)) == expected
+        chunks = [text[i : i + 5] for i in range(0, len(text), 5)]
+        assert list(spacer.space_stream(chunks, ws=self.ws)) == expected
+        assert list(spacer.space_stream([], ws=self.ws)) == []
+
+        words = spacer.space_stream(iter(text * 100), ws=self.ws)
+        assert next(words) == "IT"
+        assert next(words) == "WAS"
+
+        for text in ["hello", "HELLO WORLD", "IT WAS the BEST"]:
+            expected = spacer.space(text, top_n=1, ws=self.ws)[0][0]
+            assert " ".join(spacer.space_stream(text, ws=self.ws)) == expected
+
+        words = list(spacer.space_stream("XQZJV" * 20, ws=self.ws, max_window=30))
+        assert "".join(words) == "XQZJV" * 20
 
     def test_space_with_enumeration(self):
         """Tests the space_with_enumeration function."""
@@ -0,0 +1,98 @@
+"""Tests for the substitution module."""
+
+import pytest
+import random
+import time
+import unittest
+
+import numpy as np
+
+from sputter import cipher
+from sputter import fitness
+from sputter import mung
+from sputter import substitution
+
+
+PLAINTEXT = (
+    "THIS SENTENCE MADE UP OF RELATIVELY COMMON ENGLISH WORDS IS USED AS A TEST "
+    "CASE FOR THE SUBSTITUTION CIPHER CRACKER"
+)
+
+
+class SubstitutionTestCase(unittest.TestCase):
+    """Tests for the substitution module."""
+
+    def setUp(self):
+        random.seed(0)
+        self.key = cipher.substitution_generate_random_key()
+        self.ciphertext = cipher.substitution_encrypt(PLAINTEXT, self.key)
+
+    def test_quadgram_scorer(self):
+        """Test that quadgram deltas match differences of full scores."""
+        qs = fitness.QuadgramStatistics()
+        scorer = substitution.SubstitutionQuadgramScorer(self.ciphertext, qs)
+        assert scorer(self.key) == pytest.approx(
+            -qs.string_score(mung.uppercase_only(PLAINTEXT))
+        )
+        key = self.key
+        for _ in range(20):
+            new_key = mung.randomly_swap_letters(key)
+            assert scorer.delta(key, new_key) == pytest.approx(
+                scorer(new_key) - scorer(key)
+            )
+            key = new_key
+        assert scorer.delta(key, key) == 0.0
+        # Keys that are neither the last key nor its last neighbor are rescored.
+        for _ in range(5):
+            key = cipher.substitution_generate_random_key()
+            new_key = mung.randomly_swap_letters(mung.randomly_swap_letters(key))
+            assert scorer.delta(key, new_key) == pytest.approx(
+                scorer(new_key) - scorer(key)
+            )
+
+    def test_quadgram_scorer_delta_speed(self):
+        """Test that quadgram deltas are faster than full scores on long texts."""
+        plaintext = " ".join(random.choices(PLAINTEXT.split(), k=2000))
+        scorer = substitution.SubstitutionQuadgramScorer(
+            cipher.substitution_encrypt(plaintext, self.key)
+        )
+        keys = [self.key]
+        for _ in range(300):
+            keys.append(mung.randomly_swap_letters(keys[-1]))
+        for key, new_key in zip(keys, keys[1:], strict=False):
+            scorer.delta(key, new_key)
+        start = time.perf_counter()
+        for key, new_key in zip(keys, keys[1:], strict=False):
+            scorer.delta(key, new_key)
+        delta_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for key in keys[1:]:
+            scorer(key)
+        full_seconds = time.perf_counter() - start
+        assert delta_seconds < full_seconds
+
+    def test_word_scorer(self):
+        """Test that word deltas match differences of full scores."""
+        ws = fitness.WordStatistics()
+        scorer = substitution.SubstitutionWordScorer(self.ciphertext, ws)
+        assert scorer(self.key) == pytest.approx(-ws.spaced_string_score(PLAINTEXT))
+        key = self.key
+        for _ in range(20):
+            new_key = mung.randomly_swap_letters(key)
+            assert scorer.delta(key, new_key) == pytest.approx(
+                scorer(new_key) - scorer(key)
+            )
+            assert scorer(new_key) == pytest.approx(
+                -ws.spaced_string_score(
+                    cipher.substitution_decrypt(self.ciphertext, new_key)
+                )
+            )
+            key = new_key
+
+    def test_quadgram_scorer_batch(self):
+        """Test that batch quadgram scores match individual scores."""
+        scorer = substitution.SubstitutionQuadgramScorer(self.ciphertext)
+        keys = [self.key] + [mung.randomly_swap_letters(self.key) for _ in range(4)]
+        codes = np.array([[ord(c) - ord("A") for c in key] for key in keys])
+        assert substitution.key_from_codes(codes[0]) == self.key
+        assert scorer.score_batch(codes) == pytest.approx([scorer(k) for k in keys])
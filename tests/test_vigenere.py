@@ -0,0 +1,98 @@
+"""Tests for the vigenere module."""
+
+import pytest
+import unittest
+
+import numpy as np
+
+from sputter import cipher
+from sputter import vigenere
+
+
+PLAINTEXT = (
+    "It was the best of times, it was the worst of times, it was the age of "
+    "wisdom, it was the age of foolishness"
+)
+
+
+class VigenereTestCase(unittest.TestCase):
+    """Tests for the vigenere module."""
+
+    def setUp(self):
+        self.ciphertext = cipher.vigenere_encrypt(PLAINTEXT, "DICKENS")
+        self.solver = vigenere.VigenereSolver(self.ciphertext)
+
+    def test_column_scores(self):
+        """Test that frequency correlation recovers most of the key."""
+        scores = self.solver.column_scores(7)
+        assert scores.shape == (7, 26)
+        key = "".join(chr(s + ord("A")) for s in scores.argmax(axis=1))
+        assert sum(a == b for a, b in zip(key, "DICKENS", strict=True)) >= 5
+
+    def test_score_shifts(self):
+        """Test that batch key scores match scores of the decrypted text."""
+        qs = vigenere.quadgram_statistics()
+        keys = ["DICKENS", "AAAAAAA", "DICKENZ"]
+        scores = self.solver.score_shifts(
+            np.array([[ord(c) - ord("A") for c in key] for key in keys])
+        )
+        for key, score in zip(keys, scores, strict=True):
+            plaintext = cipher.vigenere_decrypt(self.ciphertext, key)
+            assert score == pytest.approx(-qs.string_score(plaintext))
+
+    def test_score_keys(self):
+        """Test that keys given as strings score the same as their shifts."""
+        keys = ["DICKENS", "AAAAAAA"]
+        scores = self.solver.score_keys(keys)
+        expected = self.solver.score_shifts(
+            np.array([[ord(c) - ord("A") for c in key] for key in keys])
+        )
+        assert scores.tolist() == pytest.approx(expected.tolist())
+        assert len(self.solver.score_keys([])) == 0
+
+    def test_solve(self):
+        """Test that ascent recovers the key of a given length."""
+        results = self.solver.solve(7, top_n=3)
+        assert len(results) == 3
+        assert results[0][0] == "DICKENS"
+        assert results[0][1] < results[1][1]
+
+    def test_crack_vigenere(self):
+        """Test that the right key length wins among several candidates."""
+        results = vigenere.crack_vigenere(self.ciphertext, [5, 7, 10, 14], top_n=5)
+        assert len(results) == 5
+        assert results[0][0] == "DICKENS"
+        assert [score for _, score in results] == sorted(s for _, s in results)
+
+    def test_long_key(self):
+        """Test that a key that is not a word is recovered."""
+        plaintext = PLAINTEXT * 3
+        ciphertext = cipher.vigenere_encrypt(plaintext, "QZXJWKVPMB")
+        results = vigenere.crack_vigenere(ciphertext, [10], top_n=1)
+        assert results[0][0] == "QZXJWKVPMB"
+
+    def test_candidate_keys(self):
+        """Test that candidate keys are scored for ciphertexts that are too short."""
+        ciphertext = "LXFOPVEFRNHR"
+        candidates = ["LEMON", "APPLE", "LEMONS", "X-RAY", "melon"]
+        results = vigenere.crack_vigenere(
+            ciphertext, [5], top_n=5, candidate_keys=candidates
+        )
+        assert [key for key, _ in results][:1] == ["LEMON"]
+        assert {key for key, _ in results} == {"LEMON", "APPLE", "MELON"}
+        solver = vigenere.VigenereSolver(ciphertext)
+        for key, score in results:
+            assert score == pytest.approx(
+                solver.score_keys([key])[0] + 5 * vigenere.math.log(26)
+            )
+        # Without candidates of the right length, the key is solved for.
+        results = vigenere.crack_vigenere(
+            ciphertext, [5], top_n=1, candidate_keys=["LEMONS"]
+        )
+        assert len(results) == 1
+        # Long enough ciphertexts are solved for even if there are candidates.
+        ciphertext = cipher.vigenere_encrypt(PLAINTEXT * 2, "DICKENS")
+        results = vigenere.crack_vigenere(
+            ciphertext, [7], top_n=1, candidate_keys=["LEMONSS"]
+        )
+        assert results[0][0] == "DICKENS"
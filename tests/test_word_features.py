@@ -1,11 +1,23 @@
 """Tests for the word_features module."""
 
+import os.path
+import platformdirs
+import pytest
+import tempfile
 import unittest
 
+import numpy as np
+
+from sputter.fitness import WordStatistics
+from sputter.registry import word_statistics
 from sputter.word_features import (
+    ALL_FEATURES,
     DoubleLettersFeature,
     UniqueVowelCountFeature,
+    WordFeatureMatrix,
+    WordFeaturePrecomputes,
     WordFeatureStatistics,
+    WordListPrecomputes,
 )
 
 
@@ -27,3 +39,80 @@ class TestWordFeatureStatistics(unittest.TestCase):
         assert isinstance(all_vowels_results[0].feature, UniqueVowelCountFeature)
         assert all_vowels_results[0].feature.count == 5
         assert set(all_vowels_results[0].words) == {"EDUCATION", "FACETIOUS", "SEQUOIA"}
+
+    def test_cache(self):
+        """Test that cached statistics are keyed by corpus and match the source."""
+        with tempfile.TemporaryDirectory() as d:
+            source_path = os.path.join(d, "words.txt")
+            with open(source_path, "w", encoding="utf-8") as f:
+                f.write("BALLOON 30\nTEST 20\nSEQUOIA 10\n")
+            legacy_path = os.path.join(
+                platformdirs.user_cache_dir(appname="sputter"),
+                "word_feature_log_prob.json",
+            )
+            os.makedirs(os.path.dirname(legacy_path), exist_ok=True)
+            with open(legacy_path, "w") as f:
+                f.write("{}")
+            ws = WordStatistics(source_path)
+            computed = WordFeatureStatistics(ws)
+            assert not os.path.exists(legacy_path)
+            assert computed._compiled_path != self.wfs._compiled_path
+            loaded = WordFeatureStatistics(ws)
+            assert loaded._feature_log_prob == computed._feature_log_prob
+            assert loaded.feature_matrix().words == ["BALLOON", "TEST", "SEQUOIA"]
+            assert np.array_equal(
+                loaded.feature_matrix().to_array(), computed.feature_matrix().to_array()
+            )
+            double = ALL_FEATURES.index(DoubleLettersFeature(2))
+            assert loaded.feature_matrix().to_array()[double].tolist() == [
+                True,
+                False,
+                False,
+            ]
+
+            compiled_path = os.path.join(d, "word_features.bin")
+            assert loaded.compile(compiled_path) == compiled_path
+            assert os.path.getsize(compiled_path) > 0
+
+            with open(computed._compiled_path, "wb") as f:
+                f.write(b"not a model file")
+            with self.assertLogs("sputter.word_features", level="WARNING"):
+                recomputed = WordFeatureStatistics(ws)
+            assert recomputed._feature_log_prob == computed._feature_log_prob
+
+
+class TestWordFeatureMatrix(unittest.TestCase):
+    """Tests for the WordFeatureMatrix class."""
+
+    def test_matches_evaluate(self):
+        """Test that vectorized evaluation matches evaluating each word."""
+        words = list(word_statistics().word_frequencies())[::500] + [
+            "A",
+            "BALLOON",
+            "HEHE",
+            "NINEONEONE",
+        ]
+        matrix = WordFeatureMatrix.evaluate(ALL_FEATURES, words)
+        assert matrix.bits.shape == (len(ALL_FEATURES), (len(words) + 7) // 8)
+        array = matrix.to_array()
+        for feature, row in zip(ALL_FEATURES, array, strict=True):
+            expected = [feature.evaluate(WordFeaturePrecomputes(w)) for w in words]
+            assert row.tolist() == expected, feature
+
+    def test_weighted_counts(self):
+        """Test that weighted counts sum the weights of the words with each feature."""
+        features = [DoubleLettersFeature(1), UniqueVowelCountFeature(1)]
+        matrix = WordFeatureMatrix.evaluate(features, ["BALLOON", "TREE", "CAT"])
+        assert matrix.to_array().tolist() == [
+            [False, True, False],
+            [False, True, True],
+        ]
+        counts = matrix.weighted_counts([1.0, 2.0, 4.0])
+        assert np.array_equal(counts, [2.0, 6.0])
+
+    def test_invalid_words(self):
+        """Test that words with characters other than A to Z are rejected."""
+        for word in ["Cat", "DON'T", "CAFÉ"]:
+            with pytest.raises(ValueError, match="other than A to Z"):
+                WordListPrecomputes(["TREE", word])
+        assert WordListPrecomputes([]).letter_counts.shape == (0, 26)